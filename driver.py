@@ -17,6 +17,7 @@
 # You should have received a copy of the GNU Lesser General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+import io
 from functools import lru_cache
 
 import owlready2
@@ -51,7 +52,7 @@ class BaseGraph(object):
                    
                    "_get_obj_triples_transitive_sp", "_get_obj_triples_transitive_po", "_get_obj_triples_transitive_sym", "_get_obj_triples_transitive_sp_indirect"]
   
-  WORLD_METHODS = [] # "get_equivs_s_o"
+  WORLD_METHODS = ["_get_obj_triples_many_sp_cso", "_unabbreviate_many"] # "get_equivs_s_o"
   
   ONTO_METHODS = ["_add_obj_triple_raw_spo", "_set_obj_triple_raw_spo", "_add_data_triple_raw_spod", "_set_data_triple_raw_spod"]
   
@@ -125,9 +126,18 @@ class BaseSubGraph(BaseGraph):
     self.parent = parent
     self.onto   = onto
     
-  def parse(self, f, format = None, delete_existing_triples = True, default_base = ""):
+  def parse(self, f, format = None, delete_existing_triples = True, default_base = "", parallel = 0):
+    decompressed = _open_decompressed(f)
+    if not decompressed is f: return self.parse(decompressed, format, delete_existing_triples, default_base)
+    
     format = format or _guess_format(f)
     
+    if (format == "ntriples") and (parallel > 1) and os.path.isfile(getattr(f, "name", "") or ""):
+      import concurrent.futures
+      with concurrent.futures.ProcessPoolExecutor(parallel) as executor:
+        parts = executor.map(_parse_ntriples_chunk, *zip(*_split_ntriples(f.name, parallel)))
+        return self.insert_parsed(parts, f.name, delete_existing_triples)
+      
     if   format == "ntriples":
       objs, datas, on_prepare_obj, on_prepare_data, insert_objs, insert_datas, new_blank, _abbreviate, on_finish = self.create_parse_func(getattr(f, "name", ""), delete_existing_triples)
       
@@ -137,40 +147,16 @@ class BaseSubGraph(BaseGraph):
           owlready2_optimized.parse_ntriples(f, objs, datas, insert_objs, insert_datas, _abbreviate, new_blank, default_base)
           
         else:
-          splitter = re.compile("\s")
           bn_src_2_sql = {}
+          def blank(bn):
+            x = bn_src_2_sql.get(bn)
+            if x is None: x = bn_src_2_sql[bn] = new_blank()
+            return x
           
           line = f.readline().decode("utf8")
           while line:
             current_line += 1
-            if (not line.startswith("#")) and (not line.startswith("\n")):
-              if not line.endswith("\n"): line = "%s\n" % line
-              s,p,o = splitter.split(line[:-3], 2)
-              
-              if   s.startswith("<"): s = s[1:-1]
-              elif s.startswith("_"):
-                bn = bn_src_2_sql.get(s)
-                if bn is None: bn = bn_src_2_sql[s] = new_blank()
-                s = bn
-              
-              p = p[1:-1]
-            
-              if   o.startswith("<"): on_prepare_obj(s, p, o[1:-1])
-              elif o.startswith("_"):
-                bn = bn_src_2_sql.get(o)
-                if bn is None: bn = bn_src_2_sql[o] = new_blank()
-                on_prepare_obj(s, p, bn)
-              elif o.startswith('"'):
-                o, d = o.rsplit('"', 1)
-                if d.startswith("^"):
-                  d = d[3:-1]
-                  if   d in INT_DATATYPES:   o = int  (o[1:])
-                  elif d in FLOAT_DATATYPES: o = float(o[1:])
-                  else:                      o = o[1:].encode("raw-unicode-escape").decode("unicode-escape")
-                else:
-                  o = o[1:].encode("raw-unicode-escape").decode("unicode-escape")
-                on_prepare_data(s, p, o, d)
-                
+            _parse_ntriples_line(line, on_prepare_obj, on_prepare_data, blank)
             line = f.readline().decode("utf8")
           
         onto_base_iri = on_finish()
@@ -220,6 +206,217 @@ class BaseSubGraph(BaseGraph):
     
   
   
+  def insert_parsed(self, parts, filename = "", delete_existing_triples = True):
+    """Inserts the parts of a file parsed by _parse_to_batches() or _parse_ntriples_chunk(), in the given order.
+Blank nodes are shared between parts when their labels are known."""
+    objs, datas, on_prepare_obj, on_prepare_data, insert_objs, insert_datas, new_blank, _abbreviate, on_finish = self.create_parse_func(filename, delete_existing_triples)
+    
+    blanks = {}
+    for i, part in enumerate(parts):
+      iris, obj_chunks, data_chunks = part[:3]
+      labels  = part[4] if len(part) > 4 else None
+      storids = [None]
+      storids.extend(_abbreviate(iri) for iri in iris[1:])
+      def remap(x):
+        if x > 0: return storids[x]
+        key = labels[-x] if labels else (i, x)
+        bn = blanks.get(key)
+        if bn is None: bn = blanks[key] = new_blank()
+        return bn
+      
+      for chunk in obj_chunks:
+        objs.extend((remap(s), storids[p], remap(o)) for (s, p, o) in chunk)
+        insert_objs()
+      for chunk in data_chunks:
+        datas.extend((remap(s), storids[p], o, storids[d] if isinstance(d, int) and (d > 0) else d) for (s, p, o, d) in chunk)
+        insert_datas()
+    return on_finish()
+  
+  
+class _BatchGraph(BaseSubGraph):
+  """Parses a file without a quadstore (e.g. in another process), using local integer identifiers for IRIs
+and blank nodes. The result can be inserted later with BaseSubGraph.insert_parsed()."""
+  def __init__(self):
+    self.iris        = [None]
+    self.iri_2_id    = {}
+    self.obj_chunks  = []
+    self.data_chunks = []
+    self.nb_blank    = 0
+    
+  def __len__(self): return 1
+  
+  def create_parse_func(self, filename = None, delete_existing_triples = True):
+    objs  = []
+    datas = []
+    iris     = self.iris
+    iri_2_id = self.iri_2_id
+    
+    def _abbreviate(iri):
+      x = iri_2_id.get(iri)
+      if x is None:
+        x = iri_2_id[iri] = len(iris)
+        iris.append(iri)
+      return x
+    
+    def new_blank():
+      self.nb_blank += 1
+      return -self.nb_blank
+    
+    def insert_objs():
+      if objs: self.obj_chunks.append(objs[:])
+      objs.clear()
+      
+    def insert_datas():
+      if datas: self.data_chunks.append(datas[:])
+      datas.clear()
+      
+    def on_prepare_obj(s, p, o):
+      if isinstance(s, str): s = _abbreviate(s)
+      if isinstance(o, str): o = _abbreviate(o)
+      objs.append((s, _abbreviate(p), o))
+      if len(objs) > 1000000: insert_objs()
+      
+    def on_prepare_data(s, p, o, d):
+      if isinstance(s, str): s = _abbreviate(s)
+      if d and (not d.startswith("@")): d = _abbreviate(d)
+      datas.append((s, _abbreviate(p), o, d or 0))
+      if len(datas) > 1000000: insert_datas()
+      
+    def on_finish():
+      insert_objs()
+      insert_datas()
+      
+    return objs, datas, on_prepare_obj, on_prepare_data, insert_objs, insert_datas, new_blank, _abbreviate, on_finish
+  
+  def get_parsed(self):
+    imports = []
+    owl_imports_id = self.iri_2_id.get("http://www.w3.org/2002/07/owl#imports")
+    if owl_imports_id:
+      imports = [self.iris[o] for chunk in self.obj_chunks for (s, p, o) in chunk if (p == owl_imports_id) and (o > 0)]
+    return self.iris, self.obj_chunks, self.data_chunks, imports
+  
+def _parse_to_batches(f, default_base = ""):
+  if f.startswith("http:") or f.startswith("https:"):
+    import urllib.request
+    fileobj = urllib.request.urlopen(f)
+  else:
+    fileobj = open(f, "rb")
+  try:
+    graph = _BatchGraph()
+    graph.parse(fileobj, default_base = default_base)
+  finally:
+    fileobj.close()
+  return graph.get_parsed()
+
+
+_NTRIPLES_PARALLEL_CHUNK = 64 * 1024 * 1024
+
+def _split_ntriples(filename, parallel):
+  """Splits an NTriples file in byte ranges, at least one per process; each range is then extended to line boundaries."""
+  size = os.path.getsize(filename)
+  nb   = max(parallel, -(-size // _NTRIPLES_PARALLEL_CHUNK))
+  step = -(-size // nb) or 1
+  return [(filename, start, min(start + step, size)) for start in range(0, size or 1, step)]
+
+def _parse_ntriples_chunk(filename, start, end):
+  """Parses the lines of an NTriples file that start between the start and end offsets.
+Blank nodes are given local negative identifiers, and their labels are returned for sharing them between chunks."""
+  graph = _BatchGraph()
+  objs, datas, on_prepare_obj, on_prepare_data, insert_objs, insert_datas, new_blank, _abbreviate, on_finish = graph.create_parse_func()
+  labels   = [None]
+  bn_2_id  = {}
+  def blank(bn):
+    x = bn_2_id.get(bn)
+    if x is None:
+      x = bn_2_id[bn] = new_blank()
+      labels.append(bn)
+    return x
+  
+  with open(filename, "rb") as f:
+    if start:
+      f.seek(start - 1)
+      f.readline() # Skip the line that started in the previous chunk
+      if f.tell() > end: return graph.get_parsed() + (labels,)
+    data = f.read(end - f.tell())
+    if data and not data.endswith(b"\n"): data += f.readline()
+    
+  current_line = 0
+  try:
+    for line in data.decode("utf8").splitlines(True):
+      current_line += 1
+      _parse_ntriples_line(line, on_prepare_obj, on_prepare_data, blank)
+  except Exception as e:
+    raise OwlReadyOntologyParsingError("NTriples parsing error (or unrecognized file format) in %s, line %s after byte %s." % (filename, current_line, start)) from e
+  on_finish()
+  return graph.get_parsed() + (labels,)
+
+_ntriples_splitter = re.compile(r"\s")
+def _parse_ntriples_line(line, on_prepare_obj, on_prepare_data, blank):
+  if line.startswith("#") or line.startswith("\n"): return
+  if not line.endswith("\n"): line = "%s\n" % line
+  s,p,o = _ntriples_splitter.split(line[:-3], 2)
+  
+  if   s.startswith("<"): s = s[1:-1]
+  elif s.startswith("_"): s = blank(s)
+  
+  p = p[1:-1]
+  
+  if   o.startswith("<"): on_prepare_obj(s, p, o[1:-1])
+  elif o.startswith("_"): on_prepare_obj(s, p, blank(o))
+  elif o.startswith('"'):
+    o, d = o.rsplit('"', 1)
+    if d.startswith("^"):
+      d = d[3:-1]
+      if   d in INT_DATATYPES:   o = int  (o[1:])
+      elif d in FLOAT_DATATYPES: o = float(o[1:])
+      else:                      o = o[1:].encode("raw-unicode-escape").decode("unicode-escape")
+    else:
+      o = o[1:].encode("raw-unicode-escape").decode("unicode-escape")
+    on_prepare_data(s, p, o, d)
+    
+
+_COMPRESSION_MAGICS = [(b"\x1f\x8b", "gzip"), (b"BZh", "bz2"), (b"\xfd7zXZ\x00", "xz"), (b"\x28\xb5\x2f\xfd", "zstd")]
+
+def _guess_compression(f):
+  if f.seekable():
+    s = f.read(6)
+    f.seek(0)
+  else:
+    s = f.peek(6)
+  for magic, compression in _COMPRESSION_MAGICS:
+    if s.startswith(magic): return compression
+  return None
+
+def _open_decompressed(f):
+  """Returns a (non-seekable) file object that decompresses f on the fly if f is compressed, or f itself otherwise."""
+  if isinstance(f, io.TextIOBase): return f
+  compression = _guess_compression(f)
+  if   compression is None: return f
+  if   compression == "gzip":
+    import gzip
+    decompressed = gzip.GzipFile(fileobj = f, mode = "rb")
+  elif compression == "bz2":
+    import bz2
+    decompressed = bz2.BZ2File(f, "rb")
+  elif compression == "xz":
+    import lzma
+    decompressed = lzma.LZMAFile(f, "rb")
+  else:
+    import zstandard
+    decompressed = zstandard.ZstdDecompressor().stream_reader(f, read_across_frames = True)
+  return io.BufferedReader(_Unseekable(decompressed, getattr(f, "name", None), getattr(f, "url", None)), 1 << 16)
+
+class _Unseekable(io.RawIOBase):
+  def __init__(self, f, name, url):
+    self.f = f
+    if isinstance(name, str): self.name = name # Only a real file name, because its modification time is read
+    if not url is None:       self.url  = url  # For error messages
+  def readable(self): return True
+  def readinto(self, b):
+    data = self.f.read(len(b))
+    b[:len(data)] = data
+    return len(data)
+  
 def _guess_format(f):
   if f.seekable():
     s = f.read(1000)
@@ -239,48 +436,85 @@ def _guess_format(f):
   return "rdfxml"
 
 
-def _save(f, format, graph, filter = None):
-  if   format == "ntriples":
-    _unabbreviate = lru_cache(None)(graph._unabbreviate)
-    
-    for s,p,o,d in graph._iter_triples():
-      if filter and callable(filter) and not filter(graph, s, p, o, d): continue
-      if   s < 0: s = "_:%s" % (-s)
-      else:       s = "<%s>" % _unabbreviate(s)
-      p = "<%s>" % _unabbreviate(p)
-      if d is None:
-        if o < 0: o = "_:%s" % (-o)
-        else:     o = "<%s>" % _unabbreviate(o)
+_NTRIPLES_CHUNK = 100000
+
+def _iter_ntriples_chunks(graph, quads = False, filter = None):
+  _unabbreviate = lru_cache(None)(graph._unabbreviate)
+  if quads: c_2_iri = { c : iri for c, iri in graph._iter_ontology_iri() }
+  
+  lines = []
+  for c,s,p,o,d in graph._iter_triples(True):
+    if filter and callable(filter):
+      if quads:
+        if not filter(graph, s, p, o, d, c): continue
       else:
-        if isinstance(o, str):  o = o.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
-        if   isinstance(d, str) and d.startswith("@"): o = '"%s"%s' % (o, d)
-        elif d == 0:                                   o = '"%s"' % o
-        else:                                          o = '"%s"^^<%s>' % (o, _unabbreviate(d)) # Unabbreviate datatype's iri
-        
-      f.write(("%s %s %s .\n" % (s, p, o)).encode("utf8"))
+        if not filter(graph, s, p, o, d): continue
+    if   s < 0: s = "_:%s" % (-s)
+    else:       s = "<%s>" % _unabbreviate(s)
+    p = "<%s>" % _unabbreviate(p)
+    if d is None:
+      if o < 0: o = "_:%s" % (-o)
+      else:     o = "<%s>" % _unabbreviate(o)
+    else:
+      if isinstance(o, str):  o = o.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+      if   isinstance(d, str) and d.startswith("@"): o = '"%s"%s' % (o, d)
+      elif d == 0:                                   o = '"%s"' % o
+      else:                                          o = '"%s"^^<%s>' % (o, _unabbreviate(d)) # Unabbreviate datatype's iri
       
-  elif format == "nquads":
-    _unabbreviate = lru_cache(None)(graph._unabbreviate)
-    
-    c_2_iri = { c : iri for c, iri in graph._iter_ontology_iri() }
-    
-    for c,s,p,o,d in graph._iter_triples(True):
-      if filter and callable(filter) and not filter(graph, s, p, o, d, c): continue
-      if   s < 0: s = "_:%s" % (-s)
-      else:       s = "<%s>" % _unabbreviate(s)
-      p = "<%s>" % _unabbreviate(p)
-      if d is None:
-        if o < 0: o = "_:%s" % (-o)
-        else:     o = "<%s>" % _unabbreviate(o)
-      else:
-        if isinstance(o, str):  o = o.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
-        if   isinstance(d, str) and d.startswith("@"): o = '"%s"%s' % (o, d)
-        elif d == 0:                                   o = '"%s"' % o
-        else:                                          o = '"%s"^^<%s>' % (o, _unabbreviate(d)) # Unabbreviate datatype's iri
-        
-      f.write(("<%s> %s %s %s .\n" % (c_2_iri[c], s, p, o)).encode("utf8"))
+    if quads: lines.append("<%s> %s %s %s .\n" % (c_2_iri[c], s, p, o))
+    else:     lines.append("%s %s %s .\n" % (s, p, o))
+    if len(lines) >= _NTRIPLES_CHUNK:
+      yield "".join(lines)
+      lines = []
+  if lines: yield "".join(lines)
+  
+def _get_compressor(compression):
+  if   compression == "gzip":
+    import gzip
+    return gzip.compress
+  elif compression == "bz2":
+    import bz2
+    return bz2.compress
+  elif compression == "xz":
+    import lzma
+    return lzma.compress
+  elif compression == "zstd":
+    import zstandard
+    return zstandard.ZstdCompressor().compress
+  raise ValueError("Unsupported compression '%s'!" % compression)
+
+def _write_chunks(f, chunks, compression = None, threads = 1):
+  # Each chunk is compressed independently; concatenated gzip / bz2 / xz / zstd streams are valid files.
+  # Compressors release the GIL, hence chunks can be compressed in several threads.
+  if compression: compress = _get_compressor(compression)
+  else:           compress = None
+  
+  if compress and (threads > 1):
+    import concurrent.futures, collections
+    with concurrent.futures.ThreadPoolExecutor(threads) as executor:
+      pending = collections.deque()
+      for chunk in chunks:
+        pending.append(executor.submit(lambda chunk: compress(chunk.encode("utf8")), chunk))
+        if len(pending) >= 2 * threads: f.write(pending.popleft().result())
+      while pending: f.write(pending.popleft().result())
+      
+  else:
+    for chunk in chunks:
+      if compress: f.write(compress(chunk.encode("utf8")))
+      else:        f.write(chunk.encode("utf8"))
       
-  elif format == "rdfxml":
+def _save(f, format, graph, filter = None, compression = None, threads = 1):
+  if (format == "ntriples") or (format == "nquads"):
+    if (filter is None) and hasattr(graph, "_iter_ntriples_chunks"):
+      chunks = graph._iter_ntriples_chunks(format == "nquads")
+    else:
+      chunks = _iter_ntriples_chunks(graph, format == "nquads", filter)
+    _write_chunks(f, chunks, compression, threads)
+    return
+  
+  if compression: raise ValueError("Compression is only supported for N-Triples and N-Quads!")
+  
+  if format == "rdfxml":
     @lru_cache(None)
     def _unabbreviate(storid):
       r = graph._unabbreviate(storid).replace("&", "&amp;")
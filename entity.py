@@ -322,19 +322,20 @@ class EntityClass(type):
         if isinstance(equivalent, Class.__class__) and not equivalent in s:
           equivalent._fill_descendants(s, True, only_loaded, world, onto)
           
-    for x in world._get_obj_triples_transitive_po(Class._rdfs_is_a, Class.storid):
-      if not x < 0:
-        if only_loaded:
-          descendant = world._entities.get(x)
-          if descendant is None: continue
-        else:
-          descendant = world._get_by_storid(x, None, Class.__class__, onto)
-        if (descendant is Class): continue
-        if not descendant in s:
-          s.add(descendant)
-          for equivalent in descendant.equivalent_to.indirect():
-            if isinstance(equivalent, Class.__class__) and not equivalent in s:
-              equivalent._fill_descendants(s, True, only_loaded, world, onto)
+    xs = [x for x in world._get_obj_triples_transitive_po(Class._rdfs_is_a, Class.storid) if not x < 0]
+    if not only_loaded: world._load_many(xs, onto)
+    for x in xs:
+      if only_loaded:
+        descendant = world._entities.get(x)
+        if descendant is None: continue
+      else:
+        descendant = world._get_by_storid(x, None, Class.__class__, onto)
+      if (descendant is Class): continue
+      if not descendant in s:
+        s.add(descendant)
+        for equivalent in descendant.equivalent_to.indirect():
+          if isinstance(equivalent, Class.__class__) and not equivalent in s:
+            equivalent._fill_descendants(s, True, only_loaded, world, onto)
               
   def subclasses(Class, only_loaded = False, world = None):
     if Class is Thing:
@@ -342,10 +343,12 @@ class EntityClass(type):
         import owlready2
         world = owlready2.default_world
         
-      for x, in world.graph.db.execute(
+      xs = [x for x, in world.graph.execute(
     """SELECT q1.s FROM objs q1 WHERE q1.s > 0 and q1.p = ? AND q1.o = ?
 EXCEPT SELECT q2.s FROM objs q2 WHERE q2.p = ? and q2.o != ?""",
-          (rdf_type, owl_class, rdfs_subclassof, owl_thing)):
+          (rdf_type, owl_class, rdfs_subclassof, owl_thing))]
+      if not only_loaded: world._load_many(xs)
+      for x in xs:
         if only_loaded:
           subclass = world._entities.get(x)
           if not subclass is None: yield subclass
@@ -375,9 +378,10 @@ EXCEPT SELECT q2.s FROM objs q2 WHERE q2.p = ? and q2.o != ?""",
             if not subclass is None: yield subclass
             
       else:
-        for x in world._get_obj_triples_po_s(Class._rdfs_is_a, Class.storid):
-          if not x < 0:
-            yield world._get_by_storid(x, None, ThingClass, Class.namespace.ontology)
+        xs = [x for x in world._get_obj_triples_po_s(Class._rdfs_is_a, Class.storid) if not x < 0]
+        world._load_many(xs, Class.namespace.ontology)
+        for x in xs:
+          yield world._get_by_storid(x, None, ThingClass, Class.namespace.ontology)
         
   def constructs(Class, Prop = None):
     def _top_bn(onto, s):
@@ -406,7 +410,13 @@ def issubclass_owlready(Class, Parent_or_tuple):
   if isinstance(Class, EntityClass):
     if not isinstance(Parent_or_tuple, tuple): Parent_or_tuple = (Parent_or_tuple,)
     parent_storids = { Parent.storid for Parent in Parent_or_tuple }
-    
+
+    graph = Class.namespace.world.graph
+    if graph and graph.hierarchy_indexed and (Class._rdfs_is_a == rdfs_subclassof):
+      if graph._hierarchy_is_subclass(Class.storid, parent_storids): return True
+      equivalent_storids = { Equivalent.storid for Parent in Parent_or_tuple for Equivalent in Parent.equivalent_to.indirect() }
+      return graph._hierarchy_is_subclass(Class.storid, equivalent_storids)
+
     Class_parents = set(Class.namespace.world._get_obj_triples_transitive_sp(Class.storid, Class._rdfs_is_a))
     Class_parents.add(Class.storid)
     if not parent_storids.isdisjoint(Class_parents): return True
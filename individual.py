@@ -104,10 +104,8 @@ class Thing(metaclass = ThingClass):
           
         return already_existing
       
-    #_cache_entity(entity)
-    #return object.__new__(Class)
     #print(namespace, kargs)
-    return _cache_entity(object.__new__(Class))
+    return object.__new__(Class)
   
   def __init__(self, name = None, namespace = None, **kargs):
     self.namespace = namespace or (CURRENT_NAMESPACES.get() and CURRENT_NAMESPACES.get()[-1]) or self.__class__.namespace
@@ -129,6 +127,7 @@ class Thing(metaclass = ThingClass):
       if isinstance(name, int): self.storid = name or self.namespace.world.graph.new_blank_node()
       else:                     self.storid = self.namespace.world._abbreviate(iri)
       self.namespace.world._entities[self.storid] = self
+      _cache_entity(self)
       if isinstance(self.__class__, FusionClass):
         self.__dict__["is_a"] = CallbackList(self.__class__.__bases__, self, Thing._instance_is_a_changed)
       else:
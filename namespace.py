@@ -221,6 +221,7 @@ WHERE q1.p=? AND q1.o=?
     #onto = CURRENT_NAMESPACES.get() or self
     #if CURRENT_NAMESPACES[-1] is None: self._del_obj_triple_raw_spo(s, p, o)
     #else:   CURRENT_NAMESPACES[-1].ontology._del_obj_triple_raw_spo(s, p, o)
+    if not self.world._reasoning_changes is None: self._record_obj_change(s, p, o, True)
     l = CURRENT_NAMESPACES.get()
     ((l and l[-1].ontology) or self)._del_obj_triple_raw_spo(s, p, o)
     if _LOG_LEVEL > 1:
@@ -229,9 +230,21 @@ WHERE q1.p=? AND q1.o=?
       if o and not ((isinstance(o, int) and (o < 0)) or (isinstance(o, str) and o.startswith('"'))): o = self._unabbreviate(o)
       print("* Owlready2 * DEL TRIPLE", s, p, o, file = sys.stderr)
       
+  def _record_obj_change(self, s, p, o, removed):
+    # Records the entities modified since the last incremental reasoning (see World._reasoning_changes);
+    # the objects that are removed (or replaced) are also modified.
+    changes = self.world._reasoning_changes
+    if   not s is None:
+      changes.add(s)
+      if removed and (o is None) and (not p is None): changes.update(self._get_obj_triples_sp_o(s, p))
+    elif o is None:
+      changes.add(p)
+    if not o is None: changes.add(o)
+    
   def _del_data_triple_spod(self, s = None, p = None, o = None, d = None):
     #if CURRENT_NAMESPACES[-1] is None: self._del_data_triple_raw_spod(s, p, o, d)
     #else:   CURRENT_NAMESPACES[-1].ontology._del_data_triple_raw_spod(s, p, o, d)
+    if not self.world._reasoning_changes is None: self.world._reasoning_changes.add(p if s is None else s)
     l = CURRENT_NAMESPACES.get()
     ((l and l[-1].ontology) or self)._del_data_triple_raw_spod(s, p, o, d)
     if _LOG_LEVEL > 1:
@@ -335,7 +348,20 @@ WHERE q1.p=? AND q1.o=?
         if sub is None: yield self._parse_bnode(s)
         
   def search(self, _use_str_as_loc_str = True, _case_sensitive = True, _bm25 = False, **kargs):
-    from owlready2.triplelite import _SearchList, _SearchMixin
+    from owlready2.triplelite import _SearchList, _search_cache_key
+    
+    prop_vals = self._search_prop_vals(_use_str_as_loc_str, kargs)
+    if self.world.search_cache.max_size and not _bm25: cache_key = _search_cache_key(prop_vals, _case_sensitive)
+    else:                                                cache_key = None
+    return _SearchList(self.world, prop_vals, None, _case_sensitive, _bm25, cache_key)
+  
+  def prepare_search(self, _use_str_as_loc_str = True, _case_sensitive = True, **kargs):
+    from owlready2.triplelite import _PreparedSearch
+    
+    return _PreparedSearch(self.world, self._search_prop_vals(_use_str_as_loc_str, kargs), _case_sensitive)
+  
+  def _search_prop_vals(self, _use_str_as_loc_str, kargs):
+    from owlready2.triplelite import _SearchMixin
     
     prop_vals = []
     for k, v0 in kargs.items():
@@ -344,7 +370,8 @@ WHERE q1.p=? AND q1.o=?
         if   k == "iri":
           prop_vals.append((" iri", v, None))
         elif (k == "is_a") or (k == "subclass_of") or (k == "type") or (k == "subproperty_of"):
-          if   isinstance(v, (_SearchMixin, Or)): v2 = v
+          if   isinstance(v, Param): raise ValueError("Param cannot be used for '%s'!" % k)
+          elif isinstance(v, (_SearchMixin, Or)): v2 = v
           elif isinstance(v, int):                v2 = v
           else:                                   v2 = v.storid
           prop_vals.append((" %s" % k, v2, None))
@@ -361,7 +388,10 @@ WHERE q1.p=? AND q1.o=?
           if v is None:
             v2 = None
           else:
-            if   isinstance(v, FTS):  v2 = v; d = "*"
+            if   isinstance(v, Param):
+              v2 = v
+              if not (Prop and (Prop._owl_type == owl_object_property)): d = "*" # Literal, with any datatype
+            elif isinstance(v, FTS):  v2 = v; d = "*"
             elif isinstance(v, NumS): v2 = v; d = "*"
             elif isinstance(v, _SearchMixin): v2 = v
             else:
@@ -375,7 +405,7 @@ WHERE q1.p=? AND q1.o=?
                 
           prop_vals.append((k2, v2, d))
           
-    return _SearchList(self.world, prop_vals, None, _case_sensitive, _bm25)
+    return prop_vals
     
   def search_one(self, **kargs): return self.search(**kargs).first()
   
@@ -384,34 +414,183 @@ onto_path = []
 
 owl_world = None
 
-_cache = [None] * (2 ** 16)
-_cache_index = 0
+class EntityCache(object):
+  """Keeps strong references to the most recently used entities of a World (World._entities is a weak dictionary),
+so as they are not reloaded from the quadstore each time they are needed. Eviction follows the CLOCK (second chance)
+algorithm: a hit only marks the entity as referenced, and the order of the cache is only modified when adding
+or evicting entities. The cache is limited in number of entities (max_size), and optionally in bytes (max_bytes,
+using the approximate size of the entities when they are added). Entities that get pin_after second chances are
+hot, and they are pinned automatically (up to max_pinned entities; pin_after = None disables it)."""
+  def __init__(self, max_size = 2 ** 16, max_bytes = None, pin_after = 8, max_pinned = 1024):
+    self.max_size    = max_size
+    self.max_bytes   = max_bytes
+    self.pin_after   = pin_after
+    self.max_pinned  = max_pinned
+    self.entities    = OrderedDict() # storid => entity, in insertion order
+    self.referenced  = set()         # storids of the entities used since they were (re)inserted
+    self.reference   = self.referenced.add
+    self.chances     = {}            # storid => number of second chances
+    self.sizes       = {}            # storid => approximate size in bytes (only if max_bytes is not None)
+    self.nb_bytes    = 0
+    self.pinned      = {}
+    self.auto_pinned = set()         # storids of the entities pinned automatically
+    self.hits        = 0
+    self.misses      = 0
+    self.evictions   = 0
+    
+  def add(self, entity):
+    entities = self.entities
+    key = entity.storid
+    if key in entities:
+      self.referenced.add(key)
+    elif not key in self.pinned:
+      entities[key] = entity
+      if self.max_bytes is None:
+        if len(entities) > self.max_size: self._evict()
+      else:
+        size = self.sizes[key] = _entity_size(entity)
+        self.nb_bytes += size
+        if (len(entities) > self.max_size) or (self.nb_bytes > self.max_bytes): self._evict()
+    return entity
+  
+  def hit(self, entity):
+    self.hits += 1
+    self.reference(entity.storid)
+    
+  def _evict(self):
+    entities   = self.entities
+    referenced = self.referenced
+    chances    = self.chances
+    while entities and ((len(entities) > self.max_size) or ((not self.max_bytes is None) and (self.nb_bytes > self.max_bytes))):
+      key, entity = entities.popitem(False)
+      if key in referenced: # Second chance
+        referenced.discard(key)
+        nb = chances[key] = chances.get(key, 0) + 1
+        if self.pin_after and (nb >= self.pin_after) and (len(self.auto_pinned) < self.max_pinned): # Hot entity
+          self._forget(key)
+          self.pinned[key] = entity
+          self.auto_pinned.add(key)
+        else:
+          entities[key] = entity
+      else:
+        self._forget(key)
+        self.evictions += 1
+    if len(referenced) > 2 * self.max_size: referenced.intersection_update(entities) # Forget entities no longer cached
+    
+  def _forget(self, key):
+    self.chances.pop(key, None)
+    if not self.max_bytes is None: self.nb_bytes -= self.sizes.pop(key, 0)
+    
+  def set_max_size(self, max_size):
+    self.max_size = max_size
+    self._evict()
+    
+  def set_max_bytes(self, max_bytes):
+    self.max_bytes = max_bytes
+    if max_bytes is None: self.sizes = {}
+    else:                 self.sizes = { key : _entity_size(entity) for (key, entity) in self.entities.items() }
+    self.nb_bytes = sum(self.sizes.values())
+    self._evict()
+    
+  def pin(self, entity):
+    self.remove(entity)
+    self.pinned[entity.storid] = entity
+    
+  def unpin(self, entity):
+    self.pinned.pop(entity.storid, None)
+    self.auto_pinned.discard(entity.storid)
+    
+  def remove(self, entity):
+    if not self.entities.pop(entity.storid, None) is None: self._forget(entity.storid)
+    self.pinned     .pop(entity.storid, None)
+    self.auto_pinned.discard(entity.storid)
+    self.referenced .discard(entity.storid)
+    
+  def clear(self):
+    self.entities   .clear()
+    self.pinned     .clear()
+    self.auto_pinned.clear()
+    self.referenced .clear()
+    self.chances    .clear()
+    self.sizes      .clear()
+    self.nb_bytes = 0
+    
+  def reset_stats(self): self.hits = self.misses = self.evictions = 0
+  
+  def get_stats(self):
+    return { "size" : len(self.entities), "max_size" : self.max_size, "bytes" : self.nb_bytes, "max_bytes" : self.max_bytes,
+             "pinned" : len(self.pinned), "auto_pinned" : len(self.auto_pinned), "hits" : self.hits, "misses" : self.misses, "evictions" : self.evictions }
+  
+  def __len__(self): return len(self.entities)
+  def __contains__(self, entity): return (self.entities.get(entity.storid) is entity) or (self.pinned.get(entity.storid) is entity)
+  def __iter__(self): return iter(list({ **self.entities, **self.pinned }.values()))
+  def __repr__(self): return "<EntityCache %s/%s entities, %s pinned>" % (len(self.entities), self.max_size, len(self.pinned))
+  
+def _entity_size(entity):
+  return sys.getsizeof(entity) + sum(sys.getsizeof(value) for value in entity.__dict__.values())
+
 
+class SearchCache(object):
+  """Keeps the results (as arrays of storids) of the most recent searches of a World. It is disabled by default
+(max_size = 0), and it is emptied whenever the quadstore is modified."""
+  def __init__(self, max_size = 0):
+    self.max_size  = max_size
+    self.results   = OrderedDict() # normalized search => storids, from least to most recently used
+    self.version   = None
+    self.hits      = 0
+    self.misses    = 0
+    self.evictions = 0
+    
+  def get(self, key, version):
+    if version != self.version:
+      self.results.clear()
+      self.version = version
+    storids = self.results.get(key)
+    if storids is None:
+      self.misses += 1
+    else:
+      self.hits += 1
+      self.results.move_to_end(key)
+    return storids
+  
+  def add(self, key, version, storids):
+    if version != self.version:
+      self.results.clear()
+      self.version = version
+    self.results[key] = storids
+    self.results.move_to_end(key)
+    while len(self.results) > self.max_size:
+      self.results.popitem(False)
+      self.evictions += 1
+      
+  def set_max_size(self, max_size):
+    self.max_size = max_size
+    while len(self.results) > max_size:
+      self.results.popitem(False)
+      self.evictions += 1
+      
+  def clear(self): self.results.clear()
+  
+  def reset_stats(self): self.hits = self.misses = self.evictions = 0
+  
+  def get_stats(self):
+    return { "size" : len(self.results), "max_size" : self.max_size, "hits" : self.hits, "misses" : self.misses, "evictions" : self.evictions }
+  
+  def __len__(self): return len(self.results)
+  def __repr__(self): return "<SearchCache %s/%s searches>" % (len(self.results), self.max_size)
+  
+  
 def _cache_entity(entity):
-  global _cache, _cache_index
-  _cache[_cache_index] = entity
-  _cache_index += 1
-  if _cache_index >= len(_cache): _cache_index = 0
+  entity.namespace.world.entity_cache.add(entity)
   return entity
 
 def _clear_cache():
   import gc
-  global _cache, _cache_index
-
-  d = weakref.WeakKeyDictionary()
-  for i in _cache:
-    if i is None: break
-    d[i] = 1
-  
-  _cache.__init__([None] * len(_cache))
-  _cache_index = 0
-  
+  for world in list(WORLDS) + [owl_world]:
+    if world: world.entity_cache.clear()
   gc.collect()
   gc.collect()
   gc.collect()
-  
-  for i in d.keys():
-    pass
 
 WORLDS = weakref.WeakSet()
 class World(_GraphManager):
@@ -425,7 +604,11 @@ class World(_GraphManager):
     self._reasoning_props = {}
     self._entities        = weakref.WeakValueDictionary()
     self._namespaces      = weakref.WeakValueDictionary()
+    self.entity_cache     = EntityCache()
+    self.search_cache     = SearchCache()
+    self._preparsed       = {}
     self._rdflib_store    = None
+    self._reasoning_changes = None # Entities modified since the last incremental reasoning (None if not tracked)
     self.graph            = None
     
     if not owl_world is None:
@@ -476,8 +659,26 @@ class World(_GraphManager):
     for Prop in new - old:
       self.graph.enable_full_text_search(Prop.storid)
   
+  def get_closure_indexed(self): return self.graph.closure_indexed
+  def set_closure_indexed(self, closure_indexed):
+    if closure_indexed: self.graph.enable_closure_index()
+    else:               self.graph.disable_closure_index()
+  closure_indexed = property(get_closure_indexed, set_closure_indexed)
+  
+  def get_hierarchy_indexed(self): return self.graph.hierarchy_indexed
+  def set_hierarchy_indexed(self, hierarchy_indexed):
+    if hierarchy_indexed: self.graph.enable_hierarchy_index()
+    else:                 self.graph.disable_hierarchy_index()
+  hierarchy_indexed = property(get_hierarchy_indexed, set_hierarchy_indexed)
+  
   def new_blank_node(self): return self.graph.new_blank_node()
   
+  def analyze(self): self.graph.analyze()
+  
+  def get_pragmas(self): return self.graph.get_pragmas()
+  
+  def bulk_load(self): return _BulkLoad(self)
+  
   def save(self, file = None, format = "rdfxml", **kargs):
     if   file is None:
       self.graph.commit()
@@ -532,18 +733,65 @@ class World(_GraphManager):
   
   def _get_by_storid(self, storid, full_iri = None, main_type = None, main_onto = None, trace = None, default_to_none = True):
     entity = self._entities.get(storid)
-    if not entity is None: return entity
+    if not entity is None: # Inlined EntityCache.hit(), for speed
+      cache = self.entity_cache
+      cache.hits += 1
+      cache.reference(storid)
+      return entity
+    self.entity_cache.misses += 1
     
     try:
       return self._load_by_storid(storid, full_iri, main_type, main_onto, default_to_none)
     except RecursionError:
       return self._load_by_storid(storid, full_iri, main_type, main_onto, default_to_none, ())
         
-  def _load_by_storid(self, storid, full_iri = None, main_type = None, main_onto = None, default_to_none = True, trace = None):
+  def get_many(self, iris_or_storids):
+    storids = [self._abbreviate(x, False) if isinstance(x, str) else x for x in iris_or_storids]
+    self._load_many(storids)
+    return [None if storid is None else self._get_by_storid(storid) for storid in storids]
+  
+  def _load_many(self, storids, main_onto = None):
+    # Fetch the rdf:type and is_a triples of the entities and of their (not yet loaded) parents by batch,
+    # level by level, then load the deepest levels (i.e. the parents) first.
+    entities = self._entities
+    rows     = defaultdict(list)
+    levels   = []
+    queried  = set()
+    todo     = { storid for storid in storids if (not storid is None) and (not storid in entities) }
+    while todo:
+      levels.append(todo)
+      queried.update(todo)
+      parents    = set()
+      classes    = []
+      properties = []
+      for c, s, o in self._get_obj_triples_many_sp_cso(sorted(todo), rdf_type):
+        rows[s, rdf_type].append((c, o))
+        if   o == owl_class: classes.append(s)
+        elif (o == owl_object_property) or (o == owl_data_property) or (o == owl_annotation_property): properties.append(s)
+        elif (o > 0) and (o != owl_named_individual): parents.add(o)
+      for ss, p in [(classes, rdfs_subclassof), (properties, rdfs_subpropertyof)]:
+        if ss:
+          for c, s, o in self._get_obj_triples_many_sp_cso(ss, p):
+            rows[s, p].append((c, o))
+            if o > 0: parents.add(o)
+      todo = { o for o in parents - queried if not o in entities }
+      
+    loaded = [] # Keep loaded entities alive until the end
+    for level in reversed(levels):
+      level = [storid for storid in level if (storid, rdf_type) in rows]
+      iris  = self._unabbreviate_many([storid for storid in level if storid > 0])
+      for storid in level:
+        if storid in entities: continue
+        try:
+          loaded.append(self._load_by_storid(storid, iris.get(storid), None, main_onto, True, None, rows))
+        except RecursionError:
+          loaded.append(self._load_by_storid(storid, iris.get(storid), None, main_onto, True, (), rows))
+          
+  def _load_by_storid(self, storid, full_iri = None, main_type = None, main_onto = None, default_to_none = True, trace = None, rows = None):
     with LOADING:
       types       = []
       is_a_bnodes = []
-      for graph, obj in self._get_obj_triples_sp_co(storid, rdf_type):
+      for graph, obj in (self._get_obj_triples_sp_co(storid, rdf_type) if rows is None else rows.get((storid, rdf_type), ())):
         if main_onto is None: main_onto = self.graph.context_2_user_context(graph)
         if   obj == owl_class:               main_type = ThingClass
         elif obj == owl_object_property:     main_type = ObjectPropertyClass;     types.append(ObjectProperty)
@@ -572,7 +820,7 @@ class World(_GraphManager):
             trace = (*trace, storid)
             
         is_a_entities = []
-        for graph, obj in self._get_obj_triples_sp_co(storid, main_type._rdfs_is_a):
+        for graph, obj in (self._get_obj_triples_sp_co(storid, main_type._rdfs_is_a) if rows is None else rows.get((storid, main_type._rdfs_is_a), ())):
           if obj < 0: is_a_bnodes.append((self.graph.context_2_user_context(graph), obj))
           else:
             obj2 = self._entities.get(obj)
@@ -662,13 +910,41 @@ class World(_GraphManager):
     return entity
   
   def _parse_bnode(self, bnode):
-    c = self.graph.db.execute("""SELECT c FROM objs WHERE s=? LIMIT 1""", (bnode,)).fetchone()
+    c = self.graph.execute("""SELECT c FROM objs WHERE s=? LIMIT 1""", (bnode,)).fetchone()
     if c:
       c = c[0]
       for onto in self.ontologies.values():
         if onto.graph.c == c: return onto._parse_bnode(bnode)
       
      
+class _BulkInsert(object):
+  def __init__(self, ontology):
+    self.ontology = ontology
+    
+  def __enter__(self):
+    self.ontology.__enter__()
+    self.ontology.world.graph.begin_bulk_insert()
+    return self
+  
+  def __exit__(self, exc_type = None, exc_val = None, exc_tb = None):
+    try:     self.ontology.world.graph.end_bulk_insert()
+    finally: self.ontology.__exit__(exc_type, exc_val, exc_tb)
+    
+  def flush(self): self.ontology.world.graph.flush_bulk_insert()
+  
+  
+class _BulkLoad(object):
+  def __init__(self, world):
+    self.world = world
+    
+  def __enter__(self):
+    self.world.graph.begin_bulk_load()
+    return self
+  
+  def __exit__(self, exc_type = None, exc_val = None, exc_tb = None):
+    self.world.graph.end_bulk_load()
+    
+    
 class Ontology(Namespace, _GraphManager):
   def __init__(self, world, base_iri, name = None):
     self.world       = world # Those 2 attributes are required before calling Namespace.__init__
@@ -704,6 +980,7 @@ class Ontology(Namespace, _GraphManager):
     self.world.graph.acquire_write_lock()
     del self.world.ontologies[self.base_iri]
     self.graph.destroy()
+    self.world._reasoning_changes = None
     for entity in list(self.world._entities.values()):
       if entity.namespace.ontology is self: del self.world._entities[entity.storid]
     self.world.graph.release_write_lock()
@@ -745,15 +1022,46 @@ class Ontology(Namespace, _GraphManager):
       self.loaded = True
       if self.graph: self.graph.set_last_update_time(time.time())
       
+  def bulk_insert(self): return _BulkInsert(self)
+  
+  def add_triples(self, triples):
+    with self.bulk_insert():
+      abbreviate = self._abbreviate
+      add_obj    = self.graph._add_obj_triple_raw_bulk_spo
+      add_data   = self.graph._add_data_triple_raw_bulk_spod
+      def to_storid(x):
+        if isinstance(x, int): return x
+        if isinstance(x, str): return abbreviate(x)
+        return x.storid
+      for triple in triples:
+        if len(triple) == 3:
+          s, p, o = triple
+          add_obj(to_storid(s), to_storid(p), to_storid(o))
+        else:
+          s, p, o, d = triple
+          if   d is None: o, d = to_literal(o)
+          elif isinstance(d, str) and not d.startswith("@"): d = abbreviate(d)
+          elif not isinstance(d, (int, str)): d = d.storid
+          add_data(to_storid(s), to_storid(p), o, d)
+          
   def _destroy_cached_entities(self):
     _entities = self.world._entities
-    for i, cached in enumerate(_cache):
-      if (not cached is None) and (cached.namespace.ontology is self):
+    for cached in self.world.entity_cache:
+      if cached.namespace.ontology is self:
         if cached.storid in _entities: del _entities[cached.storid]
-        _cache[i] = None
+        self.world.entity_cache.remove(cached)
         
-  def load(self, only_local = False, fileobj = None, reload = False, reload_if_newer = False, **args):
+  def load(self, only_local = False, fileobj = None, reload = False, reload_if_newer = False, parallel = 0, **args):
     if self.loaded and (not reload): return self
+    if parallel and (not fileobj) and (not args):
+      self.world.graph.acquire_write_lock()
+      try:
+        self._parse_in_parallel(parallel, only_local, reload, reload_if_newer)
+        return self.load(only_local, None, reload, reload_if_newer)
+      finally:
+        self.world._preparsed.clear()
+        self.world.graph.release_write_lock()
+        
     if self.base_iri == "http://www.lesfleursdunormal.fr/static/_downloads/owlready_ontology.owl#":
       f = os.path.join(os.path.dirname(__file__), "owlready_ontology.owl")
     elif not fileobj:
@@ -769,10 +1077,13 @@ class Ontology(Namespace, _GraphManager):
     if f.startswith("http:") or f.startswith("https:"):
       if  reload or (self.graph.get_last_update_time() == 0.0): # Never loaded
         if _LOG_LEVEL: print("* Owlready2 *     ...loading ontology %s from %s..." % (self.name, f), file = sys.stderr)
-        try:     fileobj = urllib.request.urlopen(f)
-        except:  raise OwlReadyOntologyParsingError("Cannot download '%s'!" % f)
-        try:     new_base_iri = self.graph.parse(fileobj, default_base = self.base_iri, **args)
-        finally: fileobj.close()
+        preparsed = self.world._preparsed.pop(f, None)
+        if preparsed: new_base_iri = self.graph.insert_parsed(preparsed)
+        else:
+          try:     fileobj = urllib.request.urlopen(f)
+          except:  raise OwlReadyOntologyParsingError("Cannot download '%s'!" % f)
+          try:     new_base_iri = self.graph.parse(fileobj, default_base = self.base_iri, **args)
+          finally: fileobj.close()
     elif fileobj:
       if _LOG_LEVEL: print("* Owlready2 *     ...loading ontology %s from %s..." % (self.name, getattr(fileobj, "name", "") or getattr(fileobj, "url", "???")), file = sys.stderr)
       try:     new_base_iri = self.graph.parse(fileobj, default_base = self.base_iri, **args)
@@ -780,9 +1091,12 @@ class Ontology(Namespace, _GraphManager):
     else:
       if reload or (reload_if_newer and (os.path.getmtime(f) > self.graph.get_last_update_time())) or (self.graph.get_last_update_time() == 0.0):
         if _LOG_LEVEL: print("* Owlready2 *     ...loading ontology %s from %s..." % (self.name, f), file = sys.stderr)
-        fileobj = open(f, "rb")
-        try:     new_base_iri = self.graph.parse(fileobj, default_base = self.base_iri, **args)
-        finally: fileobj.close()
+        preparsed = self.world._preparsed.pop(f, None)
+        if preparsed: new_base_iri = self.graph.insert_parsed(preparsed, f)
+        else:
+          fileobj = open(f, "rb")
+          try:     new_base_iri = self.graph.parse(fileobj, default_base = self.base_iri, **args)
+          finally: fileobj.close()
       else:
         if _LOG_LEVEL: print("* Owlready2 *     ...loading ontology %s (cached)..." % self.name, file = sys.stderr)
         
@@ -832,6 +1146,55 @@ class Ontology(Namespace, _GraphManager):
         owlready2.default_world, owlready2.IRIS, owlready2.get_ontology, owlready2.get_namespace = saved
     return self
   
+  def _parse_in_parallel(self, parallel, only_local, reload, reload_if_newer):
+    # Parses the ontology and its imports (recursively) in a pool of processes;
+    # the results are inserted in the quadstore by the usual, sequential, loading.
+    import concurrent.futures
+    from owlready2.driver import _parse_to_batches, _parse_ntriples_chunk, _split_ntriples, _guess_format, _open_decompressed, _NTRIPLES_PARALLEL_CHUNK
+    
+    futures   = {}
+    parts     = {}
+    submitted = set()
+    def submit(onto, reload, reload_if_newer):
+      if onto.loaded and (not reload): return
+      if onto.base_iri == "http://www.lesfleursdunormal.fr/static/_downloads/owlready_ontology.owl#":
+        f = os.path.join(os.path.dirname(__file__), "owlready_ontology.owl")
+      else:
+        try: f = _get_onto_file(onto.base_iri, onto.name, "r", only_local)
+        except FileNotFoundError: return # The error will be raised by the sequential loading
+      if f in submitted: return
+      last_update = onto.graph.get_last_update_time()
+      if f.startswith("http:") or f.startswith("https:"):
+        if not (reload or (last_update == 0.0)): return
+      else:
+        if not (reload or (reload_if_newer and (os.path.getmtime(f) > last_update)) or (last_update == 0.0)): return
+      submitted.add(f)
+      if (not f.startswith("http:")) and (not f.startswith("https:")) and (os.path.getsize(f) > _NTRIPLES_PARALLEL_CHUNK):
+        with open(f, "rb") as fileobj:
+          format = (_open_decompressed(fileobj) is fileobj) and _guess_format(fileobj)
+        if format == "ntriples": # Large (uncompressed) NTriples files are also split in several chunks
+          chunks = _split_ntriples(f, parallel)
+          parts[f] = [None] * len(chunks)
+          for i, chunk in enumerate(chunks): futures[executor.submit(_parse_ntriples_chunk, *chunk)] = (f, i)
+          return
+      parts[f] = [None]
+      futures[executor.submit(_parse_to_batches, f, onto.base_iri)] = (f, 0)
+      
+    with concurrent.futures.ProcessPoolExecutor(parallel) as executor:
+      submit(self, reload, reload_if_newer)
+      while futures:
+        done, not_done = concurrent.futures.wait(futures, return_when = concurrent.futures.FIRST_COMPLETED)
+        for future in done:
+          f, i = futures.pop(future)
+          if not f in parts: continue # Another chunk of the same file has failed
+          try:    parts[f][i] = future.result()
+          except Exception: # The error will be raised by the sequential loading
+            del parts[f]
+            continue
+          if not None in parts[f]:
+            self.world._preparsed[f] = parsed = parts.pop(f)
+            for iri in itertools.chain.from_iterable(part[3] for part in parsed): submit(self.world.get_ontology(iri), False, False)
+          
   def _load_properties(self):
     # Update props from other ontologies, if needed
     for prop in list(self.world._props.values()):
@@ -885,6 +1248,7 @@ class Ontology(Namespace, _GraphManager):
     #l = CURRENT_NAMESPACES.get()
     #if l: onto = l[-1].ontology
     #else: onto = self
+    if not self.world._reasoning_changes is None: self._record_obj_change(s, p, o, False)
     l = CURRENT_NAMESPACES.get()
     ((l and l[-1].ontology) or self)._add_obj_triple_raw_spo(s, p, o)
     if _LOG_LEVEL > 1:
@@ -896,6 +1260,7 @@ class Ontology(Namespace, _GraphManager):
   def _set_obj_triple_spo(self, s, p, o):
     #if CURRENT_NAMESPACES[-1] is None: self._set_obj_triple_raw_spo(s, p, o)
     #else:   CURRENT_NAMESPACES[-1].ontology._set_obj_triple_raw_spo(s, p, o)
+    if not self.world._reasoning_changes is None: self._record_obj_change(s, p, o, True)
     l = CURRENT_NAMESPACES.get()
     ((l and l[-1].ontology) or self)._set_obj_triple_raw_spo(s, p, o)
     if _LOG_LEVEL > 1:
@@ -907,6 +1272,7 @@ class Ontology(Namespace, _GraphManager):
   def _add_data_triple_spod(self, s, p, o, d):
     #if CURRENT_NAMESPACES[-1] is None: self._add_data_triple_raw_spod(s, p, o, d)
     #else:   CURRENT_NAMESPACES[-1].ontology._add_data_triple_raw_spod(s, p, o, d)
+    if not self.world._reasoning_changes is None: self.world._reasoning_changes.add(s)
     l = CURRENT_NAMESPACES.get()
     ((l and l[-1].ontology) or self)._add_data_triple_raw_spod(s, p, o, d)
     if _LOG_LEVEL > 1:
@@ -918,6 +1284,7 @@ class Ontology(Namespace, _GraphManager):
   def _set_data_triple_spod(self, s, p, o, d):
     #if CURRENT_NAMESPACES[-1] is None: self._set_data_triple_raw_spod(s, p, o, d)
     #else:   CURRENT_NAMESPACES[-1].ontology._set_data_triple_raw_spod(s, p, o, d)
+    if not self.world._reasoning_changes is None: self.world._reasoning_changes.add(s)
     l = CURRENT_NAMESPACES.get()
     ((l and l[-1].ontology) or self)._set_data_triple_raw_spod(s, p, o, d)
     if _LOG_LEVEL > 1:
@@ -1161,9 +1528,10 @@ def _get_onto_file(base_iri, name, mode = "r", only_local = False):
   for dir in onto_path:
     filename = os.path.join(dir, base_iri.rsplit("/", 1)[-1])
     if os.path.exists(filename): return filename
-    for ext in ["", ".nt", ".ntriples", ".rdf", ".owl"]:
-      filename = os.path.join(dir, "%s%s" % (name, ext))
-      if os.path.exists(filename): return filename
+    for compression_ext in ["", ".gz", ".bz2", ".xz", ".zst"]:
+      for ext in ["", ".nt", ".ntriples", ".rdf", ".owl"]:
+        filename = os.path.join(dir, "%s%s%s" % (name, ext, compression_ext))
+        if os.path.exists(filename): return filename
   if (mode.startswith("r")) and not only_local: return base_iri
   if (mode.startswith("w")): return os.path.join(onto_path[0], "%s.owl" % name)
   raise FileNotFoundError
@@ -26,6 +26,8 @@ from owlready2.base import rdf_type, rdfs_subclassof, owl_equivalentclass, owl_e
 from owlready2.namespace import Ontology
 from owlready2 import Thing, ThingClass
 
+def _do_nothing(*args): pass
+
 class ObservedOntology(Ontology):
   def _get_pred_value_obj(self, subject, predicate):
     if   predicate == rdf_type:
@@ -90,6 +92,15 @@ class ObservedOntology(Ontology):
         
     return f
   
+  def _obj_triples_added(self, triples):
+    # Sends the events for triples already inserted in the quadstore (e.g. by the reasoners)
+    f = self._gen_triple_method_obj(_do_nothing)
+    for s, p, o in triples: f(s, p, o)
+    
+  def _data_triples_added(self, triples):
+    f = self._gen_triple_method_data(_do_nothing)
+    for s, p, o, d in triples: f(s, p, o, d)
+    
   def _entity_destroyed(self, entity):
     if _INSTANCES_OF_CLASS and isinstance(entity, Thing):
       Classes   = [Class for Class in entity.is_a if isinstance(Class, ThingClass)]
@@ -904,6 +904,7 @@ def destroy_entity(e, undoable = False):
           
   def relation_updater(destroyed_storids, storid, relations):
     if undoer_relations is not None: undoer_relations.append((destroyed_storids, storid, relations))
+    if not e.namespace.world._reasoning_changes is None: e.namespace.world._reasoning_changes.add(storid)
     update_relation(destroyed_storids, storid, relations)
     
   def update_relation(destroyed_storids, storid, relations):
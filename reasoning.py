@@ -17,7 +17,7 @@
 # You should have received a copy of the GNU Lesser General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
-import re, tempfile
+import re, tempfile, hashlib
 
 import owlready2
 from owlready2.base            import *
@@ -80,6 +80,73 @@ _TYPES = { FunctionalProperty, InverseFunctionalProperty, TransitiveProperty, Sy
 
 JAVA_MEMORY = 2000
 
+# Class data sharing archives of the reasoners' classes, which speed up the start-up of the JVM (Java >= 13).
+# True for the default cache directory, a directory, or False to disable.
+JAVA_CLASS_CACHE = True
+
+_ARCHIVE_AT_EXIT = "-XX:ArchiveClassesAtExit="
+
+_JAVA_VERSIONS = {}
+def _get_java_version():
+  # Returns (major version, identifier of the JVM); the identifier is used for naming the class data sharing archives.
+  version = _JAVA_VERSIONS.get(owlready2.JAVA_EXE)
+  if version is None:
+    try:
+      output = subprocess.run([owlready2.JAVA_EXE, "-version"], stdout = subprocess.PIPE, stderr = subprocess.STDOUT).stdout
+      match  = re.search(b'version "(\\d+)(?:\\.(\\d+))?', output)
+      major  = int(match.group(1))
+      if (major == 1) and match.group(2): major = int(match.group(2)) # e.g. "1.8.0"
+      version = (major, hashlib.md5(owlready2.JAVA_EXE.encode("utf8") + output).hexdigest()[:12])
+    except Exception:
+      version = (0, "")
+    _JAVA_VERSIONS[owlready2.JAVA_EXE] = version
+  return version
+
+def _get_java_class_cache_dir():
+  if JAVA_CLASS_CACHE is True:
+    return os.path.join(os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache"), "owlready2")
+  return JAVA_CLASS_CACHE
+
+def _get_classpath_id(classpath):
+  # Identifies the classpath and the versions of its jars, because the JVM rejects (silently, with -Xlog:disable)
+  # the archives created with other jars.
+  h = hashlib.md5(classpath.encode("utf8"))
+  for path in classpath.split(os.pathsep):
+    try:            h.update(("\n%s" % os.path.getmtime(path)).encode("utf8"))
+    except OSError: pass
+  return h.hexdigest()[:12]
+
+def _java_command(classpath, name):
+  command = [owlready2.JAVA_EXE, "-Xmx%sM" % JAVA_MEMORY]
+  if JAVA_CLASS_CACHE:
+    major, jvm = _get_java_version()
+    if major >= 13:
+      cache_dir = _get_java_class_cache_dir()
+      try:            os.makedirs(cache_dir, exist_ok = True)
+      except OSError: cache_dir = None
+      if cache_dir:
+        archive = os.path.join(cache_dir, "%s-%s-%s.jsa" % (name, jvm, _get_classpath_id(classpath)))
+        if os.path.exists(archive): command.append("-XX:SharedArchiveFile=%s" % archive)
+        else: # Created at the first run, under a temporary name because several reasoners may run simultaneously
+          command.append("%s%s.%s-%s.tmp" % (_ARCHIVE_AT_EXIT, archive, os.getpid(), os.urandom(4).hex()))
+        command.append("-Xlog:disable") # CDS warnings would be mixed with the reasoner output
+  command.extend(["-cp", classpath])
+  return command
+
+def _install_java_class_archive(command, ok):
+  # Renames the archive created at exit into place; os.replace() is atomic, so other JVMs never read a partial archive.
+  for arg in command:
+    if arg.startswith(_ARCHIVE_AT_EXIT):
+      tmp = arg[len(_ARCHIVE_AT_EXIT):]
+      if not os.path.exists(tmp): return
+      try:
+        if ok: os.replace(tmp, tmp.rsplit(".", 2)[0])
+        else:  os.remove(tmp)
+      except OSError: # e.g. the archive is in use under Windows
+        try:            os.remove(tmp)
+        except OSError: pass
+      return
+
 
 def _keep_most_specific(s, consider_equivalence = True):
   r = set()
@@ -104,12 +171,50 @@ def _keep_most_specific(s, consider_equivalence = True):
   return r
 
 
-def sync_reasoner_hermit(x = None, infer_property_values = False, debug = 1, keep_tmp_file = False):
+class _ReasonerOutput(object):
+  """Runs a reasoner and iterates over the lines of its output as soon as they are written, so as the output is
+never held in memory as a whole. The caller should add the lines it does not parse to .unparsed (for error messages)."""
+  def __init__(self, command, merge_stderr, debug):
+    self.command     = command
+    self.debug       = debug
+    self.unparsed    = []
+    self.stderr      = ""
+    self.returncode  = None
+    self.stderr_file = None if merge_stderr else tempfile.TemporaryFile() # A file, because an unread pipe may block the reasoner
+    self.process     = subprocess.Popen(command, stdout = subprocess.PIPE, stderr = subprocess.STDOUT if merge_stderr else self.stderr_file)
+    
+  def __enter__(self): return self
+  
+  def __iter__(self):
+    for line in self.process.stdout:
+      try:    line = line.decode("utf8")
+      except UnicodeDecodeError: line = line.decode("latin")
+      line = line.rstrip("\r\n")
+      if self.debug > 1: print(line, file = sys.stderr)
+      yield line
+      
+  def __exit__(self, exc_type = None, exc_val = None, exc_tb = None):
+    if exc_type: self.process.kill()
+    self.process.stdout.close()
+    self.returncode = self.process.wait()
+    _install_java_class_archive(self.command, self.returncode == 0)
+    if self.stderr_file:
+      self.stderr_file.seek(0)
+      self.stderr = self.stderr_file.read().decode("utf8", "replace")
+      self.stderr_file.close()
+      
+  def get_error_message(self):
+    return self.stderr or "\n".join(self.unparsed)
+  
+  
+def sync_reasoner_hermit(x = None, infer_property_values = False, debug = 1, keep_tmp_file = False, incremental = False):
   if   isinstance(x, World):    world = x
   elif isinstance(x, Ontology): world = x.world
   elif isinstance(x, list):     world = x[0].world
   else:                         world = owlready2.default_world
   
+  if incremental and _no_change_since_last_reasoning(world, x, debug): return
+  
   locked = world.graph.has_write_lock()
   if locked: world.graph.release_write_lock() # Not needed during reasoning
   
@@ -119,12 +224,9 @@ def sync_reasoner_hermit(x = None, infer_property_values = False, debug = 1, kee
     else:                          ontology = world.get_ontology(_INFERRENCES_ONTOLOGY)
     
     tmp = tempfile.NamedTemporaryFile("wb", delete = False)
-    if isinstance(x, list):
-      for o in x: o.save(tmp, format = "ntriples", commit = False)
-    else:
-      world.save(tmp, format = "ntriples")
+    module = _save_for_reasoning(world, x, tmp, incremental, debug)
     tmp.close()
-    command = [owlready2.JAVA_EXE, "-Xmx%sM" % JAVA_MEMORY, "-cp", _HERMIT_CLASSPATH, "org.semanticweb.HermiT.cli.CommandLine", "-c", "-O", "-D", "-I", "file:///%s" % tmp.name.replace('\\','/')]
+    command = _java_command(_HERMIT_CLASSPATH, "hermit") + ["org.semanticweb.HermiT.cli.CommandLine", "-c", "-O", "-D", "-I", "file:///%s" % tmp.name.replace('\\','/')]
     if infer_property_values: command.append("-Y")
     if debug:
       import time
@@ -132,69 +234,74 @@ def sync_reasoner_hermit(x = None, infer_property_values = False, debug = 1, kee
       print("    %s" % " ".join(command), file = sys.stderr)
       t0 = time.time()
       
-    try:
-      output = subprocess.check_output(command, stderr = subprocess.STDOUT)
-    except subprocess.CalledProcessError as e:
-      if (e.returncode == 1) and (b"Inconsistent ontology" in (e.output or b"")):
-        raise OwlReadyInconsistentOntologyError()
-      else:
-        raise OwlReadyJavaError("Java error message is:\n%s" % (e.stderr or e.output or b"").decode("utf8"))
-      
-    output = output.decode("utf8").replace("\r","")
-    if debug:
-      print("* Owlready2 * HermiT took %s seconds" % (time.time() - t0), file = sys.stderr)
-      if debug > 1:
-        print("* Owlready2 * HermiT output:", file = sys.stderr)
-        print(output, file = sys.stderr)
-        
-        
     new_parents = defaultdict(list)
     new_equivs  = defaultdict(list)
     entity_2_type = {}
-
-    for relation, concept_iris in _HERMIT_RESULT_REGEXP.findall(output):
-      concept_storids = [ontology._abbreviate(x) for x in concept_iris[1:-1].split("> <")]
-      owl_relation = _HERMIT_2_OWL[relation]
+    inferred_obj_relations = []
     
-      if  relation in _IS_A_RELATIONS:
-        if concept_iris[0].startswith("http://www.w3.org/2002/07/owl"): continue
-        
-        new_parents[concept_storids[0]].append(concept_storids[1])
-        entity_2_type[concept_storids[0]] = _OWL_2_TYPE[owl_relation]
-      
-      elif relation in _EQUIV_RELATIONS:
-        if "http://www.w3.org/2002/07/owl#Nothing" in concept_iris:
-          for concept_iri, concept_storid in zip(concept_iris, concept_storids):
-            if concept_iri.startswith("http://www.w3.org/2002/07/owl"): continue
-            if concept_storid == owl_nothing: continue
+    if debug > 1: print("* Owlready2 * HermiT output:", file = sys.stderr)
+    with _ReasonerOutput(command, True, debug) as output: # stderr is merged in stdout
+      for line in output:
+        match = _HERMIT_RESULT_REGEXP.match(line)
+        if match:
+          relation, concept_iris = match.groups()
+          concept_storids = [ontology._abbreviate(x) for x in concept_iris[1:-1].split("> <")]
+          owl_relation = _HERMIT_2_OWL[relation]
+          
+          if  relation in _IS_A_RELATIONS:
+            if concept_iris[0].startswith("http://www.w3.org/2002/07/owl"): continue
             
-            new_equivs[concept_storid].append(owl_nothing)
-            entity_2_type[concept_storid] = _OWL_2_TYPE[owl_relation]
+            new_parents[concept_storids[0]].append(concept_storids[1])
+            entity_2_type[concept_storids[0]] = _OWL_2_TYPE[owl_relation]
             
-        else:
-          for concept_iri1, concept_storid1 in zip(concept_iris, concept_storids):
-            if concept_iri1.startswith("http://www.w3.org/2002/07/owl"): continue
-            for concept_iri2, concept_storid2 in zip(concept_iris, concept_storids):
-              if concept_iri1 == concept_iri2: continue
-              new_equivs[concept_storid1].append(concept_storid2)
-              entity_2_type[concept_storid1] = _OWL_2_TYPE[owl_relation]
-
-    if infer_property_values:
-      inferred_obj_relations = []
-      for prop_iri, knowns, possibles in _HERMIT_PROP_REGEXP.findall(output):
-        prop = world[prop_iri]
-        if prop is None: continue
-        knowns = knowns[1:-1] # Remove first and last parenthesese
-        if not knowns.strip(): continue
-        for pair in knowns.split(")("):
-          a, b = pair[1:-1].split(">, <", 1)
-          a_storid = ontology._abbreviate(a, False)
-          b_storid = ontology._abbreviate(b, False)
-          if ((not a_storid is None) and (not b_storid is None) and
-              (not world._has_obj_triple_spo(a_storid, prop.storid, b_storid)) and
-             ((not prop._inverse_property) or (not world._has_obj_triple_spo(b_storid, prop._inverse_storid, a_storid)))):
-            inferred_obj_relations.append((a_storid, prop, b_storid))
-          
+          elif relation in _EQUIV_RELATIONS:
+            if "http://www.w3.org/2002/07/owl#Nothing" in concept_iris:
+              for concept_iri, concept_storid in zip(concept_iris, concept_storids):
+                if concept_iri.startswith("http://www.w3.org/2002/07/owl"): continue
+                if concept_storid == owl_nothing: continue
+                
+                new_equivs[concept_storid].append(owl_nothing)
+                entity_2_type[concept_storid] = _OWL_2_TYPE[owl_relation]
+                
+            else:
+              for concept_iri1, concept_storid1 in zip(concept_iris, concept_storids):
+                if concept_iri1.startswith("http://www.w3.org/2002/07/owl"): continue
+                for concept_iri2, concept_storid2 in zip(concept_iris, concept_storids):
+                  if concept_iri1 == concept_iri2: continue
+                  new_equivs[concept_storid1].append(concept_storid2)
+                  entity_2_type[concept_storid1] = _OWL_2_TYPE[owl_relation]
+          continue
+        
+        match = infer_property_values and _HERMIT_PROP_REGEXP.match(line)
+        if match:
+          prop_iri, knowns, possibles = match.groups()
+          prop = world[prop_iri]
+          if prop is None: continue
+          knowns = knowns[1:-1] # Remove first and last parenthesese
+          if not knowns.strip(): continue
+          for pair in knowns.split(")("):
+            a, b = pair[1:-1].split(">, <", 1)
+            a_storid = ontology._abbreviate(a, False)
+            b_storid = ontology._abbreviate(b, False)
+            if (not a_storid is None) and (not b_storid is None): # Relations already asserted are discarded when applied
+              inferred_obj_relations.append((a_storid, prop, b_storid))
+          continue
+        
+        output.unparsed.append(line)
+        
+    if output.returncode:
+      if (output.returncode == 1) and ("Inconsistent ontology" in output.get_error_message()):
+        raise OwlReadyInconsistentOntologyError()
+      else:
+        raise OwlReadyJavaError("Java error message is:\n%s" % output.get_error_message())
+      
+    if debug:
+      print("* Owlready2 * HermiT took %s seconds" % (time.time() - t0), file = sys.stderr)
+      
+    if not module is None:
+      _restrict_to_module(module, new_parents, new_equivs, entity_2_type)
+      inferred_obj_relations = [relation for relation in inferred_obj_relations if relation[0] in module]
+      
     if not keep_tmp_file: os.unlink(tmp.name)
     
   finally:
@@ -203,18 +310,176 @@ def sync_reasoner_hermit(x = None, infer_property_values = False, debug = 1, kee
   _apply_reasoning_results(world, ontology, debug, new_parents, new_equivs, entity_2_type)
   if infer_property_values:
     _apply_inferred_obj_relations(world, ontology, debug, inferred_obj_relations)
+  if incremental: world._reasoning_changes = set() # Start tracking changes for the next incremental reasoning
   
   if debug: print("* Owlready * (NB: only changes on entities loaded in Python are shown, other changes are done but not listed)", file = sys.stderr)
 
 sync_reasoner = sync_reasoner_hermit
 
 
-def sync_reasoner_pellet(x = None, infer_property_values = False, infer_data_property_values = False, debug = 1, keep_tmp_file = False):
+def _no_change_since_last_reasoning(world, x, debug):
+  if isinstance(x, list): raise ValueError("Incremental reasoning is only supported on whole worlds!")
+  if world._reasoning_changes == set():
+    if debug: print("* Owlready2 * No change since the last reasoning, reasoning skipped", file = sys.stderr)
+    return True
+  return False
+
+def _save_for_reasoning(world, x, tmp, incremental, debug):
+  if incremental and (not world._reasoning_changes is None):
+    module = _extract_module(world, world._reasoning_changes)
+    if debug: print("* Owlready2 * Incremental reasoning on a module of %s entities and blank nodes (%s modified)" % (len(module), len(world._reasoning_changes)), file = sys.stderr)
+    for chunk in world.graph._iter_ntriples_chunks(module = module): tmp.write(chunk.encode("utf8"))
+    return module
+  
+  if isinstance(x, list):
+    for o in x: o.save(tmp, format = "ntriples", commit = False)
+  else:
+    world.save(tmp, format = "ntriples")
+    
+def _restrict_to_module(module, new_parents, new_equivs, entity_2_type):
+  # Entities outside the module are only declared in the module => their results are irrelevant
+  for d in [new_parents, new_equivs, entity_2_type]:
+    for storid in [storid for storid in d if not storid in module]: del d[storid]
+    
+    
+def _extract_module(world, signature):
+  """Returns the subjects of the triples of a syntactic locality-based module (approximated on the RDF triples), for
+the given signature (a set of storids). The module is the upward closure of the signature (superclasses, types,
+property values, definition of the properties used,...), plus the axioms that are not bottom-local, e.g. the definitions of
+the classes (equivalent_to) that may include an entity in the module. For individuals, all related individuals are included."""
+  builtins    = owlready2.base._universal_abbrev_2_iri
+  annotations = set(world._get_obj_triples_po_s(rdf_type, owl_annotation_property))
+  module      = set()
+  todo        = []
+  def add(x):
+    if (x in module) or (x in builtins): return
+    module.add(x)
+    todo.append(x)
+    
+  for x in signature:
+    if x > 0: add(x)
+    else:
+      for root in _get_bnode_roots(world, x): add(root)
+      
+  # The (new) definition of a modified class may be satisfied by individuals or subclasses that are not reachable
+  # upward => include the instances and subclasses of the classes, and the subjects of the properties, it uses
+  for x in list(module):
+    for entity in _get_definition_entities(world, x, builtins):
+      descendants = [entity]
+      descendants.extend(world._get_obj_triples_transitive_po(rdfs_subclassof,    entity))
+      descendants.extend(world._get_obj_triples_transitive_po(rdfs_subpropertyof, entity))
+      for y in descendants:
+        add(y)
+        for s in world._get_obj_triples_po_s(rdf_type, y): add(s)
+        for s, p, o    in world._get_obj_triples_spo_spo   (None, y, None):       add(s)
+        for s, p, o, d in world._get_data_triples_spod_spod(None, y, None, None): add(s)
+        
+  # Axioms that are only included if they are not bottom-local
+  candidates = [(s, o) for (s, p, o) in world._get_obj_triples_spo_spo(None, owl_equivalentclass, None) if o < 0]
+  candidates.extend((s, s) for (s, p, o) in world._get_obj_triples_spo_spo(None, rdfs_subclassof, None) if s < 0)
+  groups     = [(bnode, members) for members_prop in [owl_members, owl_distinctmembers]
+                for (bnode, p, members) in world._get_obj_triples_spo_spo(None, members_prop, None)]
+  chains     = list(world._get_obj_triples_spo_spo(None, owl_propertychain, None))
+  triples    = {}
+  
+  while True:
+    while todo:
+      x = todo.pop()
+      for p, o in world._get_obj_triples_s_po(x):
+        if p in annotations: continue
+        add(p)
+        if not ((p == owl_disjointwith) or (p == owl_propdisjointwith)): add(o)
+      for p, o, d in world._get_data_triples_s_pod(x):
+        if not p in annotations: add(p)
+      if x > 0:
+        for s, p, o in world._get_obj_triples_spo_spo(None, None, x):
+          if   (p == owl_equivalentclass) or (p == owl_equivalentproperty) or (p == owl_equivalentindividual) or (p == owl_inverse_property): add(s)
+          elif (s > 0) and (not p in builtins) and (not p in annotations): add(s) # Related individuals
+          
+    remaining = []
+    for entity, expression in candidates:
+      if _is_bottom_local(world, expression, module, triples): remaining.append((entity, expression))
+      else:                                                    add(entity)
+    candidates = remaining
+    
+    remaining = []
+    for bnode, members in groups:
+      if len([member for member in _list_storids(world, members) if member in module]) > 1: add(bnode)
+      else:                                                                              remaining.append((bnode, members))
+    groups = remaining
+    
+    remaining = []
+    for prop, p, chain in chains:
+      if all((member in module) for member in _list_storids(world, chain)): add(prop)
+      else:                                                               remaining.append((prop, p, chain))
+    chains = remaining
+    
+    if not todo: return module
+    
+def _get_bnode_roots(world, bnode, already = None):
+  # Returns the named entities (or the root blank nodes) that use the given blank node
+  if already is None: already = set()
+  already.add(bnode)
+  roots = set()
+  for s, p, o in world._get_obj_triples_spo_spo(None, None, bnode):
+    if   s > 0:               roots.add(s)
+    elif not s in already:    roots.update(_get_bnode_roots(world, s, already))
+  return roots or { bnode }
+
+def _get_definition_entities(world, x, builtins):
+  # Returns the named entities used in the definitions (equivalent_to) of the given class
+  entities = set()
+  todo     = [o for o in world._get_obj_triples_sp_o(x, owl_equivalentclass) if o != x]
+  todo.extend(s for s in world._get_obj_triples_po_s(owl_equivalentclass, x) if s != x)
+  already  = set()
+  while todo:
+    y = todo.pop()
+    if y in already: continue
+    already.add(y)
+    if y > 0:
+      if not y in builtins: entities.add(y)
+    else:
+      for p, o in world._get_obj_triples_s_po(y): todo.append(o)
+  return entities
+
+def _list_storids(world, bnode): return [first for (first, d) in world._parse_list_as_rdf(bnode)]
+
+def _is_bottom_local(world, x, module, triples):
+  # A class expression is bottom-local if it becomes equivalent to Nothing when the entities outside the module are
+  # replaced by Nothing.
+  if x > 0:
+    if x in owlready2.base._universal_abbrev_2_iri: return x == owl_nothing
+    return not x in module
+  
+  t = triples.get(x)
+  if t is None:
+    t = triples[x] = dict(world._get_obj_triples_s_po(x))
+    t.update((p, o) for (p, o, d) in world._get_data_triples_s_pod(x))
+    
+  if owl_intersectionof in t: return any(_is_bottom_local(world, y, module, triples) for y in _list_storids(world, t[owl_intersectionof]))
+  if owl_unionof        in t: return all(_is_bottom_local(world, y, module, triples) for y in _list_storids(world, t[owl_unionof]))
+  if owl_onproperty     in t:
+    if (ONLY in t) or (MAX in t) or (owl_max_cardinality in t): return False
+    for cardinality in [EXACTLY, MIN, owl_cardinality, owl_min_cardinality]:
+      if (cardinality in t) and (t[cardinality] == 0): return False
+    prop = t[owl_onproperty]
+    if prop < 0: prop = world._get_obj_triple_sp_o(prop, owl_inverse_property)
+    if not prop in module: return True
+    value = t.get(SOME) or t.get(owl_onclass) or t.get(owl_ondatarange)
+    if value is None: return False
+    return _is_bottom_local(world, value, module, triples)
+  return False
+  
+
+
+def sync_reasoner_pellet(x = None, infer_property_values = False, infer_data_property_values = False, debug = 1, keep_tmp_file = False, incremental = False):
   if   isinstance(x, World):    world = x
   elif isinstance(x, Ontology): world = x.world
   elif isinstance(x, list):     world = x[0].world
   else:                         world = owlready2.default_world
   
+  if incremental and _no_change_since_last_reasoning(world, x, debug): return
+  
   locked = world.graph.has_write_lock()
   if locked: world.graph.release_write_lock() # Not needed during reasoning
   
@@ -224,14 +489,11 @@ def sync_reasoner_pellet(x = None, infer_property_values = False, infer_data_pro
     else:                          ontology = world.get_ontology(_INFERRENCES_ONTOLOGY)
     
     tmp = tempfile.NamedTemporaryFile("wb", delete = False)
-    if isinstance(x, list):
-      for o in x: o.save(tmp, format = "ntriples", commit = False)
-    else:
-      world.save(tmp, format = "ntriples")
+    module = _save_for_reasoning(world, x, tmp, incremental, debug)
     tmp.close()
 
     # Use Jena for loading because OWLAPI is bugged with NTriples.
-    command = [owlready2.JAVA_EXE, "-Xmx%sM" % JAVA_MEMORY, "-cp", _PELLET_CLASSPATH, "pellet.Pellet", "realize", "--loader", "Jena", "--input-format", "N-Triples", "--ignore-imports", tmp.name]
+    command = _java_command(_PELLET_CLASSPATH, "pellet") + ["pellet.Pellet", "realize", "--loader", "Jena", "--input-format", "N-Triples", "--ignore-imports", tmp.name]
     if infer_property_values:      command.insert(-2, "--infer-prop-values")
     if infer_data_property_values: command.insert(-2, "--infer-data-prop-values")
     
@@ -241,88 +503,89 @@ def sync_reasoner_pellet(x = None, infer_property_values = False, infer_data_pro
       print("    %s" % " ".join(command), file = sys.stderr)
       t0 = time.time()
     
-    try:
-      output = subprocess.run(command, stdout = subprocess.PIPE, stderr = subprocess.PIPE, check = True).stdout
-    except subprocess.CalledProcessError as e:
-      if (e.returncode == 1) and (b"ERROR: Ontology is inconsistent" in (e.stderr or b"")): # XXX
-        raise OwlReadyInconsistentOntologyError()
-      else:
-        raise OwlReadyJavaError("Java error message is:\n%s" % (e.stderr or e.output or b"").decode("utf8"))
-
-    try:
-      output = output.decode("utf8").replace("\r","")
-    except UnicodeDecodeError:
-      output = output.decode("latin").replace("\r","")
-      
-    if debug:
-      print("* Owlready2 * Pellet took %s seconds" % (time.time() - t0), file = sys.stderr)
-      if debug > 1:
-        print("* Owlready2 * Pellet output:", file = sys.stderr)
-        print(output, file = sys.stderr)
-      
-      
     new_parents = defaultdict(list)
     new_equivs  = defaultdict(list)
     entity_2_type = {}
+    inferred_obj_relations  = []
+    inferred_data_relations = []
     stack = []
-    for line in output.split("\n"):
-      if not line: continue
-      line2 = line.lstrip()
-      depth = len(line) - len(line2)
-      splitted = line2.split(" - ", 1)
-      class_storids = [ontology._abbreviate(class_iri) for class_iri in splitted[0].split(" = ")]
-      
-      if len(class_storids) > 1:
-        for class_storid1 in class_storids:
-          for class_storid2 in class_storids:
-            if not class_storid1 is class_storid2:
-              new_equivs[class_storid1].append(class_storid2)
-            
-      while stack and (stack[-1][0] >= depth): del stack[-1]
-      if len(stack) > 1: # if len(stack) == 1, it only contains Thing => not interesting
-        for class_storid in class_storids:
-          entity_2_type[class_storid] = "class"
-          new_parents[class_storid].extend(stack[-1][1])
-      else:
-        for class_storid in class_storids:
-          entity_2_type[class_storid] = "class"
-      stack.append((depth, class_storids))
     
-      if len(splitted) == 2:
-        ind_iris = splitted[1][1:-1].split(", ")
-        for ind_iri in ind_iris:
-          ind_storid = ontology._abbreviate(ind_iri)
-          entity_2_type[ind_storid] = "individual"
-          new_parents[ind_storid].extend(class_storids)
+    if debug > 1: print("* Owlready2 * Pellet output:", file = sys.stderr)
+    with _ReasonerOutput(command, False, debug) as output:
+      for line in output:
+        if not line: continue
         
-    if infer_property_values:
-      inferred_obj_relations = []
-      for a_iri, prop_iri, b_iri in _PELLET_PROP_REGEXP.findall(output):
-        prop = world[prop_iri]
-        if prop is None: continue
-        a_storid = ontology._abbreviate(a_iri, False)
-        b_storid = ontology._abbreviate(b_iri.strip(), False)
-        if ((not a_storid is None) and (not b_storid is None) and
-            (not world._has_obj_triple_spo(a_storid, prop.storid, b_storid)) and
-           ((not prop._inverse_property) or (not world._has_obj_triple_spo(b_storid, prop._inverse_storid, a_storid)))):
-          inferred_obj_relations.append((a_storid, prop, b_storid))
+        if line.startswith("PROPINST: "):
+          match = infer_property_values and _PELLET_PROP_REGEXP.match(line)
+          if match:
+            a_iri, prop_iri, b_iri = match.groups()
+            prop = world[prop_iri]
+            if prop is None: continue
+            a_storid = ontology._abbreviate(a_iri, False)
+            b_storid = ontology._abbreviate(b_iri.strip(), False)
+            if (not a_storid is None) and (not b_storid is None): # Relations already asserted are discarded when applied
+              inferred_obj_relations.append((a_storid, prop, b_storid))
+          continue
         
-    if infer_data_property_values:
-      inferred_data_relations = []
-      for a_iri, prop_iri, value, lang, datatype in _PELLET_DATA_PROP_REGEXP.findall(output):
-        prop = world[prop_iri]
-        if prop is None: continue
-        a_storid = ontology._abbreviate(a_iri, False)
-        if lang and (lang != "()"):
-          datatype = "@%s" % lang
+        if line.startswith("DATAPROPVAL: "):
+          match = infer_data_property_values and _PELLET_DATA_PROP_REGEXP.match(line)
+          if match:
+            a_iri, prop_iri, value, lang, datatype = match.groups()
+            prop = world[prop_iri]
+            if prop is None: continue
+            a_storid = ontology._abbreviate(a_iri, False)
+            if lang and (lang != "()"):
+              datatype = "@%s" % lang
+            else:
+              datatype = ontology._abbreviate(datatype)
+              python_datatype = owlready2.base._universal_abbrev_2_datatype.get(datatype)
+              if   python_datatype is int:   value = int  (value)
+              elif python_datatype is float: value = float(value)
+            if not a_storid is None: # Values already asserted are discarded when applied
+              inferred_data_relations.append((a_storid, prop, value, datatype))
+          continue
+        
+        line2 = line.lstrip()
+        depth = len(line) - len(line2)
+        splitted = line2.split(" - ", 1)
+        class_storids = [ontology._abbreviate(class_iri) for class_iri in splitted[0].split(" = ")]
+        
+        if len(class_storids) > 1:
+          for class_storid1 in class_storids:
+            for class_storid2 in class_storids:
+              if not class_storid1 is class_storid2:
+                new_equivs[class_storid1].append(class_storid2)
+                
+        while stack and (stack[-1][0] >= depth): del stack[-1]
+        if len(stack) > 1: # if len(stack) == 1, it only contains Thing => not interesting
+          for class_storid in class_storids:
+            entity_2_type[class_storid] = "class"
+            new_parents[class_storid].extend(stack[-1][1])
         else:
-          datatype = ontology._abbreviate(datatype)
-          python_datatype = owlready2.base._universal_abbrev_2_datatype.get(datatype)
-          if   python_datatype is int:   value = int  (value)
-          elif python_datatype is float: value = float(value)
-        if ((not a_storid is None) and
-            (not world._has_data_triple_spod(a_storid, prop.storid, value))):
-          inferred_data_relations.append((a_storid, prop, value, datatype))
+          for class_storid in class_storids:
+            entity_2_type[class_storid] = "class"
+        stack.append((depth, class_storids))
+        
+        if len(splitted) == 2:
+          ind_iris = splitted[1][1:-1].split(", ")
+          for ind_iri in ind_iris:
+            ind_storid = ontology._abbreviate(ind_iri)
+            entity_2_type[ind_storid] = "individual"
+            new_parents[ind_storid].extend(class_storids)
+            
+    if output.returncode:
+      if (output.returncode == 1) and ("ERROR: Ontology is inconsistent" in output.stderr): # XXX
+        raise OwlReadyInconsistentOntologyError()
+      else:
+        raise OwlReadyJavaError("Java error message is:\n%s" % output.get_error_message())
+      
+    if debug:
+      print("* Owlready2 * Pellet took %s seconds" % (time.time() - t0), file = sys.stderr)
+      
+    if not module is None:
+      _restrict_to_module(module, new_parents, new_equivs, entity_2_type)
+      inferred_obj_relations  = [relation for relation in inferred_obj_relations  if relation[0] in module]
+      inferred_data_relations = [relation for relation in inferred_data_relations if relation[0] in module]
       
     if not keep_tmp_file: os.unlink(tmp.name)
     
@@ -332,21 +595,231 @@ def sync_reasoner_pellet(x = None, infer_property_values = False, infer_data_pro
   _apply_reasoning_results(world, ontology, debug, new_parents, new_equivs, entity_2_type)
   if infer_property_values:      _apply_inferred_obj_relations (world, ontology, debug, inferred_obj_relations)
   if infer_data_property_values: _apply_inferred_data_relations(world, ontology, debug, inferred_data_relations)
+  if incremental: world._reasoning_changes = set() # Start tracking changes for the next incremental reasoning
   
   if debug: print("* Owlready * (NB: only changes on entities loaded in Python are shown, other changes are done but not listed)", file = sys.stderr)
 
 
 
+# OWL 2 RL rules, as (target table, selected columns, premises, conditions); premises are (table, alias) where table is
+# "o" (object triples), "d" (data triples) or "b" (base subclass triples, i.e. asserted or obtained from equivalences).
+# Subclass closure is joined with base subclass triples only, in order to avoid a number of redundant inferences
+# quadratic in the depth of the hierarchy.
+_RL_RULES = [
+  ("o", "a.s, %(sco)s, b.o",  [("o", "a"), ("b", "b")], "a.p=%(sco)s AND b.s=a.o AND b.p=%(sco)s AND a.s!=b.o"), # scm-sco
+  ("b", "s, %(sco)s, o",      [("o", "e")], "e.p=%(eqc)s"), # scm-eqc1
+  ("b", "o, %(sco)s, s",      [("o", "e")], "e.p=%(eqc)s"), # scm-eqc1
+  ("o", "a.s, %(eqc)s, a.o",  [("o", "a"), ("o", "b")], "a.p=%(sco)s AND b.p=%(sco)s AND b.s=a.o AND b.o=a.s AND a.s!=a.o"), # scm-eqc2
+  ("o", "a.s, %(spo)s, b.o",  [("o", "a"), ("o", "b")], "a.p=%(spo)s AND b.p=%(spo)s AND b.s=a.o AND a.s!=b.o"), # scm-spo
+  ("o", "s, %(spo)s, o",      [("o", "e")], "e.p=%(eqp)s"), # scm-eqp1
+  ("o", "o, %(spo)s, s",      [("o", "e")], "e.p=%(eqp)s"), # scm-eqp1
+  ("o", "a.s, %(eqp)s, a.o",  [("o", "a"), ("o", "b")], "a.p=%(spo)s AND b.p=%(spo)s AND b.s=a.o AND b.o=a.s AND a.s!=a.o"), # scm-eqp2
+  ("o", "a.s, %(type)s, b.o", [("o", "a"), ("b", "b")], "a.p=%(type)s AND b.s=a.o AND b.p=%(sco)s"), # cax-sco
+  ("o", "x.s, %(type)s, d.o", [("o", "d"), ("o", "x")], "d.p=%(domain)s AND x.p=d.s"), # prp-dom
+  ("o", "x.s, %(type)s, d.o", [("o", "d"), ("d", "x")], "d.p=%(domain)s AND x.p=d.s"), # prp-dom (data properties)
+  ("o", "x.o, %(type)s, r.o", [("o", "r"), ("o", "x")], "r.p=%(range)s AND x.p=r.s"), # prp-rng
+  ("o", "x.s, sp.o, x.o",     [("o", "sp"), ("o", "x")], "sp.p=%(spo)s AND x.p=sp.s"), # prp-spo1
+  ("d", "x.s, sp.o, x.o, x.d",[("o", "sp"), ("d", "x")], "sp.p=%(spo)s AND x.p=sp.s"), # prp-spo1 (data properties)
+  ("o", "x.o, i.o, x.s",      [("o", "i"), ("o", "x")], "i.p=%(inverse)s AND x.p=i.s"), # prp-inv1
+  ("o", "x.o, i.s, x.s",      [("o", "i"), ("o", "x")], "i.p=%(inverse)s AND x.p=i.o"), # prp-inv2
+  ("o", "x.o, x.p, x.s",      [("o", "t"), ("o", "x")], "t.p=%(type)s AND t.o=%(symmetric)s AND x.p=t.s"), # prp-symp
+  ("o", "x.s, x.p, y.o",      [("o", "t"), ("o", "x"), ("o", "y")], "t.p=%(type)s AND t.o=%(transitive)s AND x.p=t.s AND y.p=t.s AND y.s=x.o"), # prp-trp
+  ("o", "o, %(same)s, s",     [("o", "e")], "e.p=%(same)s"), # eq-sym
+  ("o", "a.s, %(same)s, b.o", [("o", "a"), ("o", "b")], "a.p=%(same)s AND b.p=%(same)s AND b.s=a.o AND a.s!=b.o"), # eq-trans
+  ("o", "e.o, x.p, x.o",      [("o", "e"), ("o", "x")], "e.p=%(same)s AND x.s=e.s AND x.p!=%(same)s"), # eq-rep-s
+  ("o", "x.s, x.p, e.o",      [("o", "e"), ("o", "x")], "e.p=%(same)s AND x.o=e.s AND x.p!=%(same)s"), # eq-rep-o
+  ("d", "e.o, x.p, x.o, x.d", [("o", "e"), ("d", "x")], "e.p=%(same)s AND x.s=e.s"), # eq-rep-s (data properties)
+]
+_RL_IS_A_RELATIONS = { rdf_type : "individual", rdfs_subclassof : "class", rdfs_subpropertyof : "property" }
+_RL_EQUIV_RELATIONS = { owl_equivalentclass : "class", owl_equivalentproperty : "property", owl_equivalentindividual : "individual" }
+
+def sync_reasoner_rl(x = None, infer_property_values = False, infer_data_property_values = False, debug = 1):
+  """Materializes the OWL 2 RL entailments (subclass, subproperty, equivalence, domain, range, inverse, symmetric,
+transitive and sameAs) with SQL requests on the quadstore, without Java."""
+  if   isinstance(x, World):    world = x
+  elif isinstance(x, Ontology): world = x.world
+  elif isinstance(x, list):     world = x[0].world
+  else:                         world = owlready2.default_world
+  
+  if   isinstance(x, Ontology):  ontology = x
+  elif CURRENT_NAMESPACES.get(): ontology = CURRENT_NAMESPACES.get()[-1].ontology
+  else:                          ontology = world.get_ontology(_INFERRENCES_ONTOLOGY)
+  
+  if debug:
+    import time
+    print("* Owlready2 * Running OWL 2 RL reasoner...", file = sys.stderr)
+    t0 = time.time()
+    
+  world.graph.acquire_write_lock()
+  try:
+    if world.graph.bulk_level: world.graph.flush_bulk_insert()
+    db = world.graph.db # Temporary tables are not visible from the read-only connections
+    if isinstance(x, list): where = "WHERE c IN (%s)" % ",".join(str(onto.graph.c) for onto in x)
+    else:                   where = ""
+    
+    db.execute("""CREATE TEMP TABLE rl_objs (s INTEGER, p INTEGER, o INTEGER, PRIMARY KEY (p,s,o)) WITHOUT ROWID""")
+    db.execute("""CREATE INDEX temp.index_rl_objs_o ON rl_objs(o,p)""")
+    db.execute("""CREATE INDEX temp.index_rl_objs_s ON rl_objs(s)""")
+    db.execute("""CREATE TEMP TABLE rl_datas (s INTEGER, p INTEGER, o BLOB, d INTEGER, PRIMARY KEY (p,s,o,d))""")
+    db.execute("""CREATE INDEX temp.index_rl_datas_s ON rl_datas(s)""")
+    for table in ["rl_sco", "rl_delta_sco", "rl_new_sco", "rl_delta_objs", "rl_new_objs", "rl_inferred_objs"]:
+      db.execute("""CREATE TEMP TABLE %s (s INTEGER, p INTEGER, o INTEGER, PRIMARY KEY (s,p,o)) WITHOUT ROWID""" % table)
+    for table in ["rl_delta_datas", "rl_new_datas", "rl_inferred_datas"]:
+      db.execute("""CREATE TEMP TABLE %s (s INTEGER, p INTEGER, o BLOB, d INTEGER, PRIMARY KEY (s,p,o,d))""" % table)
+      
+    try:
+      db.execute("""INSERT OR IGNORE INTO rl_objs  SELECT s,p,o   FROM objs  %s""" % where)
+      db.execute("""INSERT OR IGNORE INTO rl_datas SELECT s,p,o,d FROM datas %s""" % where)
+      db.execute("""INSERT INTO rl_sco SELECT s,p,o FROM rl_objs WHERE p=?""", (rdfs_subclassof,))
+      db.execute("""INSERT INTO rl_delta_sco SELECT s,p,o FROM rl_sco""")
+      db.execute("""INSERT INTO rl_delta_objs  SELECT s,p,o   FROM rl_objs""")
+      db.execute("""INSERT INTO rl_delta_datas SELECT s,p,o,d FROM rl_datas""")
+      
+      _rl_fixpoint(db, debug)
+      
+      if db.execute("""SELECT 1 FROM rl_objs WHERE p=? AND o=? LIMIT 1""", (rdf_type, owl_nothing)).fetchone() or db.execute("""
+SELECT 1 FROM rl_objs dw, rl_objs a, rl_objs b
+WHERE dw.p=? AND a.p=? AND a.o=dw.s AND b.p=? AND b.s=a.s AND b.o=dw.o LIMIT 1""", (owl_disjointwith, rdf_type, rdf_type)).fetchone():
+        raise OwlReadyInconsistentOntologyError()
+      
+      # Only named entities are considered
+      hierarchy_relations = set(_RL_IS_A_RELATIONS) | set(_RL_EQUIV_RELATIONS)
+      condition = "s>0 AND o>0 AND NOT (p IN (%s, %s) AND o=%s)" % (rdf_type, rdfs_subclassof, owl_thing)
+      # Subclass / subproperty cycles are equivalences, which are stored as such
+      condition += " AND NOT (p IN (%s, %s) AND EXISTS (SELECT 1 FROM rl_objs r WHERE r.p=rl.p AND r.s=rl.o AND r.o=rl.s))" % (rdfs_subclassof, rdfs_subpropertyof)
+      if not infer_property_values: condition += " AND p IN (%s)" % ",".join(str(relation) for relation in hierarchy_relations)
+      # Inserted as the other reasoners' results, so as observed ontologies send their events
+      db.execute("""DELETE FROM rl_inferred_objs AS rl WHERE NOT (%s)""" % condition)
+      new_objs = _insert_inferred_obj_triples(ontology, db.execute("""SELECT s,p,o FROM rl_inferred_objs""").fetchall(), None, True)
+      if infer_data_property_values:
+        new_datas = _insert_inferred_data_triples(ontology, db.execute("""SELECT s,p,o,d FROM rl_inferred_datas WHERE s>0""").fetchall(), True)
+      else:
+        new_datas = []
+        
+    finally:
+      for table in ["rl_sco", "rl_delta_sco", "rl_new_sco", "rl_objs", "rl_datas", "rl_delta_objs", "rl_new_objs", "rl_inferred_objs", "rl_delta_datas", "rl_new_datas", "rl_inferred_datas"]:
+        db.execute("""DROP TABLE temp.%s""" % table)
+        
+  finally:
+    world.graph.release_write_lock()
+    
+  if debug:
+    print("* Owlready2 * OWL 2 RL reasoner took %s seconds (%s object and %s data triples inferred)" % (time.time() - t0, len(new_objs), len(new_datas)), file = sys.stderr)
+    
+  # Update the Python objects already loaded
+  new_parents   = defaultdict(list)
+  new_equivs    = defaultdict(list)
+  entity_2_type = {}
+  relations     = []
+  for s, p, o in new_objs:
+    if   p in _RL_IS_A_RELATIONS:
+      entity = world._entities.get(s)
+      if (not entity is None) and (not s in new_parents) and ((p != rdf_type) or isinstance(entity, Thing)):
+        new_parents[s] = [parent for parent in world._get_obj_triples_sp_o(s, p) if (parent > 0) and (parent != owl_named_individual)]
+        entity_2_type[s] = _RL_IS_A_RELATIONS[p]
+    elif p in _RL_EQUIV_RELATIONS:
+      if (s in world._entities) or (o in world._entities):
+        new_equivs[s].append(o)
+        entity_2_type[s] = _RL_EQUIV_RELATIONS[p]
+    else:
+      prop = world._get_by_storid(p)
+      if not prop is None: relations.append((s, prop, o))
+      
+  _apply_reasoning_results(world, ontology, debug, new_parents, new_equivs, entity_2_type)
+  for s, prop, o in relations: _forget_cached_relation(world, s, prop, o)
+  for s, p, o, d in new_datas:
+    a = world._entities.get(s)
+    if not a is None:
+      prop = world._get_by_storid(p)
+      if (not prop is None) and (prop._python_name in a.__dict__): delattr(a, prop._python_name)
+      
+  if debug: print("* Owlready * (NB: only changes on entities loaded in Python are shown, other changes are done but not listed)", file = sys.stderr)
+  
+  
+def _rl_fixpoint(db, debug):
+  # Semi-naive evaluation: at each iteration, each rule is applied with at least one premise in the triples inferred
+  # at the previous iteration (delta tables).
+  constants = { "type" : rdf_type, "sco" : rdfs_subclassof, "spo" : rdfs_subpropertyof, "eqc" : owl_equivalentclass,
+                "eqp" : owl_equivalentproperty, "same" : owl_equivalentindividual, "domain" : rdf_domain, "range" : rdf_range,
+                "inverse" : owl_inverse_property, "symmetric" : SymmetricProperty.storid, "transitive" : TransitiveProperty.storid }
+  full  = { "b" : "rl_sco", "o" : "rl_objs", "d" : "rl_datas" }
+  delta = { "b" : "rl_delta_sco", "o" : "rl_delta_objs", "d" : "rl_delta_datas" }
+  new   = { "b" : "rl_new_sco", "o" : "rl_new_objs", "d" : "rl_new_datas" }
+  first_rules = []
+  rules       = []
+  for target, columns, premises, conditions in _RL_RULES:
+    select = "INSERT OR IGNORE INTO %s SELECT %s FROM %%s WHERE %s" % (new[target], columns % constants, conditions % constants)
+    first_rules.append((premises[0][0], select % ", ".join("%s %s" % (full[kind], alias) for (kind, alias) in premises)))
+    for i in range(len(premises)):
+      # The delta table is put first, since it is the smallest one
+      tables = ["%s %s" % (delta[premises[i][0]], premises[i][1])] + ["%s %s" % (full[kind], alias) for (j, (kind, alias)) in enumerate(premises) if j != i]
+      rules.append((premises[i][0], select % " CROSS JOIN ".join(tables)))
+      
+  nb_iterations = 0
+  while True:
+    nb_iterations += 1
+    for kind, sql in (first_rules if nb_iterations == 1 else rules): # At the first iteration, all triples are in delta
+      if db.execute("""SELECT 1 FROM %s LIMIT 1""" % delta[kind]).fetchone(): db.execute(sql)
+      
+    db.execute("""DELETE FROM rl_delta_sco""")
+    db.execute("""INSERT INTO rl_delta_sco SELECT s,p,o FROM rl_new_sco n WHERE NOT EXISTS (SELECT 1 FROM rl_sco f WHERE f.s=n.s AND f.p=n.p AND f.o=n.o)""")
+    db.execute("""INSERT INTO rl_sco SELECT s,p,o FROM rl_delta_sco""")
+    db.execute("""INSERT OR IGNORE INTO rl_new_objs SELECT s,p,o FROM rl_delta_sco""") # Base subclass triples are also regular triples
+    db.execute("""DELETE FROM rl_new_sco""")
+    db.execute("""DELETE FROM rl_delta_objs""")
+    db.execute("""DELETE FROM rl_delta_datas""")
+    db.execute("""INSERT INTO rl_delta_objs  SELECT s,p,o   FROM rl_new_objs  n WHERE NOT EXISTS (SELECT 1 FROM rl_objs  f WHERE f.p=n.p AND f.s=n.s AND f.o=n.o)""")
+    db.execute("""INSERT INTO rl_delta_datas SELECT s,p,o,d FROM rl_new_datas n WHERE NOT EXISTS (SELECT 1 FROM rl_datas f WHERE f.p=n.p AND f.s=n.s AND f.o=n.o AND f.d IS n.d)""")
+    db.execute("""DELETE FROM rl_new_objs""")
+    db.execute("""DELETE FROM rl_new_datas""")
+    nb_objs  = db.execute("""INSERT INTO rl_objs  SELECT s,p,o   FROM rl_delta_objs""" ).rowcount
+    nb_datas = db.execute("""INSERT INTO rl_datas SELECT s,p,o,d FROM rl_delta_datas""").rowcount
+    if not (nb_objs or nb_datas): break
+    db.execute("""INSERT INTO rl_inferred_objs  SELECT s,p,o   FROM rl_delta_objs""")
+    db.execute("""INSERT INTO rl_inferred_datas SELECT s,p,o,d FROM rl_delta_datas""")
+    
+  if debug > 1: print("* Owlready2 * OWL 2 RL fixpoint reached after %s iterations" % nb_iterations, file = sys.stderr)
+  
+  
+def _forget_cached_relation(world, a_storid, prop, b_storid):
+  a = world._entities.get(a_storid)
+  if (not a is None) and (prop._python_name in a.__dict__): delattr(a, prop._python_name)
+  if prop._inverse_property:
+    b = world._entities.get(b_storid)
+    if (not b is None) and (prop._inverse_property._python_name in b.__dict__): delattr(b, prop._inverse_property._python_name)
+    
+    
+def _get_inferrence_ontology(ontology):
+  l = CURRENT_NAMESPACES.get()
+  return (l and l[-1].ontology) or ontology
+
+def _insert_inferred_obj_triples(ontology, triples, inverses = None, returning = False):
+  # The triples are inserted directly in the quadstore; the events of observed ontologies are then sent for the inserted triples.
+  ontology    = _get_inferrence_ontology(ontology)
+  send_events = getattr(ontology, "_obj_triples_added", None)
+  triples     = ontology.world.graph._insert_new_obj_triples(ontology.graph.c, triples, inverses, returning or (not send_events is None))
+  if send_events: send_events(triples)
+  return triples
+
+def _insert_inferred_data_triples(ontology, triples, returning = False):
+  ontology    = _get_inferrence_ontology(ontology)
+  send_events = getattr(ontology, "_data_triples_added", None)
+  triples     = ontology.world.graph._insert_new_data_triples(ontology.graph.c, triples, returning or (not send_events is None))
+  if send_events: send_events(triples)
+  return triples
+
 def _apply_reasoning_results(world, ontology, debug, new_parents, new_equivs, entity_2_type):
   new_parents_loaded = defaultdict(list)
   new_equivs_loaded  = defaultdict(list)
-
+  
+  # All triples are inserted at once; Python objects are only updated for the entities already loaded
+  triples = [(child_storid, _TYPE_2_IS_A[entity_2_type[child_storid]], parent_storid)
+             for child_storid, parent_storids in new_parents.items() for parent_storid in parent_storids]
+  triples.extend((concept1_storid, _TYPE_2_EQUIVALENT_TO[entity_2_type[concept1_storid]], concept2_storid)
+                 for concept1_storid, concept2_storids in new_equivs.items() for concept2_storid in concept2_storids)
+  _insert_inferred_obj_triples(ontology, triples)
+  
   for child_storid, parent_storids in new_parents.items():
-    for parent_storid in parent_storids:
-      owl_relation = _TYPE_2_IS_A[entity_2_type[child_storid]]
-      if not ontology.world._has_obj_triple_spo(child_storid, owl_relation, parent_storid):
-        ontology._add_obj_triple_spo(child_storid, owl_relation, parent_storid)
-        
     child = world._entities.get(child_storid)
     if not child is None:
       l = new_parents_loaded[child] = []
@@ -359,10 +832,6 @@ def _apply_reasoning_results(world, ontology, debug, new_parents, new_equivs, en
           
   for concept1_storid, concept2_storids in new_equivs.items():
     for concept2_storid in concept2_storids:
-      owl_relation = _TYPE_2_EQUIVALENT_TO[entity_2_type[concept1_storid]]
-      if not ontology.world._has_obj_triple_spo(concept1_storid, owl_relation, concept2_storid):
-        ontology._add_obj_triple_spo(concept1_storid, owl_relation, concept2_storid)
-        
       if concept2_storid == owl_nothing:
         concept1 = world._entities.get(concept1_storid)
         if not concept1 is None: new_equivs_loaded[concept1].append(Nothing)
@@ -411,9 +880,12 @@ def _apply_reasoning_results(world, ontology, debug, new_parents, new_equivs, en
 
           
 def _apply_inferred_obj_relations(world, ontology, debug, relations):
-  for a_storid, prop, b_storid in relations:
-    ontology._add_obj_triple_spo(a_storid, prop.storid, b_storid)
-    
+  props     = { prop.storid : prop for (a_storid, prop, b_storid) in relations }
+  inverses  = { prop.storid : prop._inverse_storid for prop in props.values() if prop._inverse_property }
+  relations = _insert_inferred_obj_triples(ontology, [(a_storid, prop.storid, b_storid) for (a_storid, prop, b_storid) in relations], inverses, True)
+  
+  for a_storid, p, b_storid in relations:
+    prop = props[p]
     a = world._entities.get(a_storid)
     if not a is None:
       if debug:
@@ -430,9 +902,11 @@ def _apply_inferred_obj_relations(world, ontology, debug, relations):
           
           
 def _apply_inferred_data_relations(world, ontology, debug, relations):
-  for a_storid, prop, value, datatype in relations:
-    ontology._add_data_triple_spod(a_storid, prop.storid, value, datatype)
-    
+  props     = { prop.storid : prop for (a_storid, prop, value, datatype) in relations }
+  relations = _insert_inferred_data_triples(ontology, [(a_storid, prop.storid, value, datatype) for (a_storid, prop, value, datatype) in relations], True)
+  
+  for a_storid, p, value, datatype in relations:
+    prop = props[p]
     a = world._entities.get(a_storid)
     if not a is None:
       if debug:
@@ -1,6 +1,6 @@
 
 import sys, os, unittest, tempfile, atexit, datetime
-from io import StringIO, BytesIO
+from io import StringIO, BytesIO, BufferedReader
 
 try:
   import rdflib
@@ -166,8 +166,7 @@ class Test(BaseTest, unittest.TestCase):
     iri = x.storid
     assert x is n.Vegetable
     x = None
-    import owlready2.namespace
-    owlready2.namespace._cache = [None] * 1000
+    default_world.entity_cache.clear()
     import gc
     gc.collect(); gc.collect(); gc.collect()
     assert not iri in default_world._entities
@@ -324,7 +323,487 @@ class Test(BaseTest, unittest.TestCase):
     sql.execute("""SELECT * from ontologies;""")
     assert sql.fetchall() == []
     
+  def test_world_11(self):
+    import threading
+    world = World(filename = self.new_tmp_file(), concurrent_readers = 3)
+    n = world.get_ontology("http://www.semanticweb.org/jiba/ontologies/2017/0/test").load()
+    world.save()
+    assert world.graph.db.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    assert world.graph.read_pool.qsize() == 3
+    
+    results = []
+    def read():
+      results.append(set(world.search(type = n.Pizza)))
+    threads = [threading.Thread(target = read) for i in range(6)]
+    for thread in threads: thread.start()
+    for thread in threads: thread.join()
+    assert results == [{ n.ma_pizza }] * 6
+    assert world.graph.read_pool.qsize() == 3
+    
+    cursor = world.graph.execute("SELECT s FROM objs")
+    assert world.graph.read_pool.qsize() == 2 # Rows are fetched lazily
+    assert cursor.fetchone()
+    cursors = [world.graph.execute("SELECT s FROM objs") for i in range(3)]
+    assert world.graph.read_pool.qsize() == 0
+    assert cursors[-1].fetchone() # Uses the writing connection when the pool is empty
+    for c in cursors: c.close()
+    assert len(list(cursor)) > 0
+    assert world.graph.read_pool.qsize() == 3
+    
+    with n: p = n.Pizza("pizza_not_yet_saved") # Uncommitted changes are visible
+    assert set(world.search(type = n.Pizza)) == { n.ma_pizza, p }
+    world.save()
+    assert set(world.search(type = n.Pizza)) == { n.ma_pizza, p }
+    world.close()
+
+  def test_world_12(self):
+    import gc
+    world = self.new_world()
+    onto  = world.get_ontology("http://www.test.org/t.owl")
+    with onto:
+      class C(Thing): pass
+      for i in range(20): C("c%s" % i)
+
+    cache = world.entity_cache
+    cache.pin(onto.c0)
+    cache.set_max_size(5)
+    assert len(cache) == 5
+    assert cache.evictions > 0
+    gc.collect(); gc.collect(); gc.collect()
+
+    cache.reset_stats()
+    assert onto.c19.name == "c19" # Most recently used
+    assert onto.c0.name  == "c0"  # Pinned
+    assert cache.get_stats()["hits"] == 2
+    assert cache.get_stats()["misses"] == 0
+
+    assert onto.c1.name  == "c1"  # Evicted, reloaded
+    assert cache.misses == 1
+    assert onto.c1 in cache
+    assert len(cache) == 5
+    
+    cs = [onto["c%s" % i] for i in range(8)]
+    cache.clear()
+    for c in cs[2:7]: cache.add(c)
+    cache.hit(cs[2]) # c2 gets a second chance, c3 is evicted
+    cache.add(cs[7])
+    assert (cs[2] in cache) and not (cs[3] in cache)
+    assert len(cache) == 5
+    
+    cache.clear()
+    cache.set_max_size(100)
+    cache.set_max_bytes(3 * owlready2.namespace._entity_size(cs[0]) + 1)
+    for c in cs: cache.add(c)
+    assert len(cache) == 3 # Limited in bytes
+    assert cache.get_stats()["bytes"] <= cache.max_bytes
+    cache.set_max_bytes(None)
+    assert cache.get_stats()["bytes"] == 0
+    
+    cache.clear()
+    cache.set_max_size(2)
+    cache.pin_after = 3
+    for i in range(3):
+      for c in cs:
+        cache.add(c)
+        cache.hit(cs[0]) # cs[0] is hot
+    assert cs[0].storid in cache.auto_pinned
+    assert cache.get_stats()["pinned"] == cache.get_stats()["auto_pinned"] == 1
+    assert len(cache) == 2
+    cache.unpin(cs[0])
+    assert not cs[0] in cache
+
+  def test_world_13(self):
+    tmp = self.new_tmp_file()
+    world = World(filename = tmp)
+    onto  = world.get_ontology("http://www.test.org/t.owl")
+    with onto:
+      class A(Thing): pass
+      class B(A): pass
+      class C(B): pass
+      class p(ObjectProperty): pass
+      class q(p): pass
+      for i in range(20): C("c%s" % i)
+    world.save()
+    world.close()
+
+    world = World(filename = tmp)
+    onto  = world.get_ontology("http://www.test.org/t.owl")
+    nb = 0
+    execute = world.graph.execute
+    def counting_execute(*args):
+      nonlocal nb
+      nb += 1
+      return execute(*args)
+    world.graph.execute = counting_execute
+    r = world.get_many(["http://www.test.org/t.owl#c%s" % i for i in range(20)] + ["http://www.test.org/t.owl#q", "http://www.test.org/t.owl#unknown"])
+    world.graph.execute = execute
+
+    assert nb <= 10 # Instead of 2 per entity
+    assert [x.name for x in r[:20]] == ["c%s" % i for i in range(20)]
+    assert r[0].is_a == [onto.C]
+    assert onto.C.is_a == [onto.B]
+    assert onto.B.is_a == [onto.A]
+    assert r[20] is onto.q
+    assert r[20].is_a == [ObjectProperty, onto.p]
+    assert r[21] is None
+    assert world.get_many([onto.A.storid]) == [onto.A]
+    assert set(onto.A.descendants()) == { onto.A, onto.B, onto.C }
+    
+    world = World(filename = self.new_tmp_file())
+    onto1 = world.get_ontology("http://www.test.org/t1.owl")
+    onto2 = world.get_ontology("http://www.test.org/t2.owl")
+    with onto1:
+      class A(Thing): pass
+    with onto2:
+      class B(A): pass
+      class C(B): pass
+    world.save()
+    storids = (B.storid, C.storid)
+    del A, B, C
+    world.entity_cache.clear()
+    import gc; gc.collect()
+    A = onto1.A
+    assert not [storid for storid in storids if storid in world._entities]
+    assert [B.namespace.ontology for B in A.subclasses()] == [onto1] # As when loaded lazily
+    assert { C.namespace.ontology for C in A.descendants() } == { onto1 }
+
+  def test_world_14(self):
+    tmp = self.new_tmp_file()
+    world = World(filename = tmp)
+    onto  = world.get_ontology("http://www.test.org/t.owl")
+    with onto:
+      class A(Thing): pass
+      class B(A): pass
+      class C(B): pass
+      class D(Thing): pass
+      class p(ObjectProperty): pass
+      class q(p): pass
+      c = C()
+    world.closure_indexed = True
+    assert world.closure_indexed
+
+    assert set(A.descendants()) == { A, B, C }
+    assert set(C.ancestors()) == { Thing, A, B, C }
+    assert set(p.descendants()) == { p, q }
+    assert issubclass(C, A)
+    assert set(world.search(subclass_of = A)) == { A, B, C }
+    assert set(world.search(type = A)) == { c }
+    assert set(world.search(subproperty_of = p)) == { p, q }
+    assert world.graph.execute("SELECT depth FROM closure WHERE a=? AND d=?", (A.storid, C.storid)).fetchone()[0] == 2
+
+    B.is_a = [D]
+    assert set(A.descendants()) == { A }
+    assert set(D.descendants()) == { D, B, C }
+    assert not issubclass(C, A)
+    assert set(world.search(subclass_of = A)) == { A }
+    assert set(world.search(type = D)) == { c }
+
+    with onto:
+      class E(C): pass
+    B.is_a.append(A)
+    assert set(A.descendants()) == { A, B, C, E }
+    assert issubclass(E, A) and issubclass(E, D)
+    
+    import threading
+    B.is_a.remove(A)
+    results = []
+    world.graph.acquire_write_lock()
+    thread = threading.Thread(target = lambda: results.append(set(A.descendants())))
+    thread.start()
+    thread.join(0.2)
+    assert thread.is_alive() # Waits for the write lock before repairing the closure
+    world.graph.release_write_lock()
+    thread.join()
+    assert results == [{ A }]
+    B.is_a.append(A)
+
+    world.save()
+    world.close()
+    world = World(filename = tmp)
+    onto  = world.get_ontology("http://www.test.org/t.owl")
+    assert world.closure_indexed
+    assert set(onto.A.descendants()) == { onto.A, onto.B, onto.C, onto.E }
+
+    world.closure_indexed = False
+    assert not world.closure_indexed
+    assert set(onto.D.descendants()) == { onto.D, onto.B, onto.C, onto.E }
+
+  def test_world_15(self):
+    tmp = self.new_tmp_file()
+    world = World(filename = tmp)
+    onto  = world.get_ontology("http://www.test.org/t.owl")
+    with onto:
+      class A(Thing): pass
+      class B(A): pass
+      class C(A): pass
+      class D(B, C): pass
+      class E(Thing): pass
+      d = D()
+      e = E()
+    world.hierarchy_indexed = True
+    assert world.hierarchy_indexed
+
+    assert issubclass(D, A) and issubclass(D, B) and issubclass(D, C)
+    assert not issubclass(B, C)
+    assert not issubclass(E, A)
+    assert set(A.descendants()) == { A, B, C, D }
+    assert set(C.descendants()) == { C, D }
+    assert set(world.search(type = A)) == { d }
+    assert set(world.search(subclass_of = C)) == { C, D }
+
+    E.is_a = [C]
+    assert issubclass(E, A)
+    assert set(C.descendants()) == { C, D, E }
+    assert set(world.search(type = A)) == { d, e }
+    D.is_a = [B]
+    assert not issubclass(D, C)
+    assert set(world.search(subclass_of = C)) == { C, E }
+    
+    import threading
+    E.is_a = [Thing]
+    results = []
+    world.graph.acquire_write_lock()
+    thread = threading.Thread(target = lambda: results.append(issubclass(E, A)))
+    thread.start()
+    thread.join(0.2)
+    assert thread.is_alive() # Waits for the write lock before rebuilding the hierarchy index
+    world.graph.release_write_lock()
+    thread.join()
+    assert results == [False]
+    E.is_a = [C]
+
+    world.save()
+    world.close()
+    world = World(filename = tmp)
+    onto  = world.get_ontology("http://www.test.org/t.owl")
+    assert world.hierarchy_indexed
+    assert issubclass(onto.E, onto.A)
+    assert set(onto.A.descendants()) == { onto.A, onto.B, onto.C, onto.D, onto.E }
+
+    world.hierarchy_indexed = False
+    assert not world.hierarchy_indexed
+    assert set(onto.C.descendants()) == { onto.C, onto.E }
+
+  def test_world_16(self):
+    world = self.new_world()
+    onto  = world.get_ontology("http://www.test.org/t.owl")
+    with onto:
+      class A(Thing): pass
+      class B(A): pass
+      class p(DataProperty): pass
+      b = B("b", label = ["b", locstr("b en", "en")], p = [2, 2.5, "x", True])
+      class D(Thing): pass
+      class E(Thing): pass
+      AllDisjoint([A, D, E])
+    world.full_text_search_properties.append(label)
+    world.hierarchy_indexed = True
+
+    tmp = self.new_tmp_file()
+    world.save(tmp, format = "snapshot")
+
+    world2 = World(snapshot = tmp)
+    onto2  = world2.get_ontology("http://www.test.org/t.owl")
+    assert len(onto2.graph) == len(onto.graph)
+    assert onto2.b.is_a == [onto2.B]
+    assert set(onto2.b.label) == { "b", locstr("b en", "en") }
+    assert set(onto2.b.p) == { 2, 2.5, "x", True }
+    assert world2.search(label = FTS("en")) == [onto2.b]
+    assert world2.hierarchy_indexed
+    assert issubclass(onto2.B, onto2.A)
+    assert len(list(onto2.disjoint_classes())) == 1
+    assert world2._unabbreviate(world2.graph.current_resource) == world._unabbreviate(world.graph.current_resource)
+
+    with onto2:
+      class C(onto2.B): pass
+    assert C.storid == world2.graph.current_resource
+    assert world2._get_by_storid(onto2.b.storid) is onto2.b
+
+    bad = self.new_tmp_file()
+    with open(bad, "wb") as f: f.write(b"<rdf:RDF/>")
+    self.assertRaises(ValueError, lambda: World(snapshot = bad))
+    
+    import owlready2.triplelite
+    old_block = owlready2.triplelite._SNAPSHOT_BLOCK
+    try:
+      owlready2.triplelite._SNAPSHOT_BLOCK = 3 # Several blocks per table
+      world.save(tmp, format = "snapshot")
+    finally:
+      owlready2.triplelite._SNAPSHOT_BLOCK = old_block
+    world3 = World(snapshot = tmp)
+    onto3  = world3.get_ontology("http://www.test.org/t.owl")
+    assert set(onto3.graph._iter_triples()) == set(onto.graph._iter_triples())
+    assert set(onto3.b.p) == { 2, 2.5, "x", True }
+    
+    with open(tmp, "rb") as f: data = f.read()
+    with open(bad, "wb") as f: f.write(data[:-10])
+    self.assertRaises(ValueError, lambda: World(snapshot = bad))
+    with open(bad, "wb") as f: f.write(data.replace(b"SNAPSHOT\n\x02", b"SNAPSHOT\n\x09", 1))
+    self.assertRaises(ValueError, lambda: World(snapshot = bad))
+
+  def test_world_17(self):
+    tmp = self.new_tmp_file()
+    progress = []
+    world = World(filename = tmp, in_memory = True, backup_progress = lambda status, remaining, total: progress.append(remaining))
+    onto  = world.get_ontology("http://www.test.org/t.owl")
+    with onto:
+      class A(Thing): pass
+      A("a1")
+    assert os.path.getsize(tmp) == 0
+    world.save()
+    world.close()
+    assert progress and (progress[-1] == 0)
+
+    world = World(filename = tmp, in_memory = True)
+    onto  = world.get_ontology("http://www.test.org/t.owl")
+    assert onto.a1.is_a == [onto.A]
+    onto.a1.label = ["unsaved"]
+    world.close()
+
+    world = World(filename = tmp)
+    onto  = world.get_ontology("http://www.test.org/t.owl")
+    assert onto.a1.label == []
+    world.close()
+
+    world = self.new_world()
+    onto  = world.get_ontology("http://www.test.org/t.owl")
+    with onto:
+      class B(Thing): pass
+      B("b1", label = ["b1"])
+    world.full_text_search_properties.append(label)
+    tmp2 = self.new_tmp_file()
+    world.set_backend(filename = tmp2)
+    assert onto.b1.label == ["b1"]
+    assert world.search(label = FTS("b1")) == [onto.b1]
+    with onto: B("b2")
+    assert onto.b2.storid > onto.b1.storid
+    world.save()
+    assert os.path.getsize(tmp2) > 0
+
+  def test_world_18(self):
+    world = self.new_world()
+    onto  = world.get_ontology("http://www.test.org/t.owl")
+    with onto:
+      class A(Thing): pass
+      class p(DataProperty): pass
+      for i in range(10): A("a%s" % i, p = [i % 2])
+      
+    assert world.search_cache.get_stats()["max_size"] == 0
+    assert set(world.search(type = A, p = 1)) == { onto.a1, onto.a3, onto.a5, onto.a7, onto.a9 }
+    assert len(world.search_cache) == 0
+    
+    world.search_cache.set_max_size(2)
+    assert set(world.search(type = A, p = 1)) == { onto.a1, onto.a3, onto.a5, onto.a7, onto.a9 }
+    r = world.search(type = A, p = 1)
+    assert len(r) == 5
+    assert set(r) == { onto.a1, onto.a3, onto.a5, onto.a7, onto.a9 }
+    assert world.search_cache.get_stats()["hits"] >= 2
+    
+    r = world.search(type = A, p = 1)
+    assert set(world.search(p = 0) & r) == set()
+    assert set(world.search(type = A, iri = "*a1")) == { onto.a1 }
+    
+    onto.a2.p = [1]
+    assert set(world.search(type = A, p = 1)) == { onto.a1, onto.a2, onto.a3, onto.a5, onto.a7, onto.a9 }
     
+    list(world.search(p = 0))
+    list(world.search(p = 1))
+    assert world.search(p = 0).first() in { onto.a0, onto.a4, onto.a6, onto.a8 }
+    assert len(world.search_cache) == 2
+    assert world.search_cache.get_stats()["evictions"] == 1
+
+  def test_world_19(self):
+    world1 = self.new_world()
+    onto1  = world1.get_ontology("http://www.semanticweb.org/jiba/ontologies/2017/0/test").load()
+    
+    world = self.new_world()
+    journal_mode = world.graph.execute("PRAGMA journal_mode").fetchone()[0]
+    with world.bulk_load():
+      assert world.graph.execute("PRAGMA synchronous").fetchone()[0] == 0
+      assert not world.graph.execute("SELECT 1 FROM sqlite_master WHERE type='index' AND name='index_objs_sp'").fetchone()
+      onto = world.get_ontology("http://www.semanticweb.org/jiba/ontologies/2017/0/test").load()
+      assert len(world.graph) == len(world1.graph)
+      assert set(onto.search(iri = "*Pizza")) == { onto.Pizza, onto.NonPizza, onto.VegetarianPizza }
+      onto.add_triples([(onto.ma_pizza, rdf_type, onto.Pizza), (onto.ma_pizza, label, "dupl", None), (onto.ma_pizza, label, "dupl", None)])
+      
+    assert world.graph.execute("PRAGMA journal_mode").fetchone()[0] == journal_mode
+    assert world.graph.execute("PRAGMA synchronous").fetchone()[0] == 2
+    assert len(world.graph.execute("SELECT name FROM sqlite_master WHERE type='index' AND name LIKE 'index_%'").fetchall()) == 5
+    assert len(world.graph) == len(world1.graph) + 1
+    assert onto.ma_pizza.price == onto1.ma_pizza.price
+    assert onto.ma_pizza.label == ["dupl"]
+    assert set(onto.search(has_topping = onto.ma_tomate)) == { onto.ma_pizza }
+    
+  def test_world_20(self):
+    world = World(filename = self.new_tmp_file(), profile = "read_heavy", pragmas = { "cache_size" : -1000, "page_size" : 8192 })
+    pragmas = world.get_pragmas()
+    assert pragmas["cache_size"] == -1000
+    assert pragmas["mmap_size"]  == 1 << 30
+    assert pragmas["page_size"]  == 8192
+    assert pragmas["temp_store"] == 2
+    assert pragmas["locking_mode"] == "exclusive"
+    onto = world.get_ontology("http://www.semanticweb.org/jiba/ontologies/2017/0/test").load()
+    world.save()
+    
+    world = World(filename = self.new_tmp_file(), profile = "durable", concurrent_readers = 2)
+    assert world.get_pragmas()["synchronous"] == 2
+    assert world.get_pragmas()["journal_mode"] == "wal"
+    
+    with self.assertRaises(ValueError): World(filename = self.new_tmp_file(), profile = "unknown")
+    with self.assertRaises(ValueError): World(filename = self.new_tmp_file(), pragmas = { "cache_size; DROP TABLE objs" : 1 })
+    with self.assertRaises(ValueError): World(filename = self.new_tmp_file(), profile = "bulk_load", concurrent_readers = 2)
+    
+  def test_world_21(self):
+    import json
+    world = World(filename = self.new_tmp_file(), profiling = True)
+    onto  = world.get_ontology("http://www.semanticweb.org/jiba/ontologies/2017/0/test").load()
+    world.graph.reset_profiling()
+    
+    assert set(onto.search(iri = "*Pizza")) == { onto.Pizza, onto.NonPizza, onto.VegetarianPizza }
+    onto.Pizza.is_a
+    list(world._get_obj_triples_sp_o(onto.ma_pizza.storid, onto.has_topping.storid))
+    
+    stats = world.graph.profiler.get_stats()
+    assert stats["nb"] == sum(request["nb"] for request in stats["requests"]) == sum(accessor["nb"] for accessor in stats["accessors"])
+    accessors = { accessor["accessor"].rsplit(".", 1)[-1] for accessor in stats["accessors"] }
+    assert { "_load_by_storid", "search", "test_world_21" } <= accessors # Callers outside the quadstore
+    assert not [accessor for accessor in accessors if accessor.startswith(("_get_", "_do_search"))]
+    for request in stats["requests"]:
+      assert sum(request["histogram"].values()) == request["nb"]
+      assert request["min"] <= request["mean"] <= request["max"]
+    assert json.loads(world.graph.profiler.to_json())["nb"] == stats["nb"]
+    
+    cursor = world.graph.execute("SELECT s FROM objs") # Rows are fetched lazily
+    assert cursor.fetchone()
+    assert world.graph.profiler.get_stats()["nb"] == stats["nb"]
+    cursor.close()
+    assert world.graph.profiler.get_stats()["nb"] == stats["nb"] + 1
+    stats = world.graph.profiler.get_stats()
+    
+    world.graph.profiler.sampling = 0.0
+    onto.Pizza.is_a
+    list(onto.classes())
+    assert world.graph.profiler.get_stats()["nb"] == stats["nb"]
+    
+    profiler = owlready2.triplelite.QueryProfiler(0.5)
+    world = World(filename = self.new_tmp_file(), profiling = profiler)
+    assert world.graph.profiler is profiler
+    assert profiler._get_template("SELECT s FROM objs WHERE p=12 AND o IN (?, ?,?)\n  LIMIT 1") == "SELECT s FROM objs WHERE p=? AND o IN (?,...) LIMIT ?"
+    
+    import threading, time
+    class SlowSampling(float): # Lets the other threads run while sampling
+      def __rmul__(self, x):
+        time.sleep(0.0001)
+        return float(self) * x
+    profiler = owlready2.triplelite.QueryProfiler(SlowSampling(0.25))
+    execute  = profiler.wrap(lambda sql, args: None)
+    def run():
+      for i in range(200): execute("UPDATE x SET y=?", (i,))
+    threads = [threading.Thread(target = run) for i in range(4)]
+    for thread in threads: thread.start()
+    for thread in threads: thread.join()
+    assert profiler.get_stats()["nb"] == 200 # Exactly 1 request in 4 is measured
+    
+
   def test_ontology_1(self):
     o1 = get_ontology("http://test/test_ontology_1_1.owl")
     o2 = get_ontology("http://test/test_ontology_1_2.owl")
@@ -749,7 +1228,60 @@ class Test(BaseTest, unittest.TestCase):
     
     assert o1.get_instances_of(G) == []
     assert o2.get_instances_of(G) == [i]
-    
+
+  def test_ontology_32(self):
+    w = self.new_world()
+    o = w.get_ontology("http://www.test.org/o.owl")
+    with o:
+      class C(Thing): pass
+      class p(C >> C, FunctionalProperty): pass
+
+    nb = len(w.graph)
+    with o.bulk_insert() as bulk:
+      previous = None
+      for i in range(10):
+        c = C("c%s" % i, label = ["c #%s" % i])
+        if previous: previous.p = c
+        previous = c
+      assert len(w.graph) == nb # Not yet inserted
+      o.c0.p = o.c5 # Replaces a buffered triple
+      bulk.flush()
+      assert len(w.graph) == nb + 39
+      C("c10")
+
+    assert len(w.graph) == nb + 41
+    assert set(C.instances()) == { o["c%s" % i] for i in range(11) }
+    assert w.search_one(label = "c #3") is o.c3
+    assert w._get_obj_triple_sp_o(o.c0.storid, p.storid) == o.c5.storid
+    assert w._get_obj_triple_sp_o(o.c3.storid, p.storid) == o.c4.storid
+    assert w._unabbreviate(o.c10.storid) == "http://www.test.org/o.owl#c10"
+    assert o._add_obj_triple_raw_spo.__func__ is owlready2.triplelite.SubGraph._add_obj_triple_raw_spo
+
+    o.add_triples([
+      ("http://www.test.org/o.owl#d1", rdf_type, C),
+      ("http://www.test.org/o.owl#d1", p, o.c1),
+      ("http://www.test.org/o.owl#d1", label.storid, "d #1", None),
+      ("http://www.test.org/o.owl#d1", label, "d #1 (fr)", "@fr"),
+    ])
+    assert o.d1.is_a == [C]
+    assert o.d1.p is o.c1
+    assert set(o.d1.label) == { "d #1", locstr("d #1 (fr)", "fr") }
+
+  def test_ontology_33(self):
+    w1 = self.new_world()
+    o1 = w1.get_ontology("file://%s/test_ontoslash.owl" % HERE).load()
+    w2 = self.new_world()
+    o2 = w2.get_ontology("file://%s/test_ontoslash.owl" % HERE).load(parallel = 2)
+
+    assert not w2._preparsed
+    assert o2.base_iri == "http://test.org/test_ontoslash/"
+    assert [i.base_iri for i in o2.imported_ontologies] == [i.base_iri for i in o1.imported_ontologies]
+    assert o2.imported_ontologies[0].loaded
+    assert len(w2.graph) == len(w1.graph)
+    assert set(o2.classes()) == { o2.Class1, o2.Class2 }
+    assert o2.Class1.iri == "http://test.org/test_ontoslash/Class1"
+    assert len(list(o2.imported_ontologies[0].classes())) == len(list(o1.imported_ontologies[0].classes()))
+
   def test_class_1(self):
     n = get_ontology("http://www.semanticweb.org/jiba/ontologies/2017/0/test")
     assert issubclass(n.Tomato, n.Vegetable)
@@ -3203,6 +3735,396 @@ I took a placebo
       
     assert False
      
+  def test_reasoning_rl_1(self):
+    world = self.new_world()
+    onto  = world.get_ontology("http://test.org/test.owl")
+    
+    with onto:
+      class A(Thing): pass
+      class B(A): pass
+      class C(B): pass
+      class D(Thing): pass
+      class E(Thing): equivalent_to = [D]
+      class F(Thing): pass
+      class G(E): pass
+      class p(ObjectProperty):
+        domain = [D]
+        range  = [F]
+      class p2(p): pass
+      class inv(ObjectProperty): inverse_property = p2
+      class t(ObjectProperty, TransitiveProperty): pass
+      class s(ObjectProperty, SymmetricProperty): pass
+      class n(DataProperty): pass
+      class n2(n): pass
+      
+      c  = C()
+      x1 = Thing()
+      x2 = Thing()
+      x3 = Thing()
+      x4 = Thing()
+      x1.p2 = [x2]
+      x1.t  = [x2]
+      x2.t  = [x3]
+      x3.s  = [x4]
+      x4.n2 = [5]
+      x4.equivalent_to = [x1]
+      
+    sync_reasoner_rl(world, infer_property_values = True, infer_data_property_values = True, debug = 0)
+    
+    assert set(C.ancestors()) == { C, B, A, Thing }
+    assert c.is_a == [C]
+    assert isinstance(c, A)
+    assert set(x1.is_a) == { D, E }
+    assert set(x2.is_a) == { F }
+    assert set(x2.inv) == { x1, x4 }
+    assert set(x1.t) == { x2, x3 }
+    assert x4.s == [x3]
+    assert x4.n == [5]
+    assert x1.n == [5]
+    assert set(x1.equivalent_to.indirect()) == { x4 }
+    assert x4.p == [x2]
+    assert world._has_obj_triple_spo(G.storid, rdfs_subclassof, D.storid)
+    assert not world._has_obj_triple_spo(E.storid, rdfs_subclassof, D.storid)
+    
+    inferrences = world.get_ontology("http://inferrences/")
+    assert inferrences._has_obj_triple_spo(c.storid, rdf_type, A.storid)
+    assert not onto._has_obj_triple_spo(c.storid, rdf_type, A.storid)
+    
+  def test_reasoning_rl_2(self):
+    world = self.new_world()
+    onto  = world.get_ontology("http://test.org/test.owl")
+    
+    with onto:
+      class C(Thing): pass
+      class D(Thing): pass
+      class C2(C): pass
+      AllDisjoint([C, D])
+      x = C2()
+      
+    sync_reasoner_rl(world, debug = 0)
+    
+    x.is_a.append(D)
+    try:
+      sync_reasoner_rl(world, debug = 0)
+    except OwlReadyInconsistentOntologyError:
+      pass
+    else:
+      assert False
+      
+  def test_reasoning_rl_3(self):
+    import owlready2.observe
+    world = self.new_world()
+    onto  = world.get_ontology("http://test.org/test.owl")
+    with onto:
+      class A(Thing): pass
+      class B(A): pass
+      class p(ObjectProperty): pass
+      class n(DataProperty): pass
+      class n2(n): pass
+      x = B()
+      y = Thing()
+      x.p  = [y]
+      x.n2 = [1]
+      
+    listened = []
+    def listener(o, p): listened.append((o, p))
+    owlready2.observe.start_observing(onto)
+    owlready2.observe.observe(x, listener)
+    with onto:
+      sync_reasoner_rl(onto, infer_data_property_values = True, debug = 0)
+    assert set(listened) == { (x.storid, rdf_type), (x.storid, n.storid) }
+    assert onto._has_obj_triple_spo(x.storid, rdf_type, A.storid)
+    assert x.n == [1]
+    
+  def test_reasoning_incremental_1(self):
+    from owlready2.reasoning import _extract_module
+    world = self.new_world()
+    onto  = world.get_ontology("http://test.org/test.owl")
+    
+    with onto:
+      class A(Thing): pass
+      class B(A): pass
+      class C(Thing): pass
+      class D(Thing): pass
+      class r(ObjectProperty): range = [D]
+      class E(Thing): equivalent_to = [A & r.some(D)]
+      class F(Thing): equivalent_to = [C & r.some(D)]
+      class G(Thing): pass
+      g = G()
+      AllDisjoint([A, C])
+      AllDisjoint([C, D, G])
+      
+    assert world._reasoning_changes is None
+    world._reasoning_changes = set()
+    with onto:
+      b = B()
+      d = D()
+      b.r = [d]
+    assert { b.storid, d.storid, B.storid, D.storid } <= world._reasoning_changes
+    
+    module = _extract_module(world, world._reasoning_changes)
+    assert { A.storid, B.storid, D.storid, E.storid, r.storid, b.storid, d.storid } <= module
+    assert not (module & { C.storid, F.storid, G.storid, g.storid })
+    
+    nt = "".join(world.graph._iter_ntriples_chunks(module = module))
+    assert "<%s> <http://www.w3.org/1999/02/22-rdf-syntax-ns#type> <http://www.w3.org/2002/07/owl#Class> ." % C.iri in nt
+    assert not ("<%s> <http://www.w3.org/2002/07/owl#disjointWith>" % C.iri) in nt
+    assert not g.iri in nt
+    
+    b.r = []
+    assert d.storid in world._reasoning_changes
+    
+    onto2 = world.get_ontology("http://test.org/test2.owl").load(fileobj = BytesIO(b"""<http://test.org/test2.owl> <http://www.w3.org/1999/02/22-rdf-syntax-ns#type> <http://www.w3.org/2002/07/owl#Ontology> ."""), format = "ntriples")
+    assert world._reasoning_changes is None
+    
+  def test_reasoning_incremental_2(self):
+    from owlready2.reasoning import _extract_module
+    world = self.new_world()
+    onto  = world.get_ontology("http://test.org/test.owl")
+    
+    with onto:
+      class X(Thing): pass
+      class Y(X): pass
+      class Z(Thing): pass
+      class p(ObjectProperty): pass
+      class q(p): pass
+      class A(Thing): pass
+      i = Thing()
+      j = X()
+      i.p = [j]
+      k = Thing()
+      l = Y()
+      k.q = [l]
+      z = Z()
+      
+    world._reasoning_changes = set()
+    A.equivalent_to.append(p.some(X))
+    
+    module = _extract_module(world, world._reasoning_changes)
+    assert { A.storid, p.storid, q.storid, X.storid, Y.storid, i.storid, j.storid, k.storid, l.storid } <= module
+    assert not (module & { Z.storid, z.storid })
+    
+  def test_reasoning_java_command_1(self):
+    import owlready2.reasoning
+    tmp_dir = tempfile.TemporaryDirectory()
+    tmp = tmp_dir.name
+    jar_dir = tempfile.TemporaryDirectory()
+    cp = os.path.join(jar_dir.name, "reasoner.jar")
+    open(cp, "w").close()
+    old_versions = dict(owlready2.reasoning._JAVA_VERSIONS)
+    old_cache    = owlready2.reasoning.JAVA_CLASS_CACHE
+    try:
+      owlready2.reasoning.JAVA_CLASS_CACHE = tmp
+      
+      owlready2.reasoning._JAVA_VERSIONS[owlready2.JAVA_EXE] = (11, "jvm11")
+      command = owlready2.reasoning._java_command(cp, "hermit")
+      assert command == [owlready2.JAVA_EXE, "-Xmx%sM" % owlready2.reasoning.JAVA_MEMORY, "-cp", cp]
+      
+      owlready2.reasoning._JAVA_VERSIONS[owlready2.JAVA_EXE] = (17, "jvm17")
+      archive  = os.path.join(tmp, "hermit-jvm17-%s.jsa" % owlready2.reasoning._get_classpath_id(cp))
+      command  = owlready2.reasoning._java_command(cp, "hermit")
+      command2 = owlready2.reasoning._java_command(cp, "hermit")
+      assert command[-2:] == ["-cp", cp]
+      tmp_args = [arg for arg in command + command2 if arg.startswith("-XX:ArchiveClassesAtExit=%s." % archive) and arg.endswith(".tmp")]
+      assert len(set(tmp_args)) == 2 # Each JVM writes its own archive
+      
+      script = "import sys; open(sys.argv[1].split('=', 1)[1], 'w').close(); sys.exit(int(sys.argv[2]))"
+      with owlready2.reasoning._ReasonerOutput([sys.executable, "-c", script, tmp_args[1], "1"], True, 0) as output: list(output)
+      assert os.listdir(tmp) == [] # Not installed if the JVM failed
+      with owlready2.reasoning._ReasonerOutput([sys.executable, "-c", script, tmp_args[0], "0"], True, 0) as output: list(output)
+      assert os.listdir(tmp) == [os.path.basename(archive)]
+      
+      command = owlready2.reasoning._java_command(cp, "hermit")
+      assert "-XX:SharedArchiveFile=%s" % archive in command
+      assert not [arg for arg in command if arg.startswith("-XX:ArchiveClassesAtExit=")]
+      
+      mtime = os.path.getmtime(cp) + 10 # Jar upgraded => new archive
+      os.utime(cp, (mtime, mtime))
+      command = owlready2.reasoning._java_command(cp, "hermit")
+      assert not [arg for arg in command if arg.startswith("-XX:SharedArchiveFile=")]
+      assert [arg for arg in command if arg.startswith("-XX:ArchiveClassesAtExit=%s" % os.path.join(tmp, "hermit-jvm17-"))]
+      
+      owlready2.reasoning._JAVA_VERSIONS[owlready2.JAVA_EXE] = (21, "jvm21")
+      command = owlready2.reasoning._java_command(cp, "pellet")
+      assert [arg for arg in command if arg.startswith("-XX:ArchiveClassesAtExit=%s" % os.path.join(tmp, "pellet-jvm21-"))]
+      
+      owlready2.reasoning.JAVA_CLASS_CACHE = False
+      command = owlready2.reasoning._java_command(cp, "pellet")
+      assert command == [owlready2.JAVA_EXE, "-Xmx%sM" % owlready2.reasoning.JAVA_MEMORY, "-cp", cp]
+    finally:
+      owlready2.reasoning._JAVA_VERSIONS.clear()
+      owlready2.reasoning._JAVA_VERSIONS.update(old_versions)
+      owlready2.reasoning.JAVA_CLASS_CACHE = old_cache
+      tmp_dir.cleanup()
+      jar_dir.cleanup()
+      
+  def test_reasoning_apply_1(self):
+    import owlready2.reasoning
+    world = self.new_world()
+    onto  = world.get_ontology("http://test.org/test.owl")
+    with onto:
+      class A(Thing): pass
+      class B(A): pass
+      class C(Thing): pass
+      class D(Thing): pass
+      class p(ObjectProperty): pass
+      class inv(ObjectProperty): inverse_property = p
+      class n(DataProperty): pass
+      a = A()
+      b = Thing()
+      a.p = [b]
+    onto2 = world.get_ontology("http://test.org/test2.owl")
+    
+    c_storid = world._abbreviate("http://test.org/test.owl#c")
+    new_parents = { B.storid : [A.storid, C.storid], c_storid : [B.storid], a.storid : [A.storid] }
+    new_equivs  = { C.storid : [D.storid], D.storid : [C.storid] }
+    entity_2_type = { B.storid : "class", C.storid : "class", D.storid : "class", c_storid : "individual", a.storid : "individual" }
+    owlready2.reasoning._apply_reasoning_results(world, onto2, False, new_parents, new_equivs, entity_2_type)
+    
+    assert set(onto2._get_obj_triples_s_po(B.storid)) == { (rdfs_subclassof, C.storid) }
+    assert set(onto2._get_obj_triples_s_po(C.storid)) == { (owl_equivalentclass, D.storid) }
+    assert set(onto2._get_obj_triples_s_po(D.storid)) == { (owl_equivalentclass, C.storid) }
+    assert set(onto2._get_obj_triples_s_po(c_storid)) == { (rdf_type, B.storid) }
+    assert not onto2._has_obj_triple_spo(a.storid)
+    assert set(B.is_a) == { A, C }
+    assert D in C.equivalent_to
+    assert not c_storid in world._entities
+    assert world["http://test.org/test.owl#c"].is_a == [B]
+    
+    c = world["http://test.org/test.owl#c"]
+    owlready2.reasoning._apply_inferred_obj_relations(world, onto2, False, [(a.storid, p, b.storid), (b.storid, inv, a.storid), (c.storid, p, b.storid)])
+    assert set(onto2._get_obj_triples_s_po(c.storid)) == { (rdf_type, B.storid), (p.storid, b.storid) }
+    assert not onto2._has_obj_triple_spo(a.storid)
+    assert not onto2._has_obj_triple_spo(b.storid)
+    assert set(b.inv) == { a, c }
+    
+    a.n = [1]
+    owlready2.reasoning._apply_inferred_data_relations(world, onto2, False, [(a.storid, n, 1, world._abbreviate("http://www.w3.org/2001/XMLSchema#integer")), (c.storid, n, 2, world._abbreviate("http://www.w3.org/2001/XMLSchema#integer"))])
+    assert not onto2._has_data_triple_spod(a.storid)
+    assert c.n == [2]
+    
+  def test_reasoning_apply_2(self):
+    import owlready2.reasoning, owlready2.observe
+    world = self.new_world()
+    onto  = world.get_ontology("http://test.org/test.owl")
+    with onto:
+      class A(Thing): pass
+      class p(ObjectProperty): pass
+      class inv(ObjectProperty): inverse_property = p
+      class n(DataProperty): pass
+      a = Thing()
+      b = Thing()
+      
+    listened = []
+    def listener(o, p): listened.append((o, p))
+    owlready2.observe.start_observing(onto)
+    owlready2.observe.observe(a, listener)
+    owlready2.observe.observe(b, listener)
+    
+    owlready2.reasoning._apply_reasoning_results(world, onto, False, { a.storid : [A.storid] }, {}, { a.storid : "individual" })
+    owlready2.reasoning._apply_inferred_obj_relations(world, onto, False, [(a.storid, p, b.storid)])
+    owlready2.reasoning._apply_inferred_data_relations(world, onto, False, [(a.storid, n, 1, world._abbreviate("http://www.w3.org/2001/XMLSchema#integer"))])
+    assert listened == [(a.storid, rdf_type), (a.storid, p.storid), (b.storid, inv.storid), (a.storid, n.storid)]
+    assert a.n == [1]
+    
+  def test_reasoning_apply_3(self):
+    import owlready2.reasoning
+    world = self.new_world()
+    onto  = world.get_ontology("http://test.org/test.owl")
+    with onto:
+      class n(DataProperty): pass
+      a = Thing()
+      a.n = [locstr("x", "en")]
+      
+    owlready2.reasoning._apply_inferred_data_relations(world, onto, False, [(a.storid, n, "x", "@en"), (a.storid, n, "x", "@fr"), (a.storid, n, "x", "@de")])
+    assert set(onto._get_data_triples_sp_od(a.storid, n.storid)) == { ("x", "@en"), ("x", "@fr"), ("x", "@de") }
+    
+  def test_reasoning_output_1(self):
+    import owlready2.reasoning
+    tmp_dir = tempfile.TemporaryDirectory()
+    tmp = tmp_dir.name
+    java = os.path.join(tmp, "java") # Fake Java, that writes the content of the files stdout and stderr
+    with open(java, "w") as f:
+      f.write("""#!%s
+import sys, os
+d = os.path.dirname(os.path.abspath(__file__))
+sys.stdout.write(open(os.path.join(d, "stdout")).read())
+sys.stderr.write(open(os.path.join(d, "stderr")).read())
+sys.exit(int(open(os.path.join(d, "returncode")).read()))
+""" % sys.executable)
+    os.chmod(java, 0o755)
+    def set_output(stdout, stderr = "", returncode = 0):
+      for name, content in [("stdout", stdout), ("stderr", stderr), ("returncode", str(returncode))]:
+        with open(os.path.join(tmp, name), "w") as f: f.write(content)
+        
+    old_java = owlready2.JAVA_EXE
+    try:
+      owlready2.JAVA_EXE = java
+      owlready2.reasoning._JAVA_VERSIONS[java] = (11, "fake")
+      
+      world = self.new_world()
+      onto  = world.get_ontology("http://test.org/test.owl")
+      with onto:
+        class A(Thing): pass
+        class B(Thing): pass
+        class C(Thing): pass
+        class D(Thing): pass
+        class p(ObjectProperty): pass
+        class n(DataProperty): pass
+        x = C("x")
+        y = Thing("y")
+        
+      set_output("""
+SubClassOf( <http://test.org/test.owl#C> <http://test.org/test.owl#B> )
+Type( <http://test.org/test.owl#x> <http://test.org/test.owl#C> )
+Type( <http://test.org/test.owl#x> <http://test.org/test.owl#A> )
+EquivalentClasses( <http://test.org/test.owl#A> <http://test.org/test.owl#D> )
+<http://test.org/test.owl#p> (known instances: (<http://test.org/test.owl#x>, <http://test.org/test.owl#y>)(<http://test.org/test.owl#y>, <http://test.org/test.owl#x>) | possible instances: )
+""", "WARNING: some log\n")
+      sync_reasoner_hermit(world, infer_property_values = True, debug = 0)
+      assert C.is_a == [B]
+      assert set(x.is_a) == { C, A }
+      assert D in A.equivalent_to
+      assert x.p == [y]
+      assert y.p == [x]
+      
+      set_output("Inconsistent ontology\n", returncode = 1)
+      with self.assertRaises(OwlReadyInconsistentOntologyError): sync_reasoner_hermit(world, debug = 0)
+      
+      set_output("", "Exception in thread main: boom\n", returncode = 1)
+      with self.assertRaises(OwlReadyJavaError) as cm: sync_reasoner_hermit(world, debug = 0)
+      assert "boom" in str(cm.exception)
+      
+      world = self.new_world()
+      onto  = world.get_ontology("http://test.org/test.owl")
+      with onto:
+        class A(Thing): pass
+        class C(Thing): pass
+        class p(ObjectProperty): pass
+        class n(DataProperty): pass
+        x = Thing("x")
+        y = Thing("y")
+        
+      set_output("""http://www.w3.org/2002/07/owl#Thing
+ http://test.org/test.owl#A
+  http://test.org/test.owl#C - (http://test.org/test.owl#x)
+PROPINST: http://test.org/test.owl#x http://test.org/test.owl#p http://test.org/test.owl#y
+DATAPROPVAL: http://test.org/test.owl#x http://test.org/test.owl#n literal(5,(),http://www.w3.org/2001/XMLSchema#integer)
+""")
+      sync_reasoner_pellet(world, infer_property_values = True, infer_data_property_values = True, debug = 0)
+      assert C.is_a == [A]
+      assert x.is_a == [C]
+      assert x.p == [y]
+      assert x.n == [5]
+      
+      set_output("", "ERROR: Ontology is inconsistent\n", returncode = 1)
+      with self.assertRaises(OwlReadyInconsistentOntologyError): sync_reasoner_pellet(world, debug = 0)
+      
+    finally:
+      owlready2.JAVA_EXE = old_java
+      owlready2.reasoning._JAVA_VERSIONS.pop(java, None)
+      tmp_dir.cleanup()
+      
   def test_pellet_reasoning_1(self):
     world = self.new_world()
     onto  = world.get_ontology("test_rule.owl").load()
@@ -4964,6 +5886,112 @@ multiple lines with " and ’ and \ and & and < and > and é."""
     # Verify that Cython PYX version is used
     import owlready2_optimized
     
+  def test_format_28(self):
+    import gzip, bz2, owlready2.driver
+    world = self.new_world()
+    onto  = world.get_ontology("http://www.semanticweb.org/jiba/ontologies/2017/0/test").load()
+    with onto:
+      class C(Thing): pass
+      C("c1", label = ['with " and \\ and\nnewline', locstr("fr", "fr")], comment = [1.0 / 3, 12, 1e20, datetime.date(2020, 1, 2)])
+      
+    for format in ["ntriples", "nquads"]:
+      for graph in [world.graph, onto.graph]:
+        f1 = BytesIO()
+        graph.save(f1, format)
+        f2 = BytesIO()
+        owlready2.driver._write_chunks(f2, owlready2.driver._iter_ntriples_chunks(graph, format == "nquads"))
+        assert f1.getvalue() == f2.getvalue()
+        
+    f1 = BytesIO()
+    onto.save(f1, format = "ntriples")
+    f2 = BytesIO()
+    onto.save(f2, format = "ntriples", compression = "gzip", threads = 2)
+    assert gzip.decompress(f2.getvalue()) == f1.getvalue()
+    f3 = BytesIO()
+    world.save(f3, format = "nquads", compression = "bz2")
+    assert bz2.decompress(f3.getvalue()).count(b"\n") == len(world.graph)
+    with self.assertRaises(ValueError): onto.save(BytesIO(), format = "rdfxml", compression = "gzip")
+    
+  def test_format_29(self):
+    import owlready2.driver
+    world = self.new_world()
+    onto  = world.get_ontology("http://www.semanticweb.org/jiba/ontologies/2017/0/test").load()
+    temp_dir = tempfile.TemporaryDirectory()
+    filename = os.path.join(temp_dir.name, "test.nt")
+    onto.save(filename, format = "ntriples")
+    
+    chunks = owlready2.driver._split_ntriples(filename, 7)
+    assert len(chunks) == 7
+    parts  = [owlready2.driver._parse_ntriples_chunk(*chunk) for chunk in chunks]
+    assert sum(len(objs) for part in parts for objs in part[1]) == len(list(onto.graph._get_obj_triples_spo_spo()))
+    
+    def load(parallel):
+      world = self.new_world()
+      onto  = world.get_ontology("http://www.semanticweb.org/jiba/ontologies/2017/0/test")
+      with open(filename, "rb") as f: onto.graph.parse(f, parallel = parallel)
+      onto.load()
+      return world, onto
+    world1, onto1 = load(0)
+    world2, onto2 = load(3)
+    assert len(world2.graph) == len(world1.graph)
+    assert onto2.Pizza.is_a.__repr__() == onto1.Pizza.is_a.__repr__()
+    assert onto2.VegetarianPizza.equivalent_to.__repr__() == onto1.VegetarianPizza.equivalent_to.__repr__()
+    assert onto2.ma_pizza.price == onto1.ma_pizza.price
+    
+    saved = owlready2.driver._NTRIPLES_PARALLEL_CHUNK
+    owlready2.driver._NTRIPLES_PARALLEL_CHUNK = 1000
+    try:
+      world3 = self.new_world()
+      onto3  = world3.get_ontology("file://%s" % filename).load(parallel = 2)
+    finally:
+      owlready2.driver._NTRIPLES_PARALLEL_CHUNK = saved
+    assert not world3._preparsed
+    assert len(world3.graph) == len(world1.graph)
+    assert onto3.VegetarianPizza.equivalent_to.__repr__() == onto1.VegetarianPizza.equivalent_to.__repr__()
+    temp_dir.cleanup()
+    
+  def test_format_30(self):
+    import gzip, bz2, lzma, owlready2.driver
+    world = self.new_world()
+    onto  = world.get_ontology("http://www.semanticweb.org/jiba/ontologies/2017/0/test").load()
+    temp_dir = tempfile.TemporaryDirectory()
+    
+    for format in ["rdfxml", "ntriples"]:
+      f = BytesIO()
+      onto.save(f, format = format)
+      for ext, compress in [(".gz", gzip.compress), (".bz2", bz2.compress), (".xz", lzma.compress)]:
+        data = compress(f.getvalue())
+        
+        world2 = self.new_world()
+        onto2  = world2.get_ontology("http://www.semanticweb.org/jiba/ontologies/2017/0/test").load(fileobj = BytesIO(data))
+        assert len(world2.graph) == len(world.graph)
+        
+        world2 = self.new_world()
+        unseekable = owlready2.driver._Unseekable(BytesIO(data), None, None)
+        onto2  = world2.get_ontology("http://www.semanticweb.org/jiba/ontologies/2017/0/test").load(fileobj = BufferedReader(unseekable))
+        assert len(world2.graph) == len(world.graph)
+        
+        world2 = self.new_world() # As returned by urllib.request.urlopen(), with an URL but no file name
+        response = owlready2.driver._Unseekable(BytesIO(data), None, "http://test.org/test_%s.owl%s" % (format, ext))
+        onto2  = world2.get_ontology("http://www.semanticweb.org/jiba/ontologies/2017/0/test").load(fileobj = BufferedReader(response))
+        assert len(world2.graph) == len(world.graph)
+        
+        filename = os.path.join(temp_dir.name, "test_%s.owl%s" % (format, ext))
+        with open(filename, "wb") as fileobj: fileobj.write(data)
+        world2 = self.new_world()
+        onto2  = world2.get_ontology("file://%s" % filename).load()
+        assert len(world2.graph) == len(world.graph)
+        assert onto2.ma_pizza.price == onto.ma_pizza.price
+        
+    onto_path.insert(0, temp_dir.name)
+    try:
+      world2 = self.new_world()
+      onto2  = world2.get_ontology("http://test.org/test_ntriples.owl").load()
+      assert len(world2.graph) == len(world.graph)
+    finally:
+      onto_path.remove(temp_dir.name)
+    temp_dir.cleanup()
+    
     
   def test_search_1(self):
     world = self.new_world()
@@ -5336,12 +6364,191 @@ multiple lines with " and ’ and \ and & and < and > and é."""
     assert len(r) == 8
     
     r = onto.search(type = onto.search(iri = "*C") | onto.search(iri = "*D"), p = "*")
-    assert r == [c2, c3, d4]
+    assert set(r) == { c2, c3, d4 }
     
     r = onto.search(is_a = onto.search(iri = "*C") | onto.search(iri = "*D"), p = "*")
-    assert r == [c2, c3, d4]
+    assert set(r) == { c2, c3, d4 }
+
+  def test_search_19(self):
+    world = self.new_world()
+    onto = world.get_ontology("http://test.org/test.owl")
+    with onto:
+      class C(Thing): pass
+      class D(C): pass
+      for i in range(25): C("c%s" % i, label = ["label %s" % i])
+      for i in range(10): D("d%s" % i, label = ["label d%s" % i])
+
+    chunks = list(world.search(label = "label *").iter_chunks(10))
+    assert [len(chunk) for chunk in chunks] == [10, 10, 10, 5]
+    assert [x for chunk in chunks for x in chunk] == list(world.search(label = "label *"))
+
+    chunks = list((world.search(type = C) & world.search(label = "label 1*")).iter_chunks(4))
+    assert [len(chunk) for chunk in chunks] == [4, 4, 3]
+    assert set(x for chunk in chunks for x in chunk) == { onto.c1 } | { onto["c1%s" % i] for i in range(10) }
+
+    world.full_text_search_properties.append(label)
+    chunks = list(world.search(label = FTS("d*"), _bm25 = True).iter_chunks(3))
+    assert [len(chunk) for chunk in chunks] == [3, 3, 3, 1]
+
+  def test_search_20(self):
+    world = self.new_world()
+    onto = world.get_ontology("http://test.org/test.owl")
+    with onto:
+      class C(Thing): pass
+      class D(C): pass
+      class E(Thing): pass
+      class p(Thing >> Thing): pass
+      class v(Thing >> int, FunctionalProperty): pass
+      e = E("e")
+      for i in range(30): C("c%s" % i, v = i % 3)
+      for i in range(10): D("d%s" % i, v = i % 3, p = [e] if i % 2 else [])
+      
+    r = world.search(type = C) & world.search(v = 1)
+    assert set(r) == { onto["c%s" % i] for i in range(1, 30, 3) } | { onto["d%s" % i] for i in range(1, 10, 3) }
+    assert len(r) == 13
+    
+    r = world.search(v = 1) & world.search(type = C) & world.search(p = e)
+    assert len(r) == 2
+    assert [len(chunk) for chunk in r.iter_chunks(1)] == [1, 1]
+    assert set(r) == { onto.d1, onto.d7 }
+    
+    with world.bulk_load(): # Without indexes
+      assert [len(chunk) for chunk in world.search(type = C, v = 1).iter_chunks(3)] == [3, 3, 3, 3, 1]
+      assert [len(chunk) for chunk in (world.search(type = C) & world.search(v = 1)).iter_chunks(5)] == [5, 5, 3]
+    
+    r = world.search(type = D) & (world.search(v = 0) | world.search(v = 2))
+    assert set(r) == { onto["d%s" % i] for i in range(10) if i % 3 != 1 }
+    
+    r = world.search(type = C, v = 1) & world.search(p = world.search(iri = "*e"))
+    assert set(r) == { onto.d1, onto.d7 }
+    
+    r = world.search(v = 1) & world.search(type = D, p = None)
+    assert set(r) == { onto.d4 }
+    
+    assert list(world.search(type = D) & world.search(type = E)) == []
+    
+    r = world.search(type = C) & world.search(v = 1)
+    nb = 0
+    execute = world.graph.execute
+    def counting_execute(sql, *args):
+      nonlocal nb
+      if sql.startswith("SELECT COUNT() FROM"): nb += 1
+      return execute(sql, *args)
+    world.graph.execute = counting_execute
+    try:
+      len(r); r.first(); list(r); len(r)
+    finally:
+      world.graph.execute = execute
+    assert nb == 2 # The sub-searches are estimated only once
+    assert r.ordered_searches[0] is r.searches[1]
     
+    r = world.search(type = C) & world.search(v = 1)
+    r.sql_request()
+    assert r.ordered_searches[0] is r.searches[1]
+    with onto:
+      for i in range(100): E(v = 1)
+    r.sql_request()
+    assert r.ordered_searches[0] is r.searches[0] # Reordered after the modification
+    assert len(r) == 13
+
+  def test_search_21(self):
+    world = self.new_world()
+    onto = world.get_ontology("http://test.org/test.owl")
+    with onto:
+      class C(Thing): pass
+      class v(Thing >> int, FunctionalProperty): pass
+      class p(Thing >> Thing): pass
+      class i(Thing >> Thing): inverse = p
+      class q(Thing >> Thing): pass
+      class j(Thing >> Thing): inverse = q
+      for n in range(50): C("c%s" % n, label = ["c %s" % n], v = n)
+      onto.c1.p = [onto.c2]
+      onto.c1.q = [onto.c3]
+      onto.c4.i = [onto.c5]
+      onto.c5.q = [onto.c3]
+      onto.c3.p = [onto.c4]
+      onto.c3.q = [onto.c1]
+      
+    nb = 0
+    execute = world.graph.execute
+    def counting_execute(sql, *args):
+      nonlocal nb
+      if sql.startswith("SELECT COUNT() FROM"): nb += 1
+      return execute(sql, *args)
+    world.graph.execute = counting_execute
+    try:
+      r = world.search(label = "c *", v = 3)
+      assert list(r) == [onto.c3]
+      assert nb == 0 # No statistics => lookups first, without counting
+      assert r.plan[0][0] == v.storid
+      
+      world.analyze()
+      r = world.search(type = C, v = 3)
+      assert list(r) == [onto.c3]
+      assert nb == 0 # Estimates from the statistics
+      assert r.plan[0][0] == v.storid
+      assert r.plan[0][3] == 1
+      
+      world.graph.predicate_values = None # As with statistics from an older version
+      assert list(world.search(type = C, v = 3)) == [onto.c3]
+      assert nb == 2
+      assert list(world.search(type = C, v = 3)) == [onto.c3]
+      assert nb == 2 # Counts are cached
+      onto.c4.v = 60
+      assert list(world.search(type = C, v = 3)) == [onto.c3]
+      assert nb == 4 # Cache emptied by the modification
+    finally:
+      world.graph.execute = execute
+    world.analyze()
+    assert world.graph.get_predicate_stats()[v.storid] == 50
+    
+    r = world.search(label = "c *", v = 3)
+    assert r.plan[0][0] == v.storid
+    assert "SQLite plan" in r.explain()
+    assert list(r) == [onto.c3]
+    
+    r = onto.search(p = "*", q = onto.c3, type = C)
+    assert set(r) == { onto.c1, onto.c5 }
     
+    r = onto.search(p = "*", q = "*", j = "*")
+    assert not "UNION" in r.sql_request()[0]
+    assert set(r) == { onto.c1, onto.c3 }
+
+  def test_search_22(self):
+    world = self.new_world()
+    onto = world.get_ontology("http://test.org/test.owl")
+    with onto:
+      class C(Thing): pass
+      class D(C): pass
+      class p(Thing >> Thing): pass
+      class v(Thing >> int, FunctionalProperty): pass
+      for n in range(10): D("d%s" % n, label = ["d %s" % n], v = n % 3)
+      onto.d1.p = [onto.d2]
+      onto.d3.p = [onto.d2]
+      onto.d4.p = [onto.d5]
+      
+    s = world.prepare_search(type = C, label = Param("label"))
+    assert s(label = "d 4") == [onto.d4]
+    assert s(label = "d 7") == [onto.d7]
+    assert s(label = "x") == []
+    assert s.first(label = "d 8") is onto.d8
+    
+    s = world.prepare_search(type = C, p = Param("p"), v = Param("v"))
+    assert set(s(p = onto.d2, v = 1)) == { onto.d1 }
+    assert set(s(p = onto.d2, v = 0)) == { onto.d3 }
+    assert set(s(p = onto.d5, v = 1)) == { onto.d4 }
+    
+    s = world.prepare_search(iri = Param("iri"))
+    assert s(iri = "http://test.org/test.owl#d6") == [onto.d6]
+    
+    s = world.prepare_search(subclass_of = C, iri = Param("iri"))
+    world.closure_indexed = True
+    assert s(iri = "http://test.org/test.owl#D") == [D]
+    
+    with self.assertRaises(ValueError): s(x = 1)
+    with self.assertRaises(ValueError): world.prepare_search(type = Param("type"))
+
+
   def test_rdflib_1(self):
     world = self.new_world()
     n = world.get_ontology("http://www.semanticweb.org/jiba/ontologies/2017/0/test").load()
@@ -5611,7 +6818,7 @@ multiple lines with " and ’ and \ and & and < and > and é."""
     p2.price
     p2.is_a
     p2.has_topping
-    assert p2 in owlready2.namespace._cache
+    assert p2 in world.entity_cache
     
     with o:
       r = g.update("""
@@ -5925,8 +7132,7 @@ WHERE {
     self.assert_triple(c1.storid, p.storid, "0e", hex_storid, world)
 
     c1 = C = None
-    import owlready2.namespace
-    owlready2.namespace._cache = [None] * 1000
+    world.entity_cache.clear()
     import gc
     gc.collect(); gc.collect(); gc.collect()
     
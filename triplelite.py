@@ -17,14 +17,15 @@
 # You should have received a copy of the GNU Lesser General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
-import sys, os, os.path, sqlite3, time, re, threading
+import sys, os, os.path, sqlite3, time, re, threading, queue, urllib.request, struct, json
+from array import array
 from collections import defaultdict
-from itertools import chain
+from itertools import chain, count
 
 import owlready2
 from owlready2.base import *
 from owlready2.driver import BaseMainGraph, BaseSubGraph
-from owlready2.driver import _guess_format, _save
+from owlready2.driver import _guess_format, _save, _NTRIPLES_CHUNK
 from owlready2.util import FTS, _LazyListMixin
 from owlready2.base import _universal_abbrev_2_iri
 
@@ -60,69 +61,381 @@ def all_combinations(l):
 #       data = next(data_cursor, None)
       
 
+class _PooledCursor(object):
+  """A cursor on a read-only connection of the pool. The rows are fetched lazily, and the connection is given back
+to the pool once all rows have been fetched, or when the cursor is closed or freed."""
+  __slots__ = ["pool", "db", "cursor"]
+  def __init__(self, pool, db, cursor):
+    self.pool   = pool
+    self.db     = db
+    self.cursor = cursor
+    
+  def close(self):
+    if not self.db is None:
+      self.cursor.close()
+      self.pool.put(self.db)
+      self.db = None
+      
+  def fetchone(self):
+    if self.db is None: return None
+    row = self.cursor.fetchone()
+    if row is None: self.close()
+    return row
+  
+  def fetchall(self):
+    if self.db is None: return []
+    rows = self.cursor.fetchall()
+    self.close()
+    return rows
+  
+  def fetchmany(self, size = 1):
+    if self.db is None: return []
+    rows = self.cursor.fetchmany(size)
+    if len(rows) < size: self.close()
+    return rows
+  
+  def __iter__(self): return self
+  
+  def __next__(self):
+    row = self.fetchone()
+    if row is None: raise StopIteration
+    return row
+  
+  def __del__(self): self.close()
+  
+  
+class _ProfiledCursor(object):
+  """Wraps a cursor and measures the time spent in the request and in fetching its rows (SQLite3 runs the request
+while fetching). The rows are fetched lazily, and the time is recorded once all rows have been fetched, or when the
+cursor is closed or freed."""
+  __slots__ = ["profiler", "cursor", "sql", "accessor", "t"]
+  def __init__(self, profiler, cursor, sql, accessor, t):
+    self.profiler = profiler
+    self.cursor   = cursor
+    self.sql      = sql
+    self.accessor = accessor
+    self.t        = t
+    
+  def _record(self):
+    if not self.profiler is None:
+      self.profiler.record(self.sql, self.accessor, self.t)
+      self.profiler = None
+      
+  def close(self):
+    self._record()
+    self.cursor.close()
+    
+  def fetchone(self):
+    t0  = time.perf_counter_ns()
+    row = self.cursor.fetchone()
+    self.t += time.perf_counter_ns() - t0
+    if row is None: self._record()
+    return row
+  
+  def fetchall(self):
+    t0   = time.perf_counter_ns()
+    rows = self.cursor.fetchall()
+    self.t += time.perf_counter_ns() - t0
+    self._record()
+    return rows
+  
+  def fetchmany(self, size = 1):
+    t0   = time.perf_counter_ns()
+    rows = self.cursor.fetchmany(size)
+    self.t += time.perf_counter_ns() - t0
+    if len(rows) < size: self._record()
+    return rows
+  
+  def __iter__(self): return self
+  
+  def __next__(self):
+    row = self.fetchone()
+    if row is None: raise StopIteration
+    return row
+  
+  def __getattr__(self, attr): return getattr(self.cursor, attr)
+  
+  def __del__(self): self._record()
+  
+  
+class QueryProfiler(object):
+  """Measures the time spent in SQL requests, grouped by SQL template and by the accessor (the function or method)
+that performed the request. sampling is the proportion of the requests that are measured (e.g. 0.01 for 1%)."""
+  def __init__(self, sampling = 1.0):
+    self.sampling  = sampling
+    self.counter   = count(1) # next() is atomic, so it can be shared by several threads
+    self.lock      = threading.Lock()
+    self.templates = {}
+    self.reset()
+    
+  def reset(self):
+    self.nb        = 0
+    self.requests  = {} # template => [nb, total time, min time, max time, histogram]
+    self.accessors = {} # accessor => [nb, total time]
+    
+  def wrap(self, execute):
+    perf_counter_ns = time.perf_counter_ns
+    _getframe       = sys._getframe
+    def profiled_execute(sql, args = ()):
+      if self.sampling < 1.0: # Measures one request every 1 / sampling requests
+        n = next(self.counter)
+        if int(n * self.sampling) == int((n - 1) * self.sampling): return execute(sql, args)
+      t0  = perf_counter_ns()
+      cur = execute(sql, args)
+      t   = perf_counter_ns() - t0
+      accessor = self._get_accessor(_getframe(1))
+      if sql.lstrip().startswith(("SELECT", "WITH")): return _ProfiledCursor(self, cur, sql, accessor, t)
+      self.record(sql, accessor, t)
+      return cur
+    return profiled_execute
+  
+  def _get_accessor(self, frame):
+    # The accessor is the first caller outside the quadstore (e.g. World._load_by_storid), or "search" for searches
+    while frame.f_code.co_filename == __file__:
+      if isinstance(frame.f_locals.get("self"), (_SearchMixin, _PreparedSearch)): return "search"
+      if frame.f_back is None: break
+      frame = frame.f_back
+    return getattr(frame.f_code, "co_qualname", frame.f_code.co_name)
+  
+  def _get_template(self, sql):
+    template = self.templates.get(sql)
+    if template is None:
+      if len(self.templates) > 10000: self.templates.clear()
+      template = " ".join(sql.split())
+      template = _PROFILER_NUMBERS.sub("?", template)
+      template = _PROFILER_LISTS.sub("?,...", template)
+      self.templates[sql] = template
+    return template
+  
+  def record(self, sql, accessor, t):
+    template = self._get_template(sql)
+    with self.lock:
+      self.nb += 1
+      stats = self.requests.get(template)
+      if stats is None: stats = self.requests[template] = [0, 0, t, t, [0] * 40]
+      stats[0] += 1
+      stats[1] += t
+      if   t < stats[2]: stats[2] = t
+      elif t > stats[3]: stats[3] = t
+      stats[4][min(t.bit_length(), 39)] += 1
+      
+      stats = self.accessors.get(accessor)
+      if stats is None: stats = self.accessors[accessor] = [0, 0]
+      stats[0] += 1
+      stats[1] += t
+      
+  def get_stats(self):
+    """Returns the statistics as a dict (times are in seconds; histogram buckets are keyed by their upper bound)."""
+    with self.lock:
+      requests = [{
+        "sql"       : template,
+        "nb"        : nb,
+        "total"     : total / 1e9,
+        "mean"      : total / nb / 1e9,
+        "min"       : min_t / 1e9,
+        "max"       : max_t / 1e9,
+        "histogram" : { "%.3g" % (2 ** i / 1e9) : n for (i, n) in enumerate(histogram) if n },
+      } for (template, (nb, total, min_t, max_t, histogram)) in self.requests.items()]
+      accessors = [{ "accessor" : accessor, "nb" : nb, "total" : total / 1e9, "mean" : total / nb / 1e9 }
+                   for (accessor, (nb, total)) in self.accessors.items()]
+      nb = self.nb
+    requests .sort(key = lambda stats: -stats["total"])
+    accessors.sort(key = lambda stats: -stats["total"])
+    return { "sampling" : self.sampling, "nb" : nb, "total" : sum(stats["total"] for stats in requests), "requests" : requests, "accessors" : accessors }
+  
+  def to_json(self, **kargs): return json.dumps(self.get_stats(), **kargs)
+  
+  def show(self, file = None, nb = 20):
+    file  = file or sys.stderr
+    stats = self.get_stats()
+    print("%s requests measured (sampling %s), total %.6f s" % (stats["nb"], stats["sampling"], stats["total"]), file = file)
+    print("\nAccessors:", file = file)
+    for accessor in stats["accessors"][:nb]:
+      print("  %8s %12.6f s %12.3f µs  %s" % (accessor["nb"], accessor["total"], accessor["mean"] * 1e6, accessor["accessor"]), file = file)
+    print("\nRequests:", file = file)
+    for request in stats["requests"][:nb]:
+      print("  %8s %12.6f s %12.3f µs  %s" % (request["nb"], request["total"], request["mean"] * 1e6, request["sql"]), file = file)
+      
+  def __repr__(self): return "<QueryProfiler, %s requests measured>" % self.nb
+  
+_PROFILER_NUMBERS = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?\b")
+_PROFILER_LISTS   = re.compile(r"\?(?:\s*,\s*\?)+")
+
+_CLOSURE_ADD_EDGE = """INSERT INTO closure (p, a, d, depth)
+SELECT %(p)s, anc.a, des.d, anc.depth + des.depth + 1 FROM
+  (SELECT a, depth FROM closure WHERE p=%(p)s AND d=%(o)s UNION ALL SELECT %(o)s, 0) anc,
+  (SELECT d, depth FROM closure WHERE p=%(p)s AND a=%(s)s UNION ALL SELECT %(s)s, 0) des
+WHERE 1 ON CONFLICT (p, a, d) DO UPDATE SET depth=MIN(depth, excluded.depth)"""
+_CLOSURE_ADD_EDGE_PARAMS = { "p" : "?1", "s" : "?2", "o" : "?3" }
+
+# Snapshot file: magic, version (uint32), JSON header, then blocks of rows, each starting with a tag (b"R" resources,
+# b"O" objs, b"D" datas, b"E" end) and a number of rows (uint32), followed by the segments of the block's columns.
+# Each segment is a byte length (uint64) and the data. All numbers are little-endian.
+_SNAPSHOT_MAGIC   = b"OWLREADY2-SNAPSHOT\n"
+_SNAPSHOT_VERSION = 2
+_SNAPSHOT_BLOCK   = 65536 # Rows per block
+_SNAPSHOT_BIG_ENDIAN = sys.byteorder == "big"
+
+def _snapshot_read(f, size):
+  b = f.read(size)
+  if len(b) != size: raise ValueError("Truncated Owlready2 snapshot!")
+  return b
+
+def _snapshot_write_segments(f, segments):
+  for segment in segments:
+    f.write(struct.pack("<Q", len(segment)))
+    f.write(segment)
+    
+def _snapshot_read_segments(f, nb):
+  return [_snapshot_read(f, struct.unpack("<Q", _snapshot_read(f, 8))[0]) for i in range(nb)]
+
+def _snapshot_pack_numbers(l, typecode = "q"):
+  l = array(typecode, l)
+  if _SNAPSHOT_BIG_ENDIAN: l.byteswap()
+  return l.tobytes()
+
+def _snapshot_unpack_numbers(b, typecode = "q"):
+  l = array(typecode)
+  l.frombytes(b)
+  if _SNAPSHOT_BIG_ENDIAN: l.byteswap()
+  return l
+
+def _snapshot_pack_strs(strs):
+  strs = [x.encode("utf8") for x in strs]
+  return [_snapshot_pack_numbers([len(x) for x in strs], "Q"), b"".join(strs)]
+
+def _snapshot_unpack_strs(lengths, data):
+  r = []
+  i = 0
+  for length in _snapshot_unpack_numbers(lengths, "Q"):
+    r.append(data[i : i + length].decode("utf8"))
+    i += length
+  return r
+
+def _snapshot_pack_values(values):
+  # Values of any type (e.g. datas.o and datas.d), as 5 segments: kinds, ints, floats, lengths and data of str and bytes.
+  kinds  = bytearray()
+  ints   = []
+  floats = []
+  strs   = []
+  for value in values:
+    if   value is None:            kinds.append(0)
+    elif isinstance(value, int):   kinds.append(1); ints  .append(value)
+    elif isinstance(value, float): kinds.append(2); floats.append(value)
+    elif isinstance(value, str):   kinds.append(3); strs  .append(value.encode("utf8"))
+    else:                          kinds.append(4); strs  .append(bytes(value))
+  return [bytes(kinds), _snapshot_pack_numbers(ints), _snapshot_pack_numbers(floats, "d"), _snapshot_pack_numbers([len(x) for x in strs], "Q"), b"".join(strs)]
+
+def _snapshot_unpack_values(kinds, ints, floats, lengths, data):
+  ints    = iter(_snapshot_unpack_numbers(ints))
+  floats  = iter(_snapshot_unpack_numbers(floats, "d"))
+  lengths = iter(_snapshot_unpack_numbers(lengths, "Q"))
+  r = []
+  i = 0
+  for kind in kinds:
+    if   kind == 0: r.append(None)
+    elif kind == 1: r.append(next(ints))
+    elif kind == 2: r.append(next(floats))
+    else:
+      length = next(lengths)
+      if kind == 3: r.append(data[i : i + length].decode("utf8"))
+      else:         r.append(data[i : i + length])
+      i += length
+  return r
+
+_BACKUP_PAGES = 16384
+
+_INDEXED_BY = re.compile(" INDEXED BY index_[a-z_]+")
+
+_PRAGMA_PROFILES = {
+  "read_heavy" : { "cache_size" : -262144, "mmap_size" : 1 << 30, "temp_store" : "MEMORY" }, # 256 Mb of cache, 1 Gb of mmap
+  "bulk_load"  : { "cache_size" : -524288, "temp_store" : "MEMORY", "synchronous" : "OFF", "journal_mode" : "MEMORY" },
+  "durable"    : { "synchronous" : "FULL" },
+}
+_REPORTED_PRAGMAS = ["page_size", "cache_size", "mmap_size", "temp_store", "synchronous", "journal_mode", "locking_mode"]
+_DATABASE_PRAGMAS = { "page_size", "journal_mode" } # Not applied to the read-only connections
+
+def _get_pragmas(profile, pragmas):
+  if profile:
+    if not profile in _PRAGMA_PROFILES: raise ValueError("Unknown pragma profile '%s'! (available profiles: %s)" % (profile, ", ".join(_PRAGMA_PROFILES)))
+    pragmas = { **_PRAGMA_PROFILES[profile], **(pragmas or {}) }
+  else:
+    pragmas = dict(pragmas or {})
+  for pragma, value in pragmas.items():
+    if not re.fullmatch("[a-z_]+", pragma): raise ValueError("Invalid pragma name '%s'!" % pragma)
+    if not (isinstance(value, int) or re.fullmatch("[A-Za-z0-9_-]+", str(value))): raise ValueError("Invalid value '%s' for pragma '%s'!" % (value, pragma))
+  if "page_size" in pragmas: # Must be set before creating the tables
+    pragmas = { "page_size" : pragmas.pop("page_size"), **pragmas }
+  return pragmas
+
+def _apply_pragmas(db, pragmas, read_only = False):
+  for pragma, value in pragmas.items():
+    if read_only and (pragma in _DATABASE_PRAGMAS): continue
+    db.execute("""PRAGMA %s = %s""" % (pragma, value))
+
 class Graph(BaseMainGraph):
   _SUPPORT_CLONING = True
-  def __init__(self, filename, clone = None, exclusive = True, sqlite_tmp_dir = "", world = None, profiling = False):
+  def __init__(self, filename, clone = None, exclusive = True, sqlite_tmp_dir = "", world = None, profiling = False, concurrent_readers = 0, snapshot = None, in_memory = False, backup_progress = None, pragmas = None, profile = None):
     exists        = os.path.exists(filename) and os.path.getsize(filename) # BEFORE creating db!
     initialize_db = (clone is None) and ((filename == ":memory:") or (not exists))
     
     if clone and (filename != ":memory:"):
       if exists: raise ValueError("Cannot save existent quadstore in '%s': File already exists! Use a new filename for saving quadstore or, for opening an already existent quadstore, do not create any triple before calling set_backend()." % filename)
+    if snapshot and (filename != ":memory:"):
+      if exists: raise ValueError("Cannot load snapshot in '%s': File already exists!" % filename)
       
+    if concurrent_readers and ((filename == ":memory:") or in_memory):
+      raise ValueError("Concurrent readers require a quadstore stored in a file!")
+    pragmas = _get_pragmas(profile, pragmas)
+    if concurrent_readers and (str(pragmas.get("journal_mode", "WAL")).upper() != "WAL"):
+      raise ValueError("Concurrent readers require the WAL journal mode!")
+    
     if sqlite_tmp_dir: os.environ["SQLITE_TMPDIR"] = sqlite_tmp_dir
     
-    if exclusive:
+    self.backup_progress  = backup_progress
+    self.in_memory        = in_memory and (filename != ":memory:")
+    if self.in_memory:
+      self.db = sqlite3.connect(":memory:", isolation_level = "EXCLUSIVE", check_same_thread = False)
+      if exists:
+        disk_db = sqlite3.connect(filename)
+        try:     disk_db.backup(self.db, pages = _BACKUP_PAGES, progress = backup_progress)
+        finally: disk_db.close()
+    elif exclusive and not concurrent_readers:
       self.db = sqlite3.connect(filename, isolation_level = "EXCLUSIVE", check_same_thread = False)
       self.db.execute("""PRAGMA locking_mode = EXCLUSIVE""")
-    else:
+    else: # Readers cannot access the database if the writer holds an exclusive lock
       self.db = sqlite3.connect(filename, check_same_thread = False)
       self.db.execute("""PRAGMA locking_mode = NORMAL""")
+      
+    if concurrent_readers:
+      self.db.execute("""PRAGMA journal_mode = WAL""")
+      
+    _apply_pragmas(self.db, pragmas)
     
+    if clone:
+      clone.commit()
+      clone.db.backup(self.db, pages = _BACKUP_PAGES, progress = backup_progress)
+      
     if sqlite_tmp_dir:
       try: self.db.execute("""PRAGMA temp_store_directory = '%s'""" % sqlite_tmp_dir)
       except: pass # Deprecated PRAGMA
       
+    self.filename           = filename
+    self.pragmas            = pragmas
+    self.concurrent_readers = concurrent_readers
+    self.read_pool          = None
+    
+    if concurrent_readers: base_execute = self._execute_concurrent
+    else:                  base_execute = self.db.execute
+    
     if profiling:
-      import time
-      from collections import Counter
-      self.requests_counts = Counter()
-      self.requests_times  = Counter()
-      
-      def execute(s, args = ()):
-        if "SELECT" in s:
-          self.requests_counts[s] += 1
-          t0 = time.time()
-          r = list(self.db.execute(s, args))
-          t = time.time() - t0
-          self.requests_times[s] += t
-        return self.db.execute(s, args)
-      self.execute = execute
-      
-      def reset_profiling():
-        self.requests_counts = Counter()
-        self.requests_times  = Counter()
-      self.reset_profiling = reset_profiling
-      
-      def show_profiling():
-        print(file = sys.stderr)
-        print("Request counts:", file = sys.stderr)
-        for s, nb in self.requests_counts.most_common():
-          print(" ", nb, "\t", s.replace("\n", " "), file = sys.stderr)
-        print(file = sys.stderr)
-        print("Request total times:", file = sys.stderr)
-        for s, nb in self.requests_times.most_common():
-          print(" ", nb, "\t", s.replace("\n", " "), file = sys.stderr)
-        print(file = sys.stderr)
-        print("Request mean times:", file = sys.stderr)
-        rmt = Counter()
-        for s, nb in self.requests_counts.most_common():
-          rmt[s] = self.requests_times[s] / nb
-        for s, nb in rmt.most_common():
-          print(" ", nb, "\t", s.replace("\n", " "), file = sys.stderr)
-      self.show_profiling = show_profiling
-      
+      if   isinstance(profiling, QueryProfiler): self.profiler = profiling
+      elif profiling is True:                    self.profiler = QueryProfiler()
+      else:                                      self.profiler = QueryProfiler(profiling)
+      self.execute = self.profiler.wrap(base_execute)
     else:
-      self.execute  = self.db.execute
+      self.profiler = None
+      self.execute  = base_execute
       
     self.c_2_onto          = {}
     self.onto_2_subgraph   = {}
@@ -132,11 +445,20 @@ class Graph(BaseMainGraph):
     
     self.lock              = threading.RLock()
     self.lock_level        = 0
+    self.bulk_level        = 0
+    self.bulk_load_level   = 0
+    self.hierarchy_changes = -1
+    self.predicate_stats   = False # Not yet loaded
+    self.predicate_values  = None
+    self.search_estimates  = {}
+    self.search_estimates_changes = -1
     
     if initialize_db:
       self.current_blank    = 0
       self.current_resource = 300 # 300 first values are reserved
       self.prop_fts         = set()
+      self.closure_indexed  = False
+      self.hierarchy_indexed = False
       
       self.execute("""CREATE TABLE store (version INTEGER, current_blank INTEGER, current_resource INTEGER)""")
       self.execute("""INSERT INTO store VALUES (8, 0, 300)""")
@@ -189,17 +511,13 @@ class Graph(BaseMainGraph):
       
     else:
       self.indexed = True
-      if clone:
-        s = "\n".join(clone.db.iterdump())
-        self.db.cursor().executescript(s)
-        
       version, self.current_blank, self.current_resource = self.execute("SELECT version, current_blank, current_resource FROM store").fetchone()
       self.current_resource = self.execute("SELECT MAX(storid) FROM resources").fetchone()[0]
       
       if clone:
         self.current_blank    = clone.current_blank
         self.current_resource = clone.current_resource
-      
+        
       if version == 1:
         print("* Owlready2 * Converting quadstore to internal format 2...", file = sys.stderr)
         self.execute("""CREATE TABLE ontology_alias (iri TEXT, alias TEXT)""")
@@ -378,34 +696,194 @@ class Graph(BaseMainGraph):
         
         
       self.prop_fts = { storid for (storid,) in self.execute("""SELECT storid FROM prop_fts;""") }
+      self.closure_indexed = bool(self.execute("""SELECT 1 FROM sqlite_master WHERE type='table' AND name='closure'""").fetchone())
+      self.hierarchy_indexed = bool(self.execute("""SELECT 1 FROM sqlite_master WHERE type='table' AND name='hierarchy'""").fetchone())
       
+    if snapshot:
+      if isinstance(snapshot, str):
+        with open(snapshot, "rb") as f: self.load_snapshot(f)
+      else:
+        self.load_snapshot(snapshot)
+        
     self.current_changes = self.db.total_changes
     self.select_abbreviate_method()
+    
+    if concurrent_readers:
+      self.db.commit() # Readers only see committed data
+      uri = "file:%s?mode=ro" % urllib.request.pathname2url(os.path.abspath(filename))
+      self.read_pool = queue.Queue()
+      for i in range(concurrent_readers):
+        db = sqlite3.connect(uri, uri = True, check_same_thread = False)
+        _apply_pragmas(db, pragmas, read_only = True)
+        self.read_pool.put(db)
+        
+  def _execute_concurrent(self, sql, args = ()):
+    # Reads go to the pool of read-only connections, unless the writer has uncommitted changes
+    # (they would not be visible from the readers). If all the read-only connections are used by cursors
+    # that are still being iterated, the writing connection is used.
+    if (self.read_pool is None) or self.db.in_transaction or not sql.lstrip().startswith(("SELECT", "WITH")):
+      return self.db.execute(sql, args)
+    try:                db = self.read_pool.get_nowait()
+    except queue.Empty: return self.db.execute(sql, args)
+    try:
+      return _PooledCursor(self.read_pool, db, db.execute(sql, args))
+    except:
+      self.read_pool.put(db)
+      raise
 
 
     
   def set_indexed(self, indexed):
-    pass
-    #self.indexed = indexed
-    #if indexed:
-    #  self.execute("""CREATE INDEX index_objs_sp ON objs(s,p)""")
-    #  #self.execute("""CREATE INDEX index_objs_op ON objs(o,p,c)""") # c is for onto.classes(), etc
-    #  self.execute("""CREATE UNIQUE INDEX index_objs_op ON objs(o,p,c,s)""") # c is for onto.classes(), etc
-    #  
-    #  self.execute("""CREATE INDEX index_datas_sp ON datas(s,p)""")
-    #  #self.execute("""CREATE INDEX index_datas_op ON datas(o,p)""")
-    #  self.execute("""CREATE UNIQUE INDEX index_datas_op ON datas(o,p,c,d,s)""")
-    #  
-    #  for onto in self.world.ontologies.values():
-    #    onto._load_properties()
-    #else:
-    #  self.execute("""DROP INDEX IF EXISTS index_objs_sp""")
-    #  self.execute("""DROP INDEX IF EXISTS index_objs_op""")
-    #  self.execute("""DROP INDEX IF EXISTS index_datas_sp""")
-    #  self.execute("""DROP INDEX IF EXISTS index_datas_op""")
+    if indexed == self.indexed: return
+    if self.bulk_level: self.flush_bulk_insert()
+    self.indexed = indexed
+    if indexed:
+      self.execute("""CREATE UNIQUE INDEX index_resources_iri ON resources(iri)""")
+      self.execute("""CREATE INDEX index_objs_sp ON objs(s,p)""")
+      self.execute("""CREATE INDEX index_datas_sp ON datas(s,p)""")
+      for table, index, columns in [("objs", "index_objs_op", "o,p,c,s"), ("datas", "index_datas_op", "o,p,c,d,s")]: # c is for onto.classes(), etc
+        try:
+          self.execute("""CREATE UNIQUE INDEX %s ON %s(%s)""" % (index, table, columns))
+        except sqlite3.IntegrityError: # Without the unique index, INSERT OR IGNORE has inserted duplicated triples
+          self.execute("""DELETE FROM %s WHERE rowid NOT IN (SELECT MIN(rowid) FROM %s GROUP BY %s)""" % (table, table, columns))
+          self.execute("""CREATE UNIQUE INDEX %s ON %s(%s)""" % (index, table, columns))
+      self.select_abbreviate_method()
+      
+      if self.world:
+        for onto in list(self.world.ontologies.values()):
+          if onto.loaded: onto._load_properties()
+    else:
+      self.execute("""DROP INDEX IF EXISTS index_resources_iri""")
+      self.execute("""DROP INDEX IF EXISTS index_objs_sp""")
+      self.execute("""DROP INDEX IF EXISTS index_objs_op""")
+      self.execute("""DROP INDEX IF EXISTS index_datas_sp""")
+      self.execute("""DROP INDEX IF EXISTS index_datas_op""")
+      self.select_abbreviate_method() # IRIs cannot be looked up in SQL without index_resources_iri
+      
+  def begin_bulk_load(self):
+    if self.bulk_level: raise ValueError("Cannot begin a bulk load inside a bulk insert!")
+    self.bulk_load_level += 1
+    if self.bulk_load_level > 1: return
+    
+    self.db.commit() # The journal mode cannot be changed inside a transaction
+    self.bulk_load_pragmas = [(pragma, self.execute("PRAGMA %s" % pragma).fetchone()[0]) for pragma in ["synchronous", "journal_mode"]]
+    self.execute("PRAGMA synchronous = OFF")
+    self.execute("PRAGMA journal_mode = MEMORY")
+    self.set_indexed(False)
+    
+    self._execute_noload = self.execute
+    self.execute         = self._execute_bulk_load
+    for subgraph in self.onto_2_subgraph.values(): subgraph.execute = self.execute
+    
+  def _execute_bulk_load(self, sql, args = ()):
+    # Indexes are dropped during bulk loads, hence queries cannot force them
+    return self._execute_noload(_INDEXED_BY.sub("", sql), args)
+  
+  def end_bulk_load(self):
+    self.bulk_load_level -= 1
+    if self.bulk_load_level: return
+    
+    self.execute = self._execute_noload
+    for subgraph in self.onto_2_subgraph.values(): subgraph.execute = self.execute
+    try:
+      self.set_indexed(True)
+    finally:
+      self.db.commit()
+      for pragma, value in self.bulk_load_pragmas: self.execute("PRAGMA %s = %s" % (pragma, value))
+      self.bulk_load_pragmas = None
+      
+  def save(self, f, format = "rdfxml", **kargs):
+    if format == "snapshot": self.save_snapshot(f)
+    else:                    _save(f, format, self, **kargs)
+    
+  def save_snapshot(self, f):
+    if self.bulk_level: self.flush_bulk_insert()
+    header = {
+      "current_blank"     : self.current_blank,
+      "current_resource"  : self.current_resource,
+      "ontologies"        : self.execute("""SELECT c, iri, last_update FROM ontologies""").fetchall(),
+      "ontology_alias"    : self.execute("""SELECT iri, alias FROM ontology_alias""").fetchall(),
+      "prop_fts"          : sorted(self.prop_fts),
+      "closure_indexed"   : self.closure_indexed,
+      "hierarchy_indexed" : self.hierarchy_indexed,
+    }
+    f.write(_SNAPSHOT_MAGIC)
+    f.write(struct.pack("<I", _SNAPSHOT_VERSION))
+    _snapshot_write_segments(f, [json.dumps(header).encode("utf8")])
+    
+    for tag, sql in [(b"R", """SELECT storid, iri FROM resources"""),
+                     (b"O", """SELECT c, s, p, o FROM objs"""),
+                     (b"D", """SELECT c, s, p, o, d FROM datas ORDER BY rowid""")]:
+      cursor = self.execute(sql)
+      while True:
+        rows = cursor.fetchmany(_SNAPSHOT_BLOCK)
+        if not rows: break
+        columns = list(zip(*rows))
+        if   tag == b"R": segments = [_snapshot_pack_numbers(columns[0]), *_snapshot_pack_strs(columns[1])]
+        elif tag == b"O": segments = [_snapshot_pack_numbers(column) for column in columns]
+        else:             segments = [*(_snapshot_pack_numbers(column) for column in columns[:3]), *_snapshot_pack_values(columns[3]), *_snapshot_pack_values(columns[4])]
+        f.write(tag)
+        f.write(struct.pack("<I", len(rows)))
+        _snapshot_write_segments(f, segments)
+    f.write(b"E")
+    
+  def load_snapshot(self, f):
+    if f.read(len(_SNAPSHOT_MAGIC)) != _SNAPSHOT_MAGIC: raise ValueError("'%s' is not an Owlready2 snapshot!" % getattr(f, "name", f))
+    version = struct.unpack("<I", _snapshot_read(f, 4))[0]
+    if version != _SNAPSHOT_VERSION: raise ValueError("Unsupported Owlready2 snapshot version %s!" % version)
+    header = json.loads(_snapshot_read_segments(f, 1)[0].decode("utf8"))
+    
+    cur = self.db.cursor()
     
+    # Indexes are dropped during the insertion and then recreated, which is faster.
+    indexes = cur.execute("""SELECT name, sql FROM sqlite_master WHERE type='index' AND tbl_name IN ('resources', 'objs', 'datas') AND sql IS NOT NULL""").fetchall()
+    for name, sql in indexes: cur.execute("""DROP INDEX %s""" % name)
+    
+    cur.execute("""DELETE FROM resources""")
+    cur.execute("""DELETE FROM objs""")
+    cur.execute("""DELETE FROM datas""")
+    while True:
+      tag = _snapshot_read(f, 1)
+      if tag == b"E": break
+      nb = struct.unpack("<I", _snapshot_read(f, 4))[0]
+      if   tag == b"R":
+        storids, lengths, iris = _snapshot_read_segments(f, 3)
+        cur.executemany("""INSERT INTO resources VALUES (?,?)""", zip(_snapshot_unpack_numbers(storids), _snapshot_unpack_strs(lengths, iris)))
+      elif tag == b"O":
+        cur.executemany("""INSERT INTO objs VALUES (?,?,?,?)""", zip(*(_snapshot_unpack_numbers(column) for column in _snapshot_read_segments(f, 4))))
+      elif tag == b"D":
+        segments = _snapshot_read_segments(f, 13)
+        cur.executemany("""INSERT INTO datas VALUES (?,?,?,?,?)""", zip(*(_snapshot_unpack_numbers(column) for column in segments[:3]),
+                                                                        _snapshot_unpack_values(*segments[3:8]), _snapshot_unpack_values(*segments[8:])))
+      else:
+        raise ValueError("Invalid block in Owlready2 snapshot!")
+    for name, sql in indexes: cur.execute(sql)
+    
+    cur.execute("""DELETE FROM ontologies""")
+    cur.execute("""DELETE FROM ontology_alias""")
+    cur.executemany("""INSERT INTO ontologies VALUES (?,?,?)""", header["ontologies"])
+    cur.executemany("""INSERT INTO ontology_alias VALUES (?,?)""", header["ontology_alias"])
+    self.current_blank    = header["current_blank"]
+    self.current_resource = header["current_resource"]
+    cur.execute("""UPDATE store SET current_blank=?, current_resource=?""", (self.current_blank, self.current_resource))
+    
+    for prop_storid in header["prop_fts"]:
+      if not prop_storid in self.prop_fts: self.enable_full_text_search(prop_storid)
+    if header["closure_indexed"]:   self.enable_closure_index()
+    if header["hierarchy_indexed"]: self.enable_hierarchy_index()
+    self.db.commit()
+    
+  def reset_profiling(self): self.profiler.reset()
+  def show_profiling (self): self.profiler.show()
+  
+  def get_pragmas(self):
+    """Returns the effective values of the main SQLite3 settings of the writing connection."""
+    return { pragma : self.db.execute("""PRAGMA %s""" % pragma).fetchone()[0] for pragma in _REPORTED_PRAGMAS }
+  
   def close(self):
     self.db.close()
+    if self.read_pool:
+      while not self.read_pool.empty(): self.read_pool.get().close()
     
   def acquire_write_lock(self):
     self.lock.acquire()
@@ -417,7 +895,7 @@ class Graph(BaseMainGraph):
   
   def select_abbreviate_method(self):
     nb = self.execute("SELECT count(*) FROM resources").fetchone()[0]
-    if nb < 100000:
+    if (nb < 100000) or (not self.indexed):
       iri_storid = self.execute("SELECT iri, storid FROM resources").fetchall()
       self.  _abbreviate_d = dict(iri_storid)
       self._unabbreviate_d = dict((storid, iri) for (iri, storid) in  iri_storid)
@@ -430,6 +908,14 @@ class Graph(BaseMainGraph):
       self._abbreviate   = self._abbreviate_sql
       self._unabbreviate = self._unabbreviate_sql
       self._refactor     = self._refactor_sql
+    if self.bulk_level:
+      self._abbreviate_nobulk   = self._abbreviate
+      self._unabbreviate_nobulk = self._unabbreviate
+      self._abbreviate          = self._abbreviate_bulk
+      self._unabbreviate        = self._unabbreviate_bulk
+    self._propagate_abbreviate_methods()
+    
+  def _propagate_abbreviate_methods(self):
     if self.world:
       self.world._abbreviate   = self._abbreviate
       self.world._unabbreviate = self._unabbreviate
@@ -496,6 +982,7 @@ class Graph(BaseMainGraph):
       i = self.last_numbered_iri[prefix] = self.last_numbered_iri[prefix] + 1
       return "%s%s" % (prefix, i)
     else:
+      if self.bulk_level: self._flush_bulk_abbrevs()
       cur = self.execute("SELECT iri FROM resources WHERE iri GLOB ? ORDER BY LENGTH(iri) DESC, iri DESC", ("%s*" % prefix,))
       while True:
         iri = cur.fetchone()
@@ -518,10 +1005,108 @@ class Graph(BaseMainGraph):
     self._unabbreviate_d[storid]  = new_iri
     
   def commit(self):
+    if self.bulk_level: self.flush_bulk_insert()
     if self.current_changes != self.db.total_changes:
       self.current_changes = self.db.total_changes
       self.execute("UPDATE store SET current_blank=?, current_resource=?", (self.current_blank, self.current_resource))
       self.db.commit()
+      if self.in_memory: self.save_to_disk()
+    elif self.in_memory and not (os.path.exists(self.filename) and os.path.getsize(self.filename)):
+      self.save_to_disk()
+      
+  def save_to_disk(self, filename = None):
+    disk_db = sqlite3.connect(filename or self.filename)
+    try:     self.db.backup(disk_db, pages = _BACKUP_PAGES, progress = self.backup_progress)
+    finally: disk_db.close()
+    
+  def begin_bulk_insert(self):
+    self.bulk_level += 1
+    if self.bulk_level > 1: return
+    
+    self.bulk_objs            = []
+    self.bulk_datas           = []
+    self.bulk_abbrevs         = []
+    self.bulk_sp              = set() # (s, p) pairs that have buffered triples
+    self.bulk_iri_2_storid    = {}
+    self.bulk_storid_2_iri    = {}
+    self.bulk_saved_methods   = {}
+    
+    self._execute_nobulk      = self.execute
+    self.execute              = self._execute_bulk
+    self._abbreviate_nobulk   = self._abbreviate
+    self._unabbreviate_nobulk = self._unabbreviate
+    self._abbreviate          = self._abbreviate_bulk
+    self._unabbreviate        = self._unabbreviate_bulk
+    self._propagate_abbreviate_methods()
+    
+    # Bypass the ontologies' raw triple methods (and the observers that may wrap them)
+    for subgraph in self.onto_2_subgraph.values():
+      onto = subgraph.onto
+      self.bulk_saved_methods[onto] = [getattr(onto, method) for method in self.ONTO_METHODS]
+      subgraph.execute = self.execute
+      for method in self.ONTO_METHODS:
+        setattr(onto, method, getattr(subgraph, method.replace("_raw_", "_raw_bulk_")))
+      
+  def end_bulk_insert(self):
+    self.bulk_level -= 1
+    if self.bulk_level: return
+    
+    try:
+      self.flush_bulk_insert()
+    finally:
+      self.execute       = self._execute_nobulk
+      self._abbreviate   = self._abbreviate_nobulk
+      self._unabbreviate = self._unabbreviate_nobulk
+      self._propagate_abbreviate_methods()
+      for subgraph in self.onto_2_subgraph.values():
+        subgraph.execute = self.execute
+        saved = self.bulk_saved_methods.get(subgraph.onto)
+        if saved:
+          for method, func in zip(self.ONTO_METHODS, saved): setattr(subgraph.onto, method, func)
+      self.bulk_objs = self.bulk_datas = self.bulk_abbrevs = self.bulk_sp = self.bulk_iri_2_storid = self.bulk_storid_2_iri = self.bulk_saved_methods = None
+      
+  def flush_bulk_insert(self):
+    self._flush_bulk_abbrevs()
+    if self.bulk_objs:
+      if owlready2.namespace._LOG_LEVEL: print("* OwlReady2 * Inserting %s object triples..." % len(self.bulk_objs), file = sys.stderr)
+      self.db.executemany("INSERT OR IGNORE INTO objs VALUES (?,?,?,?)", self.bulk_objs)
+      self.bulk_objs.clear()
+    if self.bulk_datas:
+      if owlready2.namespace._LOG_LEVEL: print("* OwlReady2 * Inserting %s data triples..." % len(self.bulk_datas), file = sys.stderr)
+      self.db.executemany("INSERT OR IGNORE INTO datas VALUES (?,?,?,?,?)", self.bulk_datas)
+      self.bulk_datas.clear()
+    self.bulk_sp.clear()
+      
+  def _flush_bulk_abbrevs(self):
+    if self.bulk_abbrevs:
+      self.db.executemany("INSERT INTO resources VALUES (?,?)", self.bulk_abbrevs)
+      if not self._abbreviate_d is None:
+        self.  _abbreviate_d.update(self.bulk_iri_2_storid)
+        self._unabbreviate_d.update(self.bulk_storid_2_iri)
+      self.bulk_abbrevs     .clear()
+      self.bulk_iri_2_storid.clear()
+      self.bulk_storid_2_iri.clear()
+      
+  def _execute_bulk(self, sql, args = ()):
+    # Buffered triples must reach the database before they can be removed or modified
+    if sql.startswith(("DELETE", "UPDATE")): self.flush_bulk_insert()
+    return self._execute_nobulk(sql, args)
+  
+  def _abbreviate_bulk(self, iri, create_if_missing = True):
+    storid = self.bulk_iri_2_storid.get(iri)
+    if storid is None:
+      storid = self._abbreviate_nobulk(iri, False)
+      if (storid is None) and create_if_missing:
+        self.current_resource += 1
+        storid = self.bulk_iri_2_storid[iri] = self.current_resource
+        self.bulk_storid_2_iri[storid] = iri
+        self.bulk_abbrevs.append((storid, iri))
+    return storid
+  
+  def _unabbreviate_bulk(self, storid):
+    iri = self.bulk_storid_2_iri.get(storid)
+    if iri is None: return self._unabbreviate_nobulk(storid)
+    return iri
 
   def context_2_user_context(self, c):
     user_c = self.c_2_onto.get(c)
@@ -653,6 +1238,22 @@ class Graph(BaseMainGraph):
   
   def _get_obj_triples_sp_co(self, s, p):
     return self.execute("SELECT c,o FROM objs WHERE s=? AND p=?", (s, p)).fetchall()
+  
+  def _get_obj_triples_many_sp_cso(self, ss, p):
+    r = []
+    for i in range(0, len(ss), 500):
+      chunk = ss[i : i + 500]
+      r.extend(self.execute("SELECT c,s,o FROM objs WHERE s IN (%s) AND p=?" % ",".join("?" * len(chunk)), (*chunk, p)).fetchall())
+    return r
+  
+  def _unabbreviate_many(self, storids):
+    if not self._unabbreviate_d is None:
+      return { storid : self._unabbreviate(storid) for storid in storids }
+    r = {}
+    for i in range(0, len(storids), 500):
+      chunk = storids[i : i + 500]
+      r.update(self.execute("SELECT storid, iri FROM resources WHERE storid IN (%s)" % ",".join("?" * len(chunk)), chunk).fetchall())
+    return r
     
   def _get_triples_s_p(self, s):
     for (x,) in self.execute("SELECT DISTINCT p FROM quads WHERE s=?", (s,)).fetchall(): yield x
@@ -816,6 +1417,10 @@ class Graph(BaseMainGraph):
 
 
   def _get_obj_triples_transitive_sp(self, s, p):
+    if self.closure_indexed and ((p == rdfs_subclassof) or (p == rdfs_subpropertyof)):
+      self._repair_closure()
+      for (x,) in self.execute("""SELECT a FROM closure WHERE p=? AND d=?""", (p, s)).fetchall(): yield x
+      return
     for (x,) in self.execute("""
 WITH RECURSIVE transit(x)
 AS (  SELECT o FROM objs WHERE s=? AND p=?
@@ -825,6 +1430,14 @@ SELECT x FROM transit""", (s, p, p)).fetchall(): yield x
 
     
   def _get_obj_triples_transitive_po(self, p, o):
+    if self.hierarchy_indexed and (p == rdfs_subclassof):
+      self._update_hierarchy()
+      for (x,) in self.execute("""SELECT h.s FROM hierarchy_intervals i, hierarchy h WHERE i.s=? AND h.post BETWEEN i.low AND i.high AND h.s!=?""", (o, o)).fetchall(): yield x
+      return
+    if self.closure_indexed and ((p == rdfs_subclassof) or (p == rdfs_subpropertyof)):
+      self._repair_closure()
+      for (x,) in self.execute("""SELECT d FROM closure WHERE p=? AND a=?""", (p, o)).fetchall(): yield x
+      return
     for (x,) in self.execute("""
 WITH RECURSIVE transit(x)
 AS (  SELECT s FROM objs WHERE p=? AND o=?
@@ -934,6 +1547,36 @@ SELECT x FROM transit""", (p, o, p)).fetchall(): yield x
       
     return destroyed_storids
   
+  def _insert_new_obj_triples(self, c, triples, inverses = None, returning = False):
+    """Inserts in ontology c the (s, p, o) triples that are not yet asserted in any ontology (nor as (o, inverse, s),
+if inverses maps p to its inverse), using a temporary table and a single INSERT. Returns the inserted triples if returning is true."""
+    if self.bulk_level: self.flush_bulk_insert()
+    inverses = inverses or {}
+    self.db.execute("""CREATE TEMP TABLE new_objs (s INTEGER, p INTEGER, o INTEGER, inverse INTEGER, PRIMARY KEY (s,p,o)) WITHOUT ROWID""")
+    try:
+      self.db.executemany("""INSERT OR IGNORE INTO new_objs VALUES (?,?,?,?)""", [(s, p, o, inverses.get(p)) for (s, p, o) in triples])
+      self.db.execute("""
+DELETE FROM new_objs
+WHERE EXISTS (SELECT 1 FROM objs WHERE objs.s=new_objs.s AND objs.p=new_objs.p AND objs.o=new_objs.o)
+OR ((new_objs.inverse IS NOT NULL) AND EXISTS (SELECT 1 FROM objs WHERE objs.s=new_objs.o AND objs.p=new_objs.inverse AND objs.o=new_objs.s))""")
+      self.db.execute("""INSERT OR IGNORE INTO objs SELECT ?,s,p,o FROM new_objs""", (c,))
+      if returning: return self.db.execute("""SELECT s,p,o FROM new_objs""").fetchall()
+    finally:
+      self.db.execute("""DROP TABLE temp.new_objs""")
+      
+  def _insert_new_data_triples(self, c, triples, returning = False):
+    """Inserts in ontology c the (s, p, o, d) triples that are not yet asserted in any ontology,
+using a temporary table and a single INSERT. Returns the inserted triples if returning is true."""
+    if self.bulk_level: self.flush_bulk_insert()
+    self.db.execute("""CREATE TEMP TABLE new_datas (s INTEGER, p INTEGER, o BLOB, d INTEGER, PRIMARY KEY (s,p,o,d))""")
+    try:
+      self.db.executemany("""INSERT OR IGNORE INTO new_datas VALUES (?,?,?,?)""", triples)
+      self.db.execute("""DELETE FROM new_datas WHERE EXISTS (SELECT 1 FROM datas WHERE datas.s=new_datas.s AND datas.p=new_datas.p AND datas.o=new_datas.o AND datas.d IS new_datas.d)""")
+      self.db.execute("""INSERT OR IGNORE INTO datas SELECT ?,s,p,o,d FROM new_datas""", (c,))
+      if returning: return self.db.execute("""SELECT s,p,o,d FROM new_datas""").fetchall()
+    finally:
+      self.db.execute("""DROP TABLE temp.new_datas""")
+      
   def _iter_ontology_iri(self, c = None):
     if c:
       return self.execute("SELECT iri FROM ontologies WHERE c=?", (c,)).fetchone()[0]
@@ -961,6 +1604,7 @@ SELECT x FROM transit""", (p, o, p)).fetchall(): yield x
   #     yield from data_cursor
       
   def _iter_triples(self, quads = False, sort_by_s = False, c = None):
+    if self.bulk_level: self.flush_bulk_insert()
     cursor = self.db.cursor() # Use a new cursor => can iterate without loading all data in a big list, while still being able to query the default cursor
     sql = ""
     if c:         sql += " WHERE c=%s" % c
@@ -973,6 +1617,84 @@ SELECT x FROM transit""", (p, o, p)).fetchall(): yield x
       
     return cursor
       
+  def _iter_ntriples_chunks(self, quads = False, c = None, module = None):
+    # The IRIs are loaded at once (only those used by the ontology if c is given), and the triples are
+    # fetched and formatted by large batches.
+    # If module is given, only the triples whose subject is in module are exported, as well as the declarations
+    # of the other entities they use.
+    if self.bulk_level: self.flush_bulk_insert()
+    if not module is None:
+      yield from self._iter_module_ntriples_chunks(quads, module)
+      return
+    if c:
+      iris = { storid : "<%s>" % iri for (storid, iri) in self.execute("""SELECT storid, iri FROM resources WHERE storid IN (SELECT s FROM quads WHERE c=?1 UNION SELECT p FROM quads WHERE c=?1 UNION SELECT o FROM objs WHERE c=?1 UNION SELECT d FROM datas WHERE c=?1)""", (c,)) }
+      where = " WHERE c=%s" % c
+    else:
+      iris = [None] * (self.current_resource + 1)
+      for storid, iri in self.execute("""SELECT storid, iri FROM resources"""): iris[storid] = "<%s>" % iri
+      where = ""
+      
+    if quads:
+      c_2_iri = { c : "<%s> " % iri for c, iri in self._iter_ontology_iri() }
+      columns = "c,s,p,o"
+    else:
+      c_2_iri = { None : "" }
+      columns = "NULL,s,p,o"
+      
+    cursor = self.db.cursor()
+    cursor.execute("""SELECT %s FROM objs%s""" % (columns, where))
+    while True:
+      rows = cursor.fetchmany(_NTRIPLES_CHUNK)
+      if not rows: break
+      yield "".join(["%s%s %s %s .\n" % (c_2_iri[c], iris[s] if s > 0 else "_:%s" % -s, iris[p], iris[o] if o > 0 else "_:%s" % -o) for (c,s,p,o) in rows])
+      
+    cursor.execute("""SELECT %s,d FROM datas%s""" % (columns, where))
+    while True:
+      rows = cursor.fetchmany(_NTRIPLES_CHUNK)
+      if not rows: break
+      yield "".join(['%s%s %s "%s"%s .\n' % (c_2_iri[c], iris[s] if s > 0 else "_:%s" % -s, iris[p],
+                                               o.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') if o.__class__ is str else o,
+                                               d if d.__class__ is str else ("" if d == 0 else "^^%s" % iris[d]))
+                     for (c,s,p,o,d) in rows])
+      
+  def _iter_module_ntriples_chunks(self, quads, module):
+    self.db.execute("""CREATE TEMP TABLE module_subjects (s INTEGER PRIMARY KEY)""")
+    try:
+      self.db.executemany("""INSERT INTO module_subjects VALUES (?)""", [(s,) for s in module])
+      self.db.execute("""CREATE TEMP TABLE module_declared (s INTEGER PRIMARY KEY)""")
+      self.db.execute("""
+INSERT INTO module_declared
+SELECT o FROM objs WHERE s IN (SELECT s FROM module_subjects) AND o > 0 UNION SELECT p FROM quads WHERE s IN (SELECT s FROM module_subjects)""")
+      self.db.execute("""DELETE FROM module_declared WHERE s IN (SELECT s FROM module_subjects)""")
+      declarations = ",".join(str(storid) for storid in [owl_class, owl_object_property, owl_data_property, owl_annotation_property, owl_named_individual, rdfs_datatype])
+      
+      iris = [None] * (self.current_resource + 1)
+      for storid, iri in self.execute("""SELECT storid, iri FROM resources"""): iris[storid] = "<%s>" % iri
+      if quads: c_2_iri = { c : "<%s> " % iri for c, iri in self._iter_ontology_iri() }
+      else:     c_2_iri = None
+      
+      cursor = self.db.cursor()
+      cursor.execute("""
+SELECT c,s,p,o FROM objs WHERE s IN (SELECT s FROM module_subjects)
+UNION ALL
+SELECT c,s,p,o FROM objs WHERE s IN (SELECT s FROM module_declared) AND p=%s AND o IN (%s)""" % (rdf_type, declarations))
+      while True:
+        rows = cursor.fetchmany(_NTRIPLES_CHUNK)
+        if not rows: break
+        yield "".join(["%s%s %s %s .\n" % (c_2_iri[c] if quads else "", iris[s] if s > 0 else "_:%s" % -s, iris[p], iris[o] if o > 0 else "_:%s" % -o) for (c,s,p,o) in rows])
+        
+      cursor.execute("""SELECT c,s,p,o,d FROM datas WHERE s IN (SELECT s FROM module_subjects)""")
+      while True:
+        rows = cursor.fetchmany(_NTRIPLES_CHUNK)
+        if not rows: break
+        yield "".join(['%s%s %s "%s"%s .\n' % (c_2_iri[c] if quads else "", iris[s] if s > 0 else "_:%s" % -s, iris[p],
+                                                 o.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') if o.__class__ is str else o,
+                                                 d if d.__class__ is str else ("" if d == 0 else "^^%s" % iris[d]))
+                       for (c,s,p,o,d) in rows])
+    finally:
+      self.db.execute("""DROP TABLE IF EXISTS temp.module_subjects""")
+      self.db.execute("""DROP TABLE IF EXISTS temp.module_declared""")
+      
   def get_fts_prop_storid(self): return self.prop_fts
 
 #   def enable_full_text_search(self, prop_storid):
@@ -1016,6 +1738,209 @@ CREATE TRIGGER fts_%s_after_update AFTER UPDATE ON datas WHEN new.p=%s BEGIN
 END;""" % (prop_storid, prop_storid, prop_storid,   prop_storid, prop_storid, prop_storid, prop_storid,   prop_storid, prop_storid, prop_storid, prop_storid, prop_storid))
     
     
+  def enable_closure_index(self):
+    if self.closure_indexed: return
+    self.closure_indexed = True
+    
+    self.execute("""CREATE TABLE closure (p INTEGER, a INTEGER, d INTEGER, depth INTEGER, PRIMARY KEY (p, a, d)) WITHOUT ROWID""")
+    self.execute("""CREATE INDEX index_closure_pd ON closure(p, d)""")
+    self.execute("""CREATE TABLE closure_dirty (p INTEGER, s INTEGER)""")
+    
+    # Deleting an edge may require a path search, which cannot be done in a trigger;
+    # the subject is marked as dirty and the closure is repaired before the next read.
+    self.db.cursor().executescript("""
+CREATE TRIGGER closure_after_insert AFTER INSERT ON objs WHEN new.p IN (%s, %s) BEGIN
+  %s;
+END;
+CREATE TRIGGER closure_after_delete AFTER DELETE ON objs WHEN old.p IN (%s, %s) BEGIN
+  INSERT INTO closure_dirty VALUES (old.p, old.s);
+END;
+CREATE TRIGGER closure_after_update AFTER UPDATE ON objs WHEN (old.p IN (%s, %s)) OR (new.p IN (%s, %s)) BEGIN
+  INSERT INTO closure_dirty VALUES (old.p, old.s);
+  INSERT INTO closure_dirty VALUES (new.p, new.s);
+END;""" % (rdfs_subclassof, rdfs_subpropertyof, _CLOSURE_ADD_EDGE % { "p" : "new.p", "s" : "new.s", "o" : "new.o" },
+           rdfs_subclassof, rdfs_subpropertyof,
+           rdfs_subclassof, rdfs_subpropertyof, rdfs_subclassof, rdfs_subpropertyof))
+    
+    self.db.executemany(_CLOSURE_ADD_EDGE % _CLOSURE_ADD_EDGE_PARAMS, [(p, s, o) for (s, p, o) in self.execute("""SELECT s, p, o FROM objs WHERE p IN (%s, %s)""" % (rdfs_subclassof, rdfs_subpropertyof)).fetchall()])
+    
+  def disable_closure_index(self):
+    if not self.closure_indexed: return
+    self.closure_indexed = False
+    
+    self.execute("""DROP TRIGGER closure_after_insert""")
+    self.execute("""DROP TRIGGER closure_after_delete""")
+    self.execute("""DROP TRIGGER closure_after_update""")
+    self.execute("""DROP TABLE closure""")
+    self.execute("""DROP TABLE closure_dirty""")
+    
+  def _repair_closure(self):
+    if not self.db.execute("""SELECT 1 FROM closure_dirty LIMIT 1""").fetchone(): return
+    
+    self.acquire_write_lock() # Repairs write in the quadstore, even if they are performed when reading
+    try:
+      dirties = self.db.execute("""SELECT DISTINCT p, s FROM closure_dirty""").fetchall()
+      if not dirties: return # Repaired by another thread
+      
+      # The closure is a superset of the true one; the rows of the descendants of the dirty subjects are removed,
+      # and the remaining edges of these descendants are added again.
+      for p in { p for (p, s) in dirties }:
+        ds = { s for (p2, s) in dirties if p2 == p }
+        for (s,) in self.db.execute("""SELECT DISTINCT d FROM closure WHERE p=? AND a IN (SELECT s FROM closure_dirty WHERE p=?)""", (p, p)): ds.add(s)
+        ds = list(ds)
+        edges = []
+        for i in range(0, len(ds), 500):
+          chunk = ds[i : i + 500]
+          self.db.execute("""DELETE FROM closure WHERE p=? AND d IN (%s)""" % ",".join("?" for x in chunk), (p, *chunk))
+          edges.extend(self.db.execute("""SELECT s, o FROM objs WHERE p=? AND s IN (%s)""" % ",".join("?" for x in chunk), (p, *chunk)))
+        self.db.executemany(_CLOSURE_ADD_EDGE % _CLOSURE_ADD_EDGE_PARAMS, [(p, s, o) for (s, o) in edges])
+      self.db.execute("""DELETE FROM closure_dirty""")
+    finally:
+      self.release_write_lock()
+    
+  def enable_hierarchy_index(self):
+    if self.hierarchy_indexed: return
+    self.hierarchy_indexed = True
+    
+    self.execute("""CREATE TABLE hierarchy (s INTEGER PRIMARY KEY, post INTEGER)""")
+    self.execute("""CREATE INDEX index_hierarchy_post ON hierarchy(post)""")
+    self.execute("""CREATE TABLE hierarchy_intervals (s INTEGER, low INTEGER, high INTEGER)""")
+    self.execute("""CREATE INDEX index_hierarchy_intervals_s ON hierarchy_intervals(s)""")
+    self.execute("""CREATE TABLE hierarchy_dirty (dirty INTEGER)""")
+    self.execute("""INSERT INTO hierarchy_dirty VALUES (1)""")
+    
+    # Relabeling is global; the triggers only mark the index as dirty, and it is rebuilt before the next read.
+    self.db.cursor().executescript("""
+CREATE TRIGGER hierarchy_after_insert AFTER INSERT ON objs WHEN new.p=%s BEGIN
+  UPDATE hierarchy_dirty SET dirty=1;
+END;
+CREATE TRIGGER hierarchy_after_delete AFTER DELETE ON objs WHEN old.p=%s BEGIN
+  UPDATE hierarchy_dirty SET dirty=1;
+END;
+CREATE TRIGGER hierarchy_after_update AFTER UPDATE ON objs WHEN (old.p=%s) OR (new.p=%s) BEGIN
+  UPDATE hierarchy_dirty SET dirty=1;
+END;""" % (rdfs_subclassof, rdfs_subclassof, rdfs_subclassof, rdfs_subclassof))
+    self._update_hierarchy()
+    
+  def disable_hierarchy_index(self):
+    if not self.hierarchy_indexed: return
+    self.hierarchy_indexed = False
+    self.hierarchy_changes = -1
+    
+    self.execute("""DROP TRIGGER hierarchy_after_insert""")
+    self.execute("""DROP TRIGGER hierarchy_after_delete""")
+    self.execute("""DROP TRIGGER hierarchy_after_update""")
+    self.execute("""DROP TABLE hierarchy""")
+    self.execute("""DROP TABLE hierarchy_intervals""")
+    self.execute("""DROP TABLE hierarchy_dirty""")
+    
+  def _update_hierarchy(self):
+    if self.hierarchy_changes == self.db.total_changes: return
+    
+    self.acquire_write_lock() # Rebuilding writes in the quadstore, even if it is performed when reading
+    try:
+      if self.hierarchy_changes == self.db.total_changes: return # Updated by another thread
+      if self.db.execute("""SELECT dirty FROM hierarchy_dirty""").fetchone()[0]:
+        self._rebuild_hierarchy()
+      elif self.hierarchy_changes == -1:
+        intervals = defaultdict(list)
+        for s, low, high in self.db.execute("""SELECT s, low, high FROM hierarchy_intervals ORDER BY s, low"""):
+          intervals[s].append((low, high))
+        self.hierarchy = (dict(self.db.execute("""SELECT s, post FROM hierarchy""")), intervals)
+      self.hierarchy_changes = self.db.total_changes
+    finally:
+      self.release_write_lock()
+    
+  def _rebuild_hierarchy(self):
+    children = defaultdict(list)
+    parents  = set()
+    for s, o in self.db.execute("""SELECT s, o FROM objs WHERE p=?""", (rdfs_subclassof,)):
+      children[o].append(s)
+      parents.add(s)
+    nodes = list(children.keys() - parents) + list(parents) # Roots first
+    
+    # Post-order numbering of a spanning tree; the tree interval of a node is [lowest post number in its subtree, its post number].
+    post   = {}
+    low    = {}
+    order  = []
+    cyclic = False
+    for root in nodes:
+      if root in low: continue
+      low[root] = len(order)
+      stack = [(root, iter(children.get(root, ())))]
+      while stack:
+        node, it = stack[-1]
+        for child in it:
+          if not child in low:
+            low[child] = len(order)
+            stack.append((child, iter(children.get(child, ()))))
+            break
+          elif not child in post: cyclic = True
+        else:
+          stack.pop()
+          post[node] = len(order)
+          order.append(node)
+          
+    # Multiple inheritance: a node also gets the intervals of its non-tree children.
+    # Children are numbered before their parents, except in cycles, which require additional passes.
+    intervals = { node : [(low[node], post[node])] for node in order }
+    changed = True
+    while changed:
+      changed = False
+      for node in order:
+        if not node in children: continue
+        l = sorted(set(intervals[node]).union(*(intervals[child] for child in children[node])))
+        merged = [l[0]]
+        for a, b in l[1:]:
+          if a <= merged[-1][1] + 1:
+            if b > merged[-1][1]: merged[-1] = (merged[-1][0], b)
+          else: merged.append((a, b))
+        if merged != intervals[node]:
+          intervals[node] = merged
+          changed = True
+      if not cyclic: break
+      
+    self.db.execute("""DELETE FROM hierarchy""")
+    self.db.execute("""DELETE FROM hierarchy_intervals""")
+    self.db.executemany("""INSERT INTO hierarchy VALUES (?,?)""", post.items())
+    self.db.executemany("""INSERT INTO hierarchy_intervals VALUES (?,?,?)""", ((node, a, b) for node, l in intervals.items() for a, b in l))
+    self.db.execute("""UPDATE hierarchy_dirty SET dirty=0""")
+    self.hierarchy = (post, intervals) # A single assignment, for the threads that are reading it
+    
+  def _hierarchy_is_subclass(self, s, parents):
+    self._update_hierarchy()
+    post, intervals = self.hierarchy
+    x = post.get(s)
+    if x is None: return False
+    for parent in parents:
+      for a, b in intervals.get(parent, ()):
+        if a <= x <= b: return True
+    return False
+    
+  def analyze(self):
+    self.execute("""DROP TABLE IF EXISTS predicate_stats""")
+    self.execute("""CREATE TABLE predicate_stats (p INTEGER PRIMARY KEY, nb INTEGER, nb_values INTEGER)""")
+    self.execute("""INSERT INTO predicate_stats SELECT p, COUNT(), COUNT(DISTINCT o) FROM quads GROUP BY p""")
+    self.predicate_stats = False
+    self.get_predicate_stats()
+    
+  def get_predicate_stats(self):
+    if self.predicate_stats is False:
+      if self.execute("""SELECT 1 FROM sqlite_master WHERE type='table' AND name='predicate_stats'""").fetchone():
+        self.predicate_stats = dict(self.execute("""SELECT p, nb FROM predicate_stats"""))
+        try:
+          self.predicate_values = dict(self.execute("""SELECT p, nb_values FROM predicate_stats"""))
+        except sqlite3.OperationalError: # Statistics from an older version, without the number of values
+          self.predicate_values = None
+      else:
+        self.predicate_stats  = None
+        self.predicate_values = None
+    return self.predicate_stats
+  
+  def get_predicate_values(self):
+    self.get_predicate_stats()
+    return self.predicate_values
+  
   def disable_full_text_search(self, prop_storid):
     if not isinstance(prop_storid, int): prop_storid = prop_storid.storid
     self.prop_fts.discard(prop_storid)
@@ -1035,7 +1960,7 @@ class SubGraph(BaseSubGraph):
     BaseSubGraph.__init__(self, parent, onto)
     self.c      = c
     self.db     = db
-    self.execute          = db.execute
+    self.execute          = parent.execute
     self._abbreviate       = parent._abbreviate
     self._unabbreviate     = parent._unabbreviate
     self._new_numbered_iri = parent._new_numbered_iri
@@ -1047,6 +1972,8 @@ class SubGraph(BaseSubGraph):
     datas        = []
     new_abbrevs  = []
     
+    if self.parent.bulk_level: self.parent.flush_bulk_insert()
+    self.onto.world._reasoning_changes = None # Parsed triples are not tracked => next incremental reasoning will be complete
     cur = self.db.cursor()
     
     if delete_existing_triples:
@@ -1178,6 +2105,18 @@ class SubGraph(BaseSubGraph):
     if (s is None) or (p is None) or (o is None): raise ValueError
     self.execute("INSERT OR IGNORE INTO objs VALUES (?, ?, ?, ?)", (self.c, s, p, o))
     
+  def _set_obj_triple_raw_bulk_spo(self, s, p, o):
+    if (s is None) or (p is None) or (o is None): raise ValueError
+    if (s, p) in self.parent.bulk_sp: self.parent.flush_bulk_insert()
+    self.parent._execute_nobulk("DELETE FROM objs WHERE c=? AND s=? AND p=?", (self.c, s, p,))
+    self._add_obj_triple_raw_bulk_spo(s, p, o)
+    
+  def _add_obj_triple_raw_bulk_spo(self, s, p, o):
+    if (s is None) or (p is None) or (o is None): raise ValueError
+    self.parent.bulk_objs.append((self.c, s, p, o))
+    self.parent.bulk_sp.add((s, p))
+    if len(self.parent.bulk_objs) > 1000000: self.parent.flush_bulk_insert()
+    
   def _del_obj_triple_raw_spo(self, s = None, p = None, o = None):
     if s is None:
       if p is None:
@@ -1203,6 +2142,18 @@ class SubGraph(BaseSubGraph):
     if (s is None) or (p is None) or (o is None) or (d is None): raise ValueError
     self.execute("INSERT OR IGNORE INTO datas VALUES (?, ?, ?, ?, ?)", (self.c, s, p, o, d))
     
+  def _set_data_triple_raw_bulk_spod(self, s, p, o, d):
+    if (s is None) or (p is None) or (o is None) or (d is None): raise ValueError
+    if (s, p) in self.parent.bulk_sp: self.parent.flush_bulk_insert()
+    self.parent._execute_nobulk("DELETE FROM datas WHERE c=? AND s=? AND p=?", (self.c, s, p,))
+    self._add_data_triple_raw_bulk_spod(s, p, o, d)
+    
+  def _add_data_triple_raw_bulk_spod(self, s, p, o, d):
+    if (s is None) or (p is None) or (o is None) or (d is None): raise ValueError
+    self.parent.bulk_datas.append((self.c, s, p, o, d))
+    self.parent.bulk_sp.add((s, p))
+    if len(self.parent.bulk_datas) > 1000000: self.parent.flush_bulk_insert()
+    
   def _del_data_triple_raw_spod(self, s, p, o, d):
     if s is None:
       if p is None:
@@ -1416,6 +2367,8 @@ class SubGraph(BaseSubGraph):
   def _iter_triples(self, quads = False, sort_by_s = False):
     return self.parent._iter_triples(quads, sort_by_s, self.c)
   
+  def _iter_ntriples_chunks(self, quads = False): return self.parent._iter_ntriples_chunks(quads, self.c)
+  
   def _refactor(self, storid, new_iri): return self.parent._refactor(storid, new_iri)
     
   def _get_obj_triples_transitive_sp(self, s, p):
@@ -1449,6 +2402,9 @@ class _SearchMixin(list):
   
   def sql_request(self):
     transits, sql, params = self.sql_components()
+    if transits:
+      if self.world.graph.closure_indexed:   self.world.graph._repair_closure()
+      if self.world.graph.hierarchy_indexed: self.world.graph._update_hierarchy()
     if transits: sql = "WITH RECURSIVE %s %s" % (", ".join(transits), sql)
     return sql, params
     
@@ -1466,20 +2422,42 @@ class _SearchMixin(list):
         else:
           o_2_bm25[o] = bm25
       os_bm25s = sorted(o_2_bm25.items(), key = lambda x: x[1])
-      return ((self.world._get_by_storid(o), bm25) for (o, bm25) in os_bm25s)
+      return zip(self.world.get_many([o for (o, bm25) in os_bm25s]), [bm25 for (o, bm25) in os_bm25s])
     else:
       sql, params = self.sql_request()
-      return (self.world._get_by_storid(o) for (o,) in self.world.graph.execute(sql, params).fetchall())
+      return self.world.get_many([o for (o,) in self.world.graph.execute(sql, params).fetchall()])
   _get_content = _do_search  
 
   def _do_search_rdf(self):
     sql, params = self.sql_request()
     return self.world.graph.execute(sql, params).fetchall()
   
+  def explain(self):
+    sql, params = self.sql_request()
+    lines  = []
+    depths = {}
+    for id, parent, notused, detail in self.world.graph.execute("EXPLAIN QUERY PLAN %s" % sql, params).fetchall():
+      depths[id] = depths.get(parent, 0) + 1
+      lines.append("%s%s" % ("  " * depths[id], detail))
+    return "SQLite plan:\n%s" % "\n".join(lines)
+  
   def first(self):
     sql, params = self.sql_request()
     o = self.world.graph.execute(sql, params).fetchone()
     if o: return self.world._get_by_storid(o[0])
+    
+  def iter_chunks(self, size = 1000):
+    if self.has_bm25(): # Results must be sorted by relevance
+      l = list(self._do_search())
+      for i in range(0, len(l), size): yield l[i : i + size]
+      return
+    
+    sql, params = self.sql_request()
+    cursor = self.world.graph.execute(sql, params) # A new cursor => can iterate while still being able to query the database
+    while True:
+      rows = cursor.fetchmany(size)
+      if not rows: break
+      yield self.world.get_many([o for (o,) in rows])
 
   def has_bm25(self): return False
   
@@ -1490,27 +2468,63 @@ class _SearchMixin(list):
         
       
 class _PopulatedSearchList(FirstList):
-  __slots__ = ["world", "prop_vals", "_c", "id", "transits", "tables", "conditions", "params", "alternatives", "excepts", "except_conditions", "except_params", "nested_searchs", "target", "bm25"]
+  __slots__ = ["world", "prop_vals", "_c", "id", "transits", "tables", "conditions", "params", "alternatives", "excepts", "except_conditions", "except_params", "nested_searchs", "target", "bm25", "plan", "case_sensitive", "cache_key"]
   def has_bm25(self): return self.bm25
+  
+  def __getattr__(self, attr): return _SearchList.__getattr__(self, attr)
 
 _NEXT_SEARCH_ID = 0
+_INTERSECTION_ESTIMATE_LIMIT = 1000
+_SEARCH_ESTIMATE_LIMIT       = 1000
+_SEARCH_ESTIMATE_CACHE_SIZE  = 10000
+_SEARCH_LOOKUP_ESTIMATE      = 10 # For lookups, without statistics
+_SEARCH_TRANSITIVE_PREDICATES = { " type" : (rdf_type,), " subclass_of" : (rdfs_subclassof,), " subproperty_of" : (rdfs_subpropertyof,), " is_a" : (rdf_type, rdfs_subclassof) }
+_SEARCH_COMPILED_ATTRS = { "transits", "tables", "conditions", "params", "alternatives", "excepts", "except_conditions", "except_params", "nested_searchs", "target", "plan" }
+
+def _search_cache_value(v):
+  if isinstance(v, FTS):  return ("FTS", str(v), v.lang)
+  if isinstance(v, NumS): return ("NumS", tuple(v.operators_and_values))
+  if isinstance(v, Or):   return ("Or", tuple(Class.storid for Class in v.Classes))
+  if isinstance(v, (int, float, str)): return (v.__class__.__name__, v)
+  raise TypeError # Nested searches cannot be cached
+
+def _search_cache_key(prop_vals, case_sensitive):
+  try:              return (case_sensitive, tuple((k, None if v is None else _search_cache_value(v), d) for (k, v, d) in prop_vals))
+  except TypeError: return None
+  
 class _SearchList(FirstList, _SearchMixin, _LazyListMixin):
-  __slots__ = ["world", "prop_vals", "_c", "id", "transits", "tables", "conditions", "params", "alternatives", "excepts", "except_conditions", "except_params", "nested_searchs", "target", "bm25"]
+  __slots__ = ["world", "prop_vals", "_c", "id", "transits", "tables", "conditions", "params", "alternatives", "excepts", "except_conditions", "except_params", "nested_searchs", "target", "bm25", "plan", "case_sensitive", "cache_key"]
   _PopulatedClass = _PopulatedSearchList
   
   def has_bm25(self): return self.bm25
   
-  def __init__(self, world, prop_vals, c = None, case_sensitive = True, bm25 = False):
+  def __init__(self, world, prop_vals, c = None, case_sensitive = True, bm25 = False, cache_key = None):
     global _NEXT_SEARCH_ID
     
     super().__init__()
-    self.world     = world
-    self.prop_vals = prop_vals
-    self._c         = c
+    self.world          = world
+    self.prop_vals      = prop_vals
+    self._c             = c
+    self.case_sensitive = case_sensitive
+    self.cache_key      = cache_key
+    self.bm25           = bm25
     
     _NEXT_SEARCH_ID += 1
     self.id = _NEXT_SEARCH_ID
-
+    
+    if cache_key is None: self._compile()
+    
+  def __getattr__(self, attr): # Searches answered by the search cache are compiled only if needed
+    if not attr in _SEARCH_COMPILED_ATTRS: raise AttributeError(attr)
+    _SearchList._compile(self)
+    return object.__getattribute__(self, attr)
+  
+  def _compile(self):
+    world          = self.world
+    prop_vals      = self.prop_vals
+    c              = self._c
+    case_sensitive = self.case_sensitive
+    
     self.tables            = []
     self.transits          = []
     self.conditions        = []
@@ -1520,12 +2534,14 @@ class _SearchList(FirstList, _SearchMixin, _LazyListMixin):
     self.except_conditions = []
     self.except_params     = []
     self.nested_searchs    = []
-
-    self.bm25 = bm25
-
+    
+    closure_indexed   = world.graph.closure_indexed
+    hierarchy_indexed = world.graph.hierarchy_indexed
+    
+    self.plan = _SearchList._plan(self, prop_vals, c, case_sensitive)
     
     n = 0
-    for k, v, d in prop_vals:
+    for k, v, d in [prop_val for prop_val in prop_vals if prop_val[1] is None] + [(k, v, d) for (k, v, d, estimate, scan) in self.plan]:
       if v is None:
         self.excepts.append(k)
         continue
@@ -1552,7 +2568,10 @@ class _SearchList(FirstList, _SearchMixin, _LazyListMixin):
         if n > 1: self.conditions.append("q%s.s = q%s.s" % (i, self.target))
         self.tables    .append("resources")
         self.conditions.append("resources.storid = q%s.s" % i)
-        if case_sensitive:
+        if isinstance(v, Param):
+          self.conditions.append("resources.iri = ?")
+          self.params.append(v)
+        elif case_sensitive:
           if "*" in v: self.conditions.append("resources.iri GLOB ?")
           else:        self.conditions.append("resources.iri = ?")
           self.params.append(v)
@@ -1594,7 +2613,18 @@ UNION ALL SELECT objs.s FROM objs, %s WHERE objs.o=%s.x AND objs.p IN (%s, %s))
         else:
           if isinstance(v, Or): v = "), (".join(str(c.storid) for c in v.Classes)
           transit_name = "transit_%s" % i
-          self.transits.append("""%s(x)
+          if hierarchy_indexed:
+            self.transits.append("""%s(x)
+AS (      VALUES (%s)
+UNION SELECT h.s FROM hierarchy_intervals i, hierarchy h WHERE i.s IN (%s) AND h.post BETWEEN i.low AND i.high)
+""" % (transit_name, v, str(v).replace("), (", ", ")))
+          elif closure_indexed:
+            self.transits.append("""%s(x)
+AS (      VALUES (%s)
+UNION ALL SELECT d FROM closure WHERE p=%s AND a IN (%s))
+""" % (transit_name, v, rdfs_subclassof, str(v).replace("), (", ", ")))
+          else:
+            self.transits.append("""%s(x)
 AS (      VALUES (%s)
 UNION ALL SELECT objs.s FROM objs, %s WHERE objs.o=%s.x AND objs.p=%s)
 """ % (transit_name, v, transit_name, transit_name, rdfs_subclassof))
@@ -1614,7 +2644,18 @@ UNION ALL SELECT objs.s FROM objs, %s WHERE objs.o=%s.x AND objs.p=%s)
         else:
           if isinstance(v, Or): v = "), (".join(str(c.storid) for c in v.Classes)
           transit_name = "transit_%s" % i
-          self.transits.append("""%s(x)
+          if hierarchy_indexed:
+            self.transits.append("""%s(x)
+AS (      VALUES (%s)
+UNION SELECT h.s FROM hierarchy_intervals i, hierarchy h WHERE i.s IN (%s) AND h.post BETWEEN i.low AND i.high)
+""" % (transit_name, v, str(v).replace("), (", ", ")))
+          elif closure_indexed:
+            self.transits.append("""%s(x)
+AS (      VALUES (%s)
+UNION ALL SELECT d FROM closure WHERE p=%s AND a IN (%s))
+""" % (transit_name, v, rdfs_subclassof, str(v).replace("), (", ", ")))
+          else:
+            self.transits.append("""%s(x)
 AS (      VALUES (%s)
 UNION ALL SELECT objs.s FROM objs, %s WHERE objs.o=%s.x AND objs.p=%s)
 """ % (transit_name, v, transit_name, transit_name, rdfs_subclassof))
@@ -1634,7 +2675,13 @@ UNION ALL SELECT objs.s FROM objs, %s WHERE objs.o=%s.x AND objs.p=%s)
         else:
           if isinstance(v, Or): v = "), (".join(str(c.storid) for c in v.Classes)
           transit_name = "transit_%s" % i
-          self.transits.append("""%s(x)
+          if closure_indexed:
+            self.transits.append("""%s(x)
+AS (      VALUES (%s)
+UNION ALL SELECT d FROM closure WHERE p=%s AND a IN (%s))
+""" % (transit_name, v, rdfs_subpropertyof, str(v).replace("), (", ", ")))
+          else:
+            self.transits.append("""%s(x)
 AS (      VALUES (%s)
 UNION ALL SELECT objs.s FROM objs, %s WHERE objs.o=%s.x AND objs.p=%s)
 """ % (transit_name, v, transit_name, transit_name, rdfs_subpropertyof))
@@ -1677,6 +2724,11 @@ UNION ALL SELECT objs.s FROM objs, %s WHERE objs.o=%s.x AND objs.p=%s)
           current_table = self.tables.pop()
           if current_table.endswith(" INDEXED BY index_objs_sp"): current_table2 = "%sop" % current_table[:-2]
           else:                                                   current_table2 = current_table
+          if not c is None: # The table moves into the alternatives, with its condition
+            cond1   = "%s AND %s" % (self.conditions.pop(), cond1)
+            cond2   = "q%s.c = ? AND %s" % (i, cond2)
+            params1 = [self.params.pop()] + params1
+            params2 = [c] + params2
           self.alternatives.append((([current_table], cond1, params1), ([current_table2], cond2, params2)))
           
       else: # Prop without inverse
@@ -1699,16 +2751,10 @@ UNION ALL SELECT objs.s FROM objs, %s WHERE objs.o=%s.x AND objs.p=%s)
             for search in v.searches:
               if search.excepts: raise NotImplementedError("Nested search with union and exception are not supported.")
               self.transits.extend(search.transits)
-              if search.alternatives:
-                for combination in all_combinations(search.alternatives):
-                  combination_tabless, combination_conditions, combination_paramss = zip(*combination)
-                  alternatives.append((search.tables + [t for ts in combination_tabless for t in ts],
-                                       " AND ".join(search.conditions + combination_conditions + ["q%s.o = q%s.s" % (i, search.target)]),
-                                       search.params + [p for ps in combination_paramss for p in ps]))
-              else:
-                alternatives.append((search.tables,
-                                     " AND ".join(search.conditions + ["q%s.o = q%s.s" % (i, search.target)]),
-                                     search.params))
+              conditions2, params2 = search.alternative_conditions()
+              alternatives.append((search.tables,
+                                   " AND ".join(search.conditions + conditions2 + ["q%s.o = q%s.s" % (i, search.target)]),
+                                   search.params + params2))
             self.alternatives.append(tuple(alternatives))
             
           elif isinstance(v, (_SearchMixin, _PopulatedSearchList)):
@@ -1752,7 +2798,78 @@ UNION ALL SELECT objs.s FROM objs, %s WHERE objs.o=%s.x AND objs.p=%s)
           self.except_conditions.append("quads.s = candidates.s AND quads.p = ?")
           self.except_params    .append(except_p)
           
-  def sql_components(self, last_request = True):
+  def _plan(self, prop_vals, c, case_sensitive):
+    # Orders the criteria from the most selective to the least selective; the first one is the driving table.
+    # Criteria that require a scan (e.g. GLOB or NumS) are estimated by the number of triples with the predicate,
+    # and criteria that require a lookup by the average number of triples per value (see Graph.analyze()).
+    # Without statistics, lookups are simply placed before scans, and the order of the criteria is kept otherwise.
+    plan = [[k, v, d, None, False] for (k, v, d) in prop_vals if not v is None]
+    if len(plan) > 1:
+      for criterion in plan:
+        criterion[3], criterion[4] = _SearchList._estimate(self, criterion[0], criterion[1], criterion[2], c, case_sensitive)
+      plan.sort(key = lambda criterion: (criterion[3], criterion[4]))
+    return plan
+  
+  def _estimate(self, k, v, d, c, case_sensitive):
+    if isinstance(k, tuple): return float("inf"), True # Props with inverse cannot be the driving table
+    if isinstance(v, Param): return 1, False # Value not yet known, but exact values are usually selective
+    
+    if   k == " iri":
+      if (not case_sensitive) or v.startswith("*"): return self.world.graph.current_resource, True
+    elif isinstance(v, (_SearchMixin, _PopulatedSearchList, _PopulatedUnionSearchList, _PopulatedIntersectionSearchList)):
+      return _SearchList._estimate_scan(self, _SEARCH_TRANSITIVE_PREDICATES.get(k, (k,))), True
+    elif k in _SEARCH_TRANSITIVE_PREDICATES: pass
+    elif isinstance(v, NumS) or (isinstance(v, str) and ((v == "*") or ("*" in v) or (not case_sensitive)) and not isinstance(v, FTS)):
+      return _SearchList._estimate_scan(self, (k,)), True
+    
+    graph = self.world.graph
+    if graph.get_predicate_stats() is None:
+      if k == " iri": return 1, False
+      return _SEARCH_LOOKUP_ESTIMATE, False
+    
+    values = graph.predicate_values
+    if not values is None:
+      if k == " iri": return 1, False
+      ps        = _SEARCH_TRANSITIVE_PREDICATES.get(k, (k,))
+      nb_values = sum(values.get(p, 0) for p in ps)
+      if not nb_values: return 0, False
+      return -(-_SearchList._estimate_scan(self, ps) // nb_values), False
+    
+    # Statistics from an older version, without the number of values: the results are counted (up to a limit)
+    try:              key = (k, _search_cache_value(v), d, c, case_sensitive)
+    except TypeError: key = None
+    if graph.search_estimates_changes != graph.db.total_changes:
+      graph.search_estimates.clear()
+      graph.search_estimates_changes = graph.db.total_changes
+    estimate = graph.search_estimates.get(key)
+    if estimate is None:
+      sql, params = _SearchList(self.world, [(k, v, d)], c, case_sensitive).sql_request()
+      estimate = graph.execute("SELECT COUNT() FROM (%s LIMIT %s)" % (sql, _SEARCH_ESTIMATE_LIMIT), params).fetchone()[0]
+      if not key is None:
+        if len(graph.search_estimates) >= _SEARCH_ESTIMATE_CACHE_SIZE: graph.search_estimates.clear()
+        graph.search_estimates[key] = estimate
+    return estimate, False
+  
+  def _estimate_scan(self, ps):
+    stats = self.world.graph.get_predicate_stats()
+    if stats is None: return _SEARCH_ESTIMATE_LIMIT
+    return sum(stats.get(p, 0) for p in ps)
+  
+  def alternative_conditions(self):
+    # Each set of alternatives becomes a single condition (a disjunction of EXISTS), instead of one request
+    # per combination of alternatives.
+    conditions = []
+    params     = []
+    for alternatives in self.alternatives:
+      conditions2 = []
+      for tables, condition, params2 in alternatives:
+        if tables: conditions2.append("EXISTS (SELECT 1 FROM %s WHERE %s)" % (", ".join(tables), condition))
+        else:      conditions2.append("(%s)" % condition)
+        params.extend(params2)
+      conditions.append("(%s)" % " OR ".join(conditions2))
+    return conditions, params
+  
+  def sql_join_components(self):
     transits   = self.transits   + [x for search in self.nested_searchs for x in search.transits]
     tables     = self.tables     + [x for search in self.nested_searchs for x in search.tables]
     conditions = self.conditions + [x for search in self.nested_searchs for x in search.conditions]
@@ -1762,24 +2879,20 @@ UNION ALL SELECT objs.s FROM objs, %s WHERE objs.o=%s.x AND objs.p=%s)
       for search in self.nested_searchs:
         if search.excepts: raise ValueError("Nested searches with exclusions are not supported!")
         
-    if not self.alternatives:
-      if self.bm25:
-        sql = "SELECT DISTINCT q%s.s, bm25(%s) FROM %s WHERE %s" % (self.target, self.bm25, ", "   .join(tables), " AND ".join(conditions))
-      else:
-        sql = "SELECT DISTINCT q%s.s FROM %s WHERE %s" % (self.target, ", "   .join(tables), " AND ".join(conditions))
-        
+    for search in [self, *self.nested_searchs]:
+      if search.alternatives:
+        conditions2, params2 = search.alternative_conditions()
+        conditions.extend(conditions2)
+        params    .extend(params2)
+    return transits, tables, conditions, params
+  
+  def sql_components(self, last_request = True):
+    transits, tables, conditions, params = self.sql_join_components()
+    
+    if self.bm25:
+      sql = "SELECT DISTINCT q%s.s, bm25(%s) FROM %s WHERE %s" % (self.target, self.bm25, ", "   .join(tables), " AND ".join(conditions))
     else:
-      conditions0 = conditions
-      params0     = params
-      params      = []
-      sqls        = []
-      for combination in all_combinations(self.alternatives):
-        combination_tabless, combination_conditions, combination_paramss = zip(*combination)
-        sql = "SELECT DISTINCT q%s.s FROM %s WHERE %s" % (self.target, ", ".join(tables + [t for ts in combination_tabless for t in ts]), " AND ".join(conditions0 + list(combination_conditions)))
-        sqls.append(sql)
-        params.extend(params0)
-        for combination_params in combination_paramss: params.extend(combination_params)
-      sql = "SELECT DISTINCT * FROM (\n%s\n)" % "\nUNION ALL\n".join(sqls)
+      sql = "SELECT DISTINCT q%s.s FROM %s WHERE %s" % (self.target, ", "   .join(tables), " AND ".join(conditions))
       
     if self.excepts:
       if sql.startswith("SELECT DISTINCT"): sql = "SELECT %s" % sql[16:]
@@ -1790,6 +2903,36 @@ EXCEPT %s""" % ("\nUNION ALL ".join("""SELECT candidates.s FROM candidates, quad
       
     return transits, sql, params
   
+  def _get_cached(self):
+    if not self.cache_key is None: return self.world.search_cache.get(self.cache_key, self.world.graph.db.total_changes)
+    
+  def _do_search(self):
+    if self.cache_key is None: return _SearchMixin._do_search(self)
+    storids = self._get_cached()
+    if storids is None:
+      sql, params = self.sql_request()
+      storids = array("q", [o for (o,) in self.world.graph.execute(sql, params).fetchall()])
+      self.world.search_cache.add(self.cache_key, self.world.graph.db.total_changes, storids)
+    return self.world.get_many(storids)
+  _get_content = _do_search
+  
+  def first(self):
+    storids = self._get_cached()
+    if storids is None: return _SearchMixin.first(self)
+    if storids: return self.world._get_by_storid(storids[0])
+    
+  def iter_chunks(self, size = 1000):
+    storids = self._get_cached()
+    if storids is None:
+      yield from _SearchMixin.iter_chunks(self, size)
+    else:
+      for i in range(0, len(storids), size): yield self.world.get_many(storids[i : i + size])
+      
+  def __len__(self):
+    storids = self._get_cached()
+    if storids is None: return _SearchMixin.__len__(self)
+    return len(storids)
+  
   def __or__(self, other):
     if isinstance(other, _UnionSearchList):
       return _UnionSearchList(self.world, [self, *other.searches])
@@ -1800,6 +2943,19 @@ EXCEPT %s""" % ("\nUNION ALL ".join("""SELECT candidates.s FROM candidates, quad
       return _IntersectionSearchList(self.world, [self, *other.searches])
     return _IntersectionSearchList(self.world, [self, other])
   
+  def explain(self):
+    lines = []
+    for k, v, d, estimate, scan in self.plan:
+      if   isinstance(k, tuple): k = self.world._unabbreviate(k[0])
+      elif isinstance(k, int):   k = self.world._unabbreviate(k)
+      else:                      k = k.strip()
+      if isinstance(v, (_SearchMixin, _PopulatedSearchList)): v = "(nested search)"
+      if   estimate is None:          lines.append("  %s = %r" % (k, v))
+      elif estimate == float("inf"): lines.append("  %s = %r: property with inverse, checked last" % (k, v))
+      elif scan:                     lines.append("  %s = %r: scan, about %s triples" % (k, v, estimate))
+      else:                          lines.append("  %s = %r: lookup, %s%s triples" % (k, v, estimate, "+" if estimate >= _SEARCH_ESTIMATE_LIMIT else ""))
+    return "Criteria, from the driving one:\n%s\n%s" % ("\n".join(lines), _SearchMixin.explain(self))
+  
   def dump(self):
     sql, params = self.sql_request()
     print("search debug:")
@@ -1815,6 +2971,48 @@ EXCEPT %s""" % ("\nUNION ALL ".join("""SELECT candidates.s FROM candidates, quad
 
 
 
+class _PreparedSearch(object):
+  def __init__(self, world, prop_vals, case_sensitive = True):
+    self.world          = world
+    self.prop_vals      = prop_vals
+    self.case_sensitive = case_sensitive
+    self.names          = { v.name for (k, v, d) in prop_vals if isinstance(v, Param) }
+    self._compile()
+    
+  def _compile(self):
+    graph = self.world.graph
+    self.indexed = (graph.closure_indexed, graph.hierarchy_indexed)
+    transits, sql, params = _SearchList(self.world, self.prop_vals, None, self.case_sensitive).sql_components()
+    if transits: sql = "WITH RECURSIVE %s %s" % (", ".join(transits), sql)
+    self.sql          = sql
+    self.params       = params
+    self.has_transits = bool(transits)
+    self.param_names  = [(i, param.name) for i, param in enumerate(params) if isinstance(param, Param)]
+    
+  def _get_params(self, values):
+    graph = self.world.graph
+    if self.indexed != (graph.closure_indexed, graph.hierarchy_indexed): self._compile()
+    if self.has_transits:
+      if graph.closure_indexed:   graph._repair_closure()
+      if graph.hierarchy_indexed: graph._update_hierarchy()
+      
+    if set(values) != self.names: raise ValueError("Expected values for Params %s, got %s!" % (sorted(self.names), sorted(values)))
+    params = list(self.params)
+    for i, name in self.param_names: params[i] = self.world._to_rdf(values[name])[0]
+    return params
+  
+  def __call__(self, **values):
+    params = self._get_params(values)
+    return self.world.get_many([o for (o,) in self.world.graph.execute(self.sql, params).fetchall()])
+  
+  def first(self, **values):
+    params = self._get_params(values)
+    o = self.world.graph.execute(self.sql, params).fetchone()
+    if o: return self.world._get_by_storid(o[0])
+    
+  def __repr__(self): return "<prepared search %s>" % ", ".join("%s = %r" % (k.strip() if isinstance(k, str) else k, v) for (k, v, d) in self.prop_vals)
+  
+  
 class _PopulatedUnionSearchList(FirstList):
   __slots__ = ["world", "searches"]
   
@@ -1867,28 +3065,20 @@ class _UnionSearchList(FirstList, _SearchMixin, _LazyListMixin):
     alternatives = []
     for search in self.searches:
       if search.excepts: raise NotImplementedError("Nested search with both union and exception are not supported.")
-      if search.alternatives:
-        for combination in all_combinations(search.alternatives):
-          combination_tabless, combination_conditions, combination_paramss = zip(*combination)
-          for alternative_conditions in gen(search.target):
-            alternatives.append((search.tables + [t for ts in combination_tabless for t in ts],
-                                 " AND ".join(search.conditions + combination_conditions + alternative_conditions),
-                                 search.params + [p for ps in combination_paramss for p in ps]))
-            
-      else:
-        for alternative_conditions in gen(search.target):
-          alternatives.append((search.tables, " AND ".join(search.conditions + alternative_conditions), search.params))
+      conditions2, params2 = search.alternative_conditions()
+      for alternative_conditions in gen(search.target):
+        alternatives.append((search.tables, " AND ".join(search.conditions + conditions2 + alternative_conditions), search.params + params2))
         
     return tuple(alternatives)
     
 
 
 class _PopulatedIntersectionSearchList(FirstList):
-  __slots__ = ["world", "searches"]
+  __slots__ = ["world", "searches", "id", "ordered_searches", "ordered_changes"]
   
 
 class _IntersectionSearchList(FirstList, _SearchMixin, _LazyListMixin):
-  __slots__ = ["world", "searches"]
+  __slots__ = ["world", "searches", "id", "ordered_searches", "ordered_changes"]
   _PopulatedClass = _PopulatedIntersectionSearchList
   
   def has_bm25(self):
@@ -1898,22 +3088,51 @@ class _IntersectionSearchList(FirstList, _SearchMixin, _LazyListMixin):
   
   nested_searchs = []
   def __init__(self, world, searches):
-    self.world    = world
-    self.searches = searches
+    global _NEXT_SEARCH_ID
+    self.world            = world
+    self.searches         = searches
+    self.ordered_searches = None # Computed when first needed, and again when the quadstore is modified
+    self.ordered_changes  = None
     
+    _NEXT_SEARCH_ID += 1
+    self.id = _NEXT_SEARCH_ID
+    
+  def _estimate_size(self, search):
+    sql, params = search.sql_request()
+    return self.world.graph.execute("SELECT COUNT() FROM (%s LIMIT %s)" % (sql, _INTERSECTION_ESTIMATE_LIMIT), params).fetchone()[0]
+  
   def sql_components(self, last_request = True):
-    transits_sqls_params = [s.sql_components(False) for s in self.searches]
-    if last_request:
-      sql = "SELECT DISTINCT * FROM (\n%s\n)" % "\nINTERSECT\n".join(sql2 for (transits2, sql2, params2) in transits_sqls_params)
-    else:
-      sql = "SELECT DISTINCT * AS x FROM (\n%s\n)" % "\nINTERSECT\n".join(sql2 for (transits2, sql2, params2) in transits_sqls_params)
-      
-    params   = []
-    transits = []
-    for (transits2, sql2, params2) in transits_sqls_params:
-      params  .extend(params2)
-      transits.extend(transits2)
-      
+    # The smallest search (estimated with a LIMIT) provides the candidates; the other searches are checked
+    # for each candidate, with a correlated EXISTS when possible (using the objs(s,p) index).
+    if self.ordered_changes != self.world.graph.db.total_changes:
+      self.ordered_searches = sorted(self.searches, key = self._estimate_size)
+      self.ordered_changes  = self.world.graph.db.total_changes
+    searches = self.ordered_searches
+    candidates = "candidates_%s" % self.id
+    
+    sql, params = searches[0].sql_request()
+    transits   = []
+    conditions = []
+    params     = list(params)
+    for search in searches[1:]:
+      if isinstance(search, _SearchList) and not (search.excepts or search.bm25):
+        transits2, tables2, conditions2, params2 = search.sql_join_components()
+        target = [table for table in tables2 if table.endswith(" q%s" % search.target)]
+        if target: # Start from the target table, so as the candidate is searched with the objs(s,p) index
+          tables2 = "%s CROSS JOIN %s" % (target[0], ", ".join(table for table in tables2 if not table is target[0])) if len(tables2) > 1 else target[0]
+        else:
+          tables2 = ", ".join(tables2)
+        transits  .extend(transits2)
+        conditions.append("EXISTS (SELECT 1 FROM %s WHERE %s AND q%s.s = %s.s)" % (tables2, " AND ".join(conditions2), search.target, candidates))
+        params    .extend(params2)
+      else:
+        sql2, params2 = search.sql_request()
+        conditions.append("%s.s IN (SELECT s FROM (%s))" % (candidates, sql2))
+        params    .extend(params2)
+        
+    if searches[0].has_bm25(): sql = "SELECT s FROM (%s)" % sql
+    sql = "SELECT %s.s FROM (%s) %s" % (candidates, sql, candidates)
+    if conditions: sql = "%s WHERE %s" % (sql, " AND ".join(conditions))
     return transits, sql, params
     
   def __and__(self, other):
@@ -1934,21 +3153,13 @@ class _IntersectionSearchList(FirstList, _SearchMixin, _LazyListMixin):
   def explode(self, gen): raise NotImplementedError("Nested search with intersection are not supported.")
   
   def _do_search(self):
-    return (self.world._get_by_storid(o) for (o,) in self._do_search_rdf())
+    return self.world.get_many([o for (o,) in self._do_search_rdf()])
   _get_content = _do_search
   
-  def _do_search_rdf(self):
-    r = set()
-    first = True
-    for search in self.searches:
-      sql, params = search.sql_request()
-      r1 = self.world.graph.execute(sql, params).fetchall()
-      if first:
-        r.update(r1)
-        first = False
-      else:
-        r.intersection_update(r1)
-    return list(r)
-  
-  def __len__(self):
-    return len(self._do_search_rdf())
+  def iter_chunks(self, size = 1000):
+    sql, params = self.sql_request()
+    cursor = self.world.graph.execute(sql, params)
+    while True:
+      rows = cursor.fetchmany(size)
+      if not rows: break
+      yield self.world.get_many([o for (o,) in rows])
@@ -39,6 +39,12 @@ class NumS(object):
     #  assert (type(value) is float) or (type(value) is int)
     
     
+class Param(object):
+  __slots__ = ["name"]
+  def __init__(self, name): self.name = name
+  def __repr__(self): return "Param(%r)" % self.name
+  
+  
 class normstr(str):
   __slots__ = []
 